@@ -4,12 +4,17 @@ from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.services.analysis import analyze_stock, analyze_stock_stream
+from app.services.analysis.article_analyzer import get_cache_stats as get_analysis_cache_stats, llm_usage
+from app.services.analysis.llm_gateway import get_llm_stats
+from app.services.analysis.dedup import get_dedup_stats
 from app.models.schemas import StockAnalysisResponse
 from app.db.session import get_db
 from app.db.models import AnalyzedArticle, WeeklySummary, Signal
 from datetime import datetime, timedelta
 from app.workers.news_analyzer import get_rate_limiter_stats
 from app.workers import get_scheduler_status
+from app.services import stocks_service, upstream
+from app.services.scrape_cache import get_scrape_cache_stats
 
 router = APIRouter()
 
@@ -160,6 +165,7 @@ def get_system_status(db: Session = Depends(get_db)) -> Any:
     Get system status including:
     - Background scheduler status
     - Rate limiter statistics
+    - Cache statistics
     - Database statistics
     """
     try:
@@ -189,6 +195,13 @@ def get_system_status(db: Session = Depends(get_db)) -> Any:
                 "status": "healthy" if rate_limiter["remaining"] > 5 else "near_limit",
                 "warning": "Approaching rate limit" if rate_limiter["remaining"] <= 5 else None
             },
+            "caches": stocks_service.get_cache_stats(),
+            "upstream": upstream.get_upstream_stats(),
+            "scrape_cache": get_scrape_cache_stats(),
+            "analysis_cache": get_analysis_cache_stats(),
+            "llm_usage": llm_usage.get_stats(),
+            "llm_gateway": get_llm_stats(),
+            "dedup": get_dedup_stats(),
             "database": {
                 "total_analyzed_articles": total_articles,
                 "total_weekly_summaries": total_summaries,
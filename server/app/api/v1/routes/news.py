@@ -10,12 +10,12 @@ router = APIRouter(prefix="/news", tags=["news"])
 
 
 @router.get("/company")
-def company_news(
+async def company_news(
     symbol: str = Query(..., min_length=1),
     limit: int = Query(5, ge=1, le=20),
     fallbackToGoogle: bool = True,
 ):
-    result = news_service.get_company_news(
+    result = await news_service.get_company_news_async(
         symbol=symbol,
         limit=limit,
         fallback_to_google=fallbackToGoogle,
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Optional, List
 
 from fastapi import APIRouter, Query, HTTPException, Depends
@@ -13,106 +14,136 @@ router = APIRouter(prefix="/stocks", tags=["stocks"])
 
 
 @router.get("/quote")
-def quote(
+async def quote(
     symbol: str = Query(..., min_length=1),
     startDate: Optional[str] = None,
     endDate: Optional[str] = None,
     interval: str = "1D",
 ):
-    result = stocks_service.get_stock_quote(symbol, startDate, endDate, interval)
+    result = await stocks_service.get_stock_quote_async(symbol, startDate, endDate, interval)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 
 @router.get("/intraday")
-def intraday(symbol: str = Query(..., min_length=1)):
-    result = stocks_service.get_stock_intraday(symbol)
+async def intraday(symbol: str = Query(..., min_length=1)):
+    result = await stocks_service.get_stock_intraday_async(symbol)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 
 @router.get("/price-depth")
-def price_depth(symbol: str = Query(..., min_length=1)):
-    result = stocks_service.get_stock_price_depth(symbol)
+async def price_depth(symbol: str = Query(..., min_length=1)):
+    result = await stocks_service.get_stock_price_depth_async(symbol)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 
 @router.get("/company")
-def company(symbol: str = Query(..., min_length=1)):
-    result = stocks_service.get_company_info(symbol)
+async def company(symbol: str = Query(..., min_length=1)):
+    result = await stocks_service.get_company_info_async(symbol)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 
 @router.get("/shareholders")
-def shareholders(symbol: str = Query(..., min_length=1)):
-    result = stocks_service.get_company_shareholders(symbol)
+async def shareholders(symbol: str = Query(..., min_length=1)):
+    result = await stocks_service.get_company_shareholders_async(symbol)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 
 @router.get("/price-board")
-def price_board(symbols: str = Query(..., description="Comma-separated symbols, e.g. VNM,HPG")):
+async def price_board(symbols: str = Query(..., description="Comma-separated symbols, e.g. VNM,HPG")):
     parsed: List[str] = [s.strip() for s in symbols.split(",")]
     # print("Parsed symbols:", parsed)
-    result = stocks_service.get_price_board(parsed)
+    result = await stocks_service.get_price_board_async(parsed)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.get("/stock-info")
-def stock_info(symbols: str = Query(..., description="Comma-separated symbols, e.g. VNM,HPG")):
+async def stock_info(symbols: str = Query(..., description="Comma-separated symbols, e.g. VNM,HPG")):
     parsed: List[str] = [s.strip() for s in symbols.split(",")]
     print("Parsed symbols:", parsed)
-    result = stocks_service.get_stock_info(parsed)
+    result = await stocks_service.get_stock_info_async(parsed)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.get("/stock-performance")
-def stock_performance(symbol: str = Query(..., min_length=1)):
-    result = stocks_service.get_stock_performance(symbol)
+async def stock_performance(symbol: str = Query(..., min_length=1)):
+    result = await stocks_service.get_stock_performance_async(symbol)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+@router.get("/performance")
+async def stocks_performance(symbols: str = Query(..., description="Comma-separated symbols, e.g. VNM,HPG")):
+    parsed: List[str] = [s.strip() for s in symbols.split(",")]
+    result = await stocks_service.get_stocks_performance_async(parsed)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.get("/dividend-history")
-def dividend_history(symbol: str = Query(..., min_length=1)):
-    result = stocks_service.get_stock_dividends(symbol)
+async def dividend_history(symbol: str = Query(..., min_length=1)):
+    result = await stocks_service.get_stock_dividends_async(symbol)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.get("/all-symbols")
-def all_symbols():
-    result = stocks_service.get_all_symbols()
+async def all_symbols():
+    result = await stocks_service.get_all_symbols_async()
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 
+def _load_watchlist(db: Session) -> List[dict]:
+    return [
+        {"id": item.id, "symbol": item.symbol, "added_at": item.added_at.isoformat()}
+        for item in db.query(Watchlist).filter_by(user_id=None).all()
+    ]
+
+
+def _insert_watchlist(db: Session, symbol: str) -> dict:
+    # Check if already exists
+    existing = db.query(Watchlist).filter_by(symbol=symbol, user_id=None).first()
+    if existing:
+        raise HTTPException(status_code=400, detail=f"{symbol} is already in watchlist")
+
+    # Add to watchlist
+    watchlist_item = Watchlist(symbol=symbol, user_id=None)
+    db.add(watchlist_item)
+    db.commit()
+    db.refresh(watchlist_item)
+    return {"id": watchlist_item.id, "symbol": watchlist_item.symbol, "added_at": watchlist_item.added_at.isoformat()}
+
+
 @router.get("/watchlist")
-def get_watchlist(db: Session = Depends(get_db)):
+async def get_watchlist(db: Session = Depends(get_db)):
     """
     Get all stocks in the watchlist with their stock info.
     These stocks are monitored by the background analysis worker.
     """
     try:
-        watchlist_items = db.query(Watchlist).filter_by(user_id=None).all()
+        # DB work runs off the event loop; stock info goes through the upstream gateway
+        watchlist_items = await asyncio.to_thread(_load_watchlist, db)
         
         # Get symbols
-        symbols = [item.symbol for item in watchlist_items]
+        symbols = [item["symbol"] for item in watchlist_items]
         
         # Fetch stock info for all symbols in one call
         stock_info_result = {}
         if symbols:
-            stock_info_response = stocks_service.get_stock_info(symbols)
+            stock_info_response = await stocks_service.get_stock_info_async(symbols)
             if "error" not in stock_info_response and "data" in stock_info_response:
                 # stock_info_response["data"] is a dict with symbol keys
                 # e.g., {"HPG": {...}, "VNM": {...}}
@@ -121,12 +152,7 @@ def get_watchlist(db: Session = Depends(get_db)):
         return {
             "status": "success",
             "data": [
-                {
-                    "id": item.id,
-                    "symbol": item.symbol,
-                    "added_at": item.added_at.isoformat(),
-                    "stock_info": stock_info_result.get(item.symbol)
-                }
+                {**item, "stock_info": stock_info_result.get(item["symbol"])}
                 for item in watchlist_items
             ],
             "total": len(watchlist_items)
@@ -136,24 +162,15 @@ def get_watchlist(db: Session = Depends(get_db)):
 
 
 @router.post("/watchlist")
-def add_to_watchlist(symbol: str = Query(..., min_length=1), db: Session = Depends(get_db)):
+async def add_to_watchlist(symbol: str = Query(..., min_length=1), db: Session = Depends(get_db)):
     """
     Add a stock to the watchlist for background monitoring.
     """
     try:
-        # Check if already exists
-        existing = db.query(Watchlist).filter_by(symbol=symbol, user_id=None).first()
-        if existing:
-            raise HTTPException(status_code=400, detail=f"{symbol} is already in watchlist")
-        
-        # Add to watchlist
-        watchlist_item = Watchlist(symbol=symbol, user_id=None)
-        db.add(watchlist_item)
-        db.commit()
-        db.refresh(watchlist_item)
+        watchlist_item = await asyncio.to_thread(_insert_watchlist, db, symbol)
         
         # Fetch stock info for the added symbol
-        stock_info_response = stocks_service.get_stock_info([symbol])
+        stock_info_response = await stocks_service.get_stock_info_async([symbol])
         stock_info = None
         if "error" not in stock_info_response and "data" in stock_info_response:
             # stock_info_response["data"] is a dict with symbol keys
@@ -163,12 +180,7 @@ def add_to_watchlist(symbol: str = Query(..., min_length=1), db: Session = Depen
         return {
             "status": "success",
             "message": f"{symbol} added to watchlist",
-            "data": {
-                "id": watchlist_item.id,
-                "symbol": watchlist_item.symbol,
-                "added_at": watchlist_item.added_at.isoformat(),
-                "stock_info": stock_info
-            }
+            "data": {**watchlist_item, "stock_info": stock_info}
         }
     except HTTPException:
         raise
@@ -200,6 +212,6 @@ def remove_from_watchlist(symbol: str, db: Session = Depends(get_db)):
 
 
 @router.get("/indices")
-def indices():
+async def indices():
     # indices returns empty array if none, not an error
-    return stocks_service.get_indices()
\ No newline at end of file
+    return await stocks_service.get_indices_async()
\ No newline at end of file
@@ -6,6 +6,98 @@ class Settings(BaseSettings):
     api_version: str = "v1"
     
     hours_between_news_fetch: int = 24  # Interval for fetching news
+
+    # Serve daily quotes from stock_history and only fetch missing days upstream
+    history_read_through: bool = True
+
+    # Where OHLCV history lives: "sql" (stock_history table) or "arrow" (columnar files)
+    history_backend: str = "sql"
+    history_store_path: str = "./data/history"
+
+    # Stock info cache: TTL during continuous trading, stale-while-revalidate window
+    quote_cache_size: int = 1024
+    quote_cache_live_ttl: float = 5.0
+    quote_cache_stale_seconds: float = 30.0
+
+    # Reused vnstock client objects and the shared HTTP connection pool
+    vnstock_client_cache_size: int = 256
+    vnstock_http_pool_size: int = 16
+
+    # Upstream gateway: threads for blocking vnstock/news calls, waiting-call cap, per-call deadline
+    upstream_max_workers: int = 8
+    upstream_max_queue: int = 64
+    upstream_deadline_seconds: float = 20.0
+
+    # vnstock quota shared by API routes and the worker: requests per window, back-to-back burst
+    vnstock_rate_limit: int = 20
+    vnstock_rate_window: float = 60.0
+    vnstock_rate_burst: int = 3
+    # "sqlite" shares the budget between uvicorn worker processes; "memory" is per process
+    vnstock_rate_backend: str = "sqlite"
+    # Slots per window only interactive (API) requests may use; prefetch/background stay below
+    vnstock_rate_interactive_reserve: int = 5
+    vnstock_rate_state_path: str = "./data/rate_limit.sqlite"
+
+    # Identical upstream calls started within the same window share one fetch
+    singleflight_window_seconds: float = 1.0
+
+    # Worker pipeline: concurrent workers per stage and the bound on each inter-stage queue
+    pipeline_fetch_workers: int = 2
+    pipeline_scrape_workers: int = 8
+    pipeline_analyze_workers: int = 4
+    pipeline_queue_size: int = 64
+
+    # News watermarks: per (symbol, source) newest item ingested; runs stop at it and
+    # skip symbols whose fetched feeds are unchanged since the last complete run
+    news_watermarks_enabled: bool = True
+
+    # Signal rules: JSON list of rule objects added to (or replacing, by signal_type) the defaults
+    signal_rules_path: str = "./data/signal_rules.json"
+
+    # Article scraper: pooled connections, concurrent downloads per site, timeout, parse processes
+    scraper_max_connections: int = 32
+    scraper_per_domain: int = 4
+    scraper_timeout_seconds: float = 15.0
+    scraper_parse_processes: int = 2
+
+    # On-disk cache of extracted article text: served without network I/O while fresh,
+    # then revalidated with ETag/Last-Modified; evicted by age and total size
+    scrape_cache_path: str = "./data/scrape_cache"
+    scrape_cache_fresh_hours: float = 24.0
+    scrape_cache_max_age_days: float = 30.0
+    scrape_cache_max_mb: int = 256
+
+    # Article analysis cache: in-memory LRU byte budget in front of the article_analysis_cache
+    # table; warm-up on startup rebuilds entries for the most recent analyzed_articles rows
+    analysis_cache_memory_mb: int = 16
+    analysis_cache_warm_on_startup: bool = True
+    analysis_cache_warm_limit: int = 2000
+
+    # Batch LLM analysis: several articles of one symbol per request, sized to a token
+    # budget; items missing from the answer are retried, then analyzed one by one
+    analysis_batch_enabled: bool = False
+    analysis_batch_token_budget: int = 8000
+    analysis_batch_max_articles: int = 8
+    analysis_batch_retries: int = 1
+
+    # Perplexity gateway: completions in flight across threads/loops, total deadline per call,
+    # retries with jittered exponential backoff on 429/5xx/connection errors
+    llm_max_concurrency: int = 4
+    llm_deadline_seconds: float = 90.0
+    llm_max_retries: int = 4
+    llm_backoff_base_seconds: float = 1.0
+    llm_backoff_max_seconds: float = 20.0
+
+    # Near-duplicate articles (SimHash): max differing bits out of 64, how far back to look,
+    # words per shingle and body characters fingerprinted
+    dedup_enabled: bool = True
+    dedup_max_distance: int = 3
+    dedup_window_days: int = 7
+    dedup_shingle_size: int = 3
+    dedup_body_chars: int = 3000
+
+    # Extra market closures not in the built-in calendar, e.g. "2026-01-02,2026-09-03"
+    market_extra_holidays: str = ""
     
     # Database settings (if applicable)
     database_url: str = "sqlite:///./test.db"  # Example for SQLite, change as needed
@@ -2,5 +2,5 @@ from .session import engine
 from .base import Base
 from .models import StockHistory
 
-# Create all tables
+# Create all tables (columns added to existing tables: run migrate_db.py)
 Base.metadata.create_all(bind=engine)
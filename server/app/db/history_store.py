@@ -0,0 +1,154 @@
+"""
+Columnar History Store
+Keeps OHLCV bars as one Arrow IPC file per (symbol, interval), memory-mapped on read.
+
+Alternative to the row-per-bar stock_history table; selected with
+Settings.history_backend = "arrow".
+"""
+
+import os
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+OHLCV_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "history_backend='arrow' requires pyarrow. Install it with: pip install pyarrow"
+        ) from e
+    return pa
+
+
+class ArrowHistoryStore:
+    """OHLCV bars stored as sorted Arrow IPC files: <root>/<interval>/<SYMBOL>.arrow"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self._locks: Dict[Path, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, symbol: str, interval: str) -> Path:
+        return self.root / interval / f"{symbol.upper()}.arrow"
+
+    def _lock(self, path: Path) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def _schema(self):
+        pa = _pyarrow()
+        return pa.schema(
+            [("time", pa.date32())] + [(col, pa.float64()) for col in OHLCV_COLUMNS]
+        )
+
+    def _read_range(self, path: Path, start: Optional[date], end: Optional[date]) -> pd.DataFrame:
+        """Slice [start, end] out of a memory-mapped file using binary search on time."""
+        pa = _pyarrow()
+        if not path.exists():
+            return pd.DataFrame()
+
+        with pa.memory_map(str(path), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+            times = table.column("time").to_numpy()  # datetime64[D], sorted
+            lo = 0 if start is None else int(np.searchsorted(times, np.datetime64(start, "D"), side="left"))
+            hi = len(times) if end is None else int(np.searchsorted(times, np.datetime64(end, "D"), side="right"))
+            return table.slice(lo, max(hi - lo, 0)).to_pandas(date_as_object=False)
+
+    def read_frame(self, symbol: str, start: Optional[date], end: Optional[date], interval: str) -> pd.DataFrame:
+        """Typed frame: datetime64 time and float64 OHLCV columns."""
+        df = self._read_range(self._path(symbol, interval), start, end)
+        if not df.empty:
+            df["time"] = pd.to_datetime(df["time"])
+        return df
+
+    def stored_days(self, symbol: str, start: date, end: date, interval: str) -> set:
+        df = self._read_range(self._path(symbol, interval), start, end)
+        if df.empty:
+            return set()
+        return set(pd.to_datetime(df["time"]).dt.date)
+
+    def upsert(self, symbol: str, columns: Dict[str, list], interval: str) -> Dict[str, int]:
+        """
+        Merge new bars into the symbol file and rewrite it atomically.
+        Returns {"inserted": n, "updated": n, "unchanged": n} like the SQL path.
+        """
+        pa = _pyarrow()
+        stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+        incoming = pd.DataFrame(columns)
+        if incoming.empty:
+            return stats
+        incoming["time"] = pd.to_datetime(incoming["time"])
+        for col in OHLCV_COLUMNS:
+            incoming[col] = pd.to_numeric(incoming[col], errors="coerce").astype("float64")
+        incoming = incoming.set_index("time")
+
+        path = self._path(symbol, interval)
+        with self._lock(path):
+            existing = self._read_range(path, None, None)
+            if not existing.empty:
+                existing["time"] = pd.to_datetime(existing["time"])
+                existing = existing.set_index("time")
+                overlap = incoming.index.intersection(existing.index)
+                old = existing.loc[overlap, list(OHLCV_COLUMNS)]
+                new = incoming.loc[overlap, list(OHLCV_COLUMNS)]
+                same = ((old == new) | (old.isna() & new.isna())).all(axis=1)
+                stats["unchanged"] = int(same.sum())
+                stats["updated"] = int(len(overlap) - same.sum())
+                stats["inserted"] = int(len(incoming) - len(overlap))
+                if stats["inserted"] == 0 and stats["updated"] == 0:
+                    return stats
+                merged = pd.concat([existing.drop(index=overlap), incoming])
+            else:
+                stats["inserted"] = len(incoming)
+                merged = incoming
+
+            merged = merged.sort_index().reset_index()
+            merged["time"] = merged["time"].dt.date
+            table = pa.Table.from_pandas(merged[["time", *OHLCV_COLUMNS]], schema=self._schema(), preserve_index=False)
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".arrow.tmp")
+            with pa.OSFile(str(tmp), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp, path)
+        return stats
+
+    def disk_usage(self) -> int:
+        """Total bytes used by all store files."""
+        return sum(p.stat().st_size for p in self.root.rglob("*.arrow"))
+
+    def list_series(self) -> List[Dict[str, Any]]:
+        """All stored (symbol, interval) pairs."""
+        if not self.root.exists():
+            return []
+        return [
+            {"symbol": p.stem, "interval": p.parent.name}
+            for p in sorted(self.root.rglob("*.arrow"))
+        ]
+
+
+_store: Optional[ArrowHistoryStore] = None
+
+
+def get_history_store() -> ArrowHistoryStore:
+    """Process-wide store rooted at Settings.history_store_path."""
+    global _store
+    if _store is None:
+        _store = ArrowHistoryStore(settings.history_store_path)
+    return _store
+
+
+def use_arrow_backend() -> bool:
+    return settings.history_backend.lower() == "arrow"
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, UniqueConstraint, Date, Boolean, Text, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, UniqueConstraint, Index, Date, Boolean, Text, JSON
 from sqlalchemy.sql import func
 from app.db.base import Base
+from app.utils.text_hash import HASH_LENGTH, hashed_from, link_hash, title_hash
 
 class StockHistory(Base):
     __tablename__ = "stock_history"
@@ -41,12 +42,45 @@ class StockNews(Base):
     fetched_at = Column(Date, index=True)
     ref_price = Column(Float, nullable=True)
     price_change_pct = Column(Float, nullable=True)
+    
+    # Hashes of the normalized title / link for indexed membership checks
+    title_hash = Column(String(HASH_LENGTH), nullable=True, index=True, default=hashed_from('news_title', title_hash))
+    link_hash = Column(String(HASH_LENGTH), nullable=True, index=True, default=hashed_from('news_link', link_hash))
 
     __table_args__ = (
         UniqueConstraint('news_link', name='uix_news_link'),
     )
 
 
+class NewsWatermark(Base):
+    """Newest news item ingested per (symbol, source), for incremental runs"""
+    __tablename__ = "news_watermarks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    symbol = Column(String, nullable=False, index=True)
+    source = Column(String, nullable=False)
+    last_published_at = Column(DateTime, nullable=True)
+    last_link_hash = Column(String(HASH_LENGTH), nullable=True)
+    feed_hash = Column(String(HASH_LENGTH), nullable=True)  # fingerprint of the last fetched feed
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('symbol', 'source', name='uix_news_watermark'),
+    )
+
+
+class Article(Base):
+    """Scraped article content, stored once per canonical URL and shared by every symbol"""
+    __tablename__ = "articles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(String, nullable=False, unique=True, index=True)  # canonical URL (see text_hash.normalize_url)
+    title = Column(Text, nullable=True)
+    content = Column(Text, nullable=True)
+    content_hash = Column(String(64), nullable=True)
+    fetched_at = Column(DateTime, default=func.now(), nullable=False)
+
+
 class AnalyzedArticle(Base):
     """Store AI-analyzed news articles"""
     __tablename__ = "analyzed_articles"
@@ -68,11 +102,38 @@ class AnalyzedArticle(Base):
     score = Column(Integer, nullable=True)  # 1-10 impact score
     confidence = Column(Float, nullable=True)  # 0.0-1.0
     
+    # Near-duplicate detection
+    simhash = Column(BigInteger, nullable=True)  # 64-bit SimHash of title + body
+    duplicate_of = Column(Integer, nullable=True, index=True)  # AnalyzedArticle whose analysis was reused
+    
+    # Shared scraped content (Article); one article can be analyzed for several symbols
+    article_id = Column(Integer, nullable=True, index=True)
+    
+    # Hashes of the normalized title / link for indexed "already analyzed?" checks
+    title_hash = Column(String(HASH_LENGTH), nullable=True, default=hashed_from('title', title_hash))
+    link_hash = Column(String(HASH_LENGTH), nullable=True, default=hashed_from('link', link_hash))
+    
     __table_args__ = (
         UniqueConstraint('symbol', 'title', 'published_at', name='uix_article_dedup'),
+        Index('ix_analyzed_articles_symbol_title_hash', 'symbol', 'title_hash'),
+        Index('ix_analyzed_articles_symbol_link_hash', 'symbol', 'link_hash'),
     )
 
 
+class ArticleAnalysisCacheEntry(Base):
+    """Persistent tier of the article analysis cache"""
+    __tablename__ = "article_analysis_cache"
+
+    # sha256 of symbol + title + content hash + prompt version
+    key = Column(String(64), primary_key=True)
+    symbol = Column(String, index=True, nullable=False)
+    title = Column(Text, nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    prompt_version = Column(String(50), nullable=False, index=True)
+    analysis = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+
+
 class WeeklySummary(Base):
     """Store weekly trend summaries for stocks"""
     __tablename__ = "weekly_summaries"
@@ -0,0 +1,77 @@
+"""
+Schema Upgrades
+create_all() only creates missing tables. This adds model columns (and their
+indexes) that an existing database does not have yet and backfills derived
+columns for rows written before those columns existed. Run by migrate_db.py.
+"""
+
+from typing import List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.utils.text_hash import MISSING_HASH, link_hash, title_hash
+from .base import Base
+
+# Rows per UPDATE batch in backfill_hashes
+_BACKFILL_CHUNK = 1000
+
+# table -> (title column, link column) whose hashes live in title_hash / link_hash
+_HASHED_TABLES = {
+    "analyzed_articles": ("title", "link"),
+    "stock_news": ("news_title", "news_link"),
+}
+
+
+def add_missing_columns(engine: Engine) -> List[str]:
+    """ALTER TABLE ... ADD COLUMN for every missing nullable model column; returns "table.column" names."""
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            missing = [c for c in table.columns if c.name not in existing]
+            for column in missing:
+                if not column.nullable or column.primary_key:
+                    print(f"⚠️  Cannot add NOT NULL column {table.name}.{column.name}; migrate manually")
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+                added.append(f"{table.name}.{column.name}")
+            if missing:
+                for index in table.indexes:
+                    index.create(bind=conn, checkfirst=True)
+    if added:
+        print(f"✓ Added columns: {', '.join(added)}")
+    return added
+
+
+def backfill_hashes(engine: Engine) -> int:
+    """Fill title_hash/link_hash for rows inserted before the columns existed; returns rows updated."""
+    updated = 0
+    with engine.begin() as conn:
+        for table, (title_col, link_col) in _HASHED_TABLES.items():
+            last_id = 0
+            while True:
+                rows = conn.execute(text(
+                    f'SELECT id, "{title_col}", "{link_col}" FROM "{table}" '
+                    f'WHERE id > :last AND (title_hash IS NULL OR link_hash IS NULL) '
+                    f'ORDER BY id LIMIT {_BACKFILL_CHUNK}'
+                ), {"last": last_id}).fetchall()
+                if not rows:
+                    break
+                conn.execute(
+                    text(f'UPDATE "{table}" SET title_hash = :th, link_hash = :lh WHERE id = :id'),
+                    # NULL title/link get MISSING_HASH so the row is not selected again
+                    [
+                        {"id": r[0], "th": title_hash(r[1]) or MISSING_HASH, "lh": link_hash(r[2]) or MISSING_HASH}
+                        for r in rows
+                    ],
+                )
+                updated += len(rows)
+                last_id = rows[-1][0]
+    if updated:
+        print(f"✓ Backfilled title/link hashes for {updated} rows")
+    return updated
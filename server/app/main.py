@@ -1,3 +1,4 @@
+import threading
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
@@ -5,6 +6,9 @@ from app.api.v1 import api_router
 import app.db  # Initialize DB and create tables
 from app.core.config import settings
 from app.workers import start_scheduler, stop_scheduler
+from app.services import scraper, upstream
+from app.services.analysis import warm_up_cache
+from app.services.analysis.llm_gateway import llm_gateway
 
 
 @asynccontextmanager
@@ -15,6 +19,8 @@ async def lifespan(app: FastAPI):
     # Startup
     print("\n🚀 Starting Stock Me 2 API...")
     start_scheduler()
+    if settings.analysis_cache_warm_on_startup:
+        threading.Thread(target=warm_up_cache, name="analysis-cache-warm", daemon=True).start()
     print("✓ API ready\n")
     
     yield
@@ -22,6 +28,10 @@ async def lifespan(app: FastAPI):
     # Shutdown
     print("\n👋 Shutting down...")
     stop_scheduler()
+    upstream.gateway.shutdown()
+    await scraper.close()
+    await llm_gateway.close()
+    scraper.shutdown()
     print("✓ Cleanup complete\n")
 
 
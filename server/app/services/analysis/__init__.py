@@ -3,15 +3,31 @@ Analysis Service Module
 Handles AI-powered news analysis for stock intelligence
 """
 
-from .article_analyzer import analyze_single_article, ArticleAnalysisCache
-from .summary_generator import summarize_market_news, analyze_weekly_trends
+from .article_analyzer import (
+    analyze_single_article,
+    analyze_single_article_async,
+    ArticleAnalysisCache,
+    warm_up_cache,
+)
+from .batch_analyzer import analyze_articles_batch
+from .summary_generator import (
+    summarize_market_news,
+    summarize_market_news_async,
+    analyze_weekly_trends,
+    analyze_weekly_trends_async,
+)
 from .legacy_api import analyze_stock, analyze_stock_stream
 
 __all__ = [
     'analyze_single_article',
+    'analyze_single_article_async',
     'ArticleAnalysisCache',
+    'warm_up_cache',
+    'analyze_articles_batch',
     'summarize_market_news',
+    'summarize_market_news_async',
     'analyze_weekly_trends',
+    'analyze_weekly_trends_async',
     'analyze_stock',
     'analyze_stock_stream',
 ]
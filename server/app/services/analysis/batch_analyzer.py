@@ -0,0 +1,229 @@
+"""
+Batch Article Analyzer
+Analyzes several articles of one symbol in a single structured-output request.
+The system prompt, context and rubric are sent once per batch instead of once
+per article, and the response is an array keyed by article index. Batches are
+sized to a token budget that includes the shared prompt; items the model
+drops or gets wrong are retried on their own, then fall back to
+single-article mode. A batch request that fails outright (the LLM gateway has
+already retried it) is not repeated per article: its articles are returned as
+failures.
+"""
+
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from .article_analyzer import (
+    ARTICLE_PROPERTIES,
+    ARTICLE_REQUIRED,
+    MODEL_ID,
+    PROMPT_VERSION,
+    SNIPPET_CHARS,
+    SYSTEM_MSG,
+    _analysis_cache,
+    analyze_single_article,
+    llm_usage,
+    rubric,
+)
+from .llm_gateway import llm_gateway
+
+# Rough token estimate for Vietnamese news text
+_CHARS_PER_TOKEN = 3.0
+# Title, labels and separators around each snippet
+_ARTICLE_OVERHEAD_TOKENS = 60
+# Upper bound of one article's JSON answer (see maxLength in ARTICLE_PROPERTIES)
+_OUTPUT_TOKENS_PER_ARTICLE = 400
+
+BATCH_SCHEMA = {
+    "name": f"{PROMPT_VERSION}_batch",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "additionalProperties": False,
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "additionalProperties": False,
+                    "properties": {
+                        "index": {"type": "integer", "minimum": 0},
+                        **ARTICLE_PROPERTIES,
+                    },
+                    "required": ["index", *ARTICLE_REQUIRED],
+                },
+            }
+        },
+        "required": ["results"],
+    },
+}
+
+
+def estimate_tokens(title: str, content: str) -> int:
+    """Prompt plus answer tokens one article adds to a batch."""
+    chars = len(title or "") + min(len(content or ""), SNIPPET_CHARS)
+    return int(chars / _CHARS_PER_TOKEN) + _ARTICLE_OVERHEAD_TOKENS + _OUTPUT_TOKENS_PER_ARTICLE
+
+
+def prompt_tokens(symbol: str, price_context: str) -> int:
+    """Tokens every batch request spends before its articles: system prompt, context and rubric."""
+    chars = len(SYSTEM_MSG) + len(_batch_prompt(symbol, price_context, []))
+    return int(chars / _CHARS_PER_TOKEN)
+
+
+def plan_batches(
+    articles: List[Tuple[str, str]],
+    indexes: List[int],
+    token_budget: int,
+    max_articles: int,
+    fixed_tokens: int = 0,
+) -> List[List[int]]:
+    """
+    Greedily split `indexes` into batches under the token budget (at least one
+    article each). `fixed_tokens` is the shared prompt every batch also carries.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    used = fixed_tokens
+    for i in indexes:
+        cost = estimate_tokens(*articles[i])
+        if current and (used + cost > token_budget or len(current) >= max_articles):
+            batches.append(current)
+            current, used = [], fixed_tokens
+        current.append(i)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _valid(item: Dict[str, Any]) -> bool:
+    if any(key not in item for key in ARTICLE_REQUIRED):
+        return False
+    if item.get("sentiment") not in ARTICLE_PROPERTIES["sentiment"]["enum"]:
+        return False
+    score = item.get("score")
+    return isinstance(score, int) and 1 <= score <= 10
+
+
+def _batch_prompt(symbol: str, price_context: str, articles: List[Tuple[str, str]]) -> str:
+    listing = "\n".join(
+        f"""
+        [{i}]
+        - Title: {title}
+        - Content Snippet: {content[:SNIPPET_CHARS]}"""
+        for i, (title, content) in enumerate(articles)
+    )
+    return f"""
+        Context:
+        - Stock: {symbol}
+        - Price context: {price_context}
+
+        News Articles ({len(articles)}):
+        {listing}
+
+        Phân tích TỪNG bài độc lập. Trả về đúng {len(articles)} phần tử trong "results",
+        mỗi phần tử có "index" bằng số trong [ ] của bài tương ứng.
+        {rubric(symbol)}"""
+
+
+def _request_batch(symbol: str, price_context: str, articles: List[Tuple[str, str]]) -> Optional[Dict[int, Dict[str, Any]]]:
+    """
+    One chat completion for `articles`; returns valid analyses by position in
+    `articles`, or None if the request itself failed.
+    """
+    user_msg = _batch_prompt(symbol, price_context, articles)
+    started = time.monotonic()
+    try:
+        response = llm_gateway.complete(
+            model=MODEL_ID,
+            messages=[
+                {"role": "system", "content": SYSTEM_MSG},
+                {"role": "user", "content": user_msg},
+            ],
+            temperature=0.2,
+            response_format={"type": "json_schema", "json_schema": BATCH_SCHEMA},
+        )
+        llm_usage.record("batch", response, len(articles), time.monotonic() - started)
+        items = json.loads(response.choices[0].message.content).get("results", [])
+    except Exception as e:
+        print(f"AI Batch Analysis Failed for {symbol} ({len(articles)} articles): {e}")
+        return None
+
+    analyses: Dict[int, Dict[str, Any]] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        index = item.get("index")
+        if isinstance(index, int) and 0 <= index < len(articles) and index not in analyses and _valid(item):
+            analyses[index] = {k: v for k, v in item.items() if k != "index"}
+    return analyses
+
+
+def analyze_articles_batch(
+    symbol: str,
+    price_context: str,
+    articles: List[Tuple[str, str]],
+    use_cache: bool = True,
+    token_budget: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Analyze many articles of one symbol with as few requests as possible
+
+    Args:
+        symbol: Stock symbol (e.g., "HPG")
+        price_context: Market context for the stock
+        articles: (title, content) pairs
+        use_cache: Whether to use the analysis cache (default True)
+        token_budget: Per-request token budget (default analysis_batch_token_budget)
+
+    Returns:
+        One analysis dict per article, in input order ({} if it failed),
+        with the same keys as analyze_single_article
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(articles)
+    todo = []
+    for i, (title, content) in enumerate(articles):
+        cached = _analysis_cache.get(symbol, title, content) if use_cache else None
+        if cached:
+            results[i] = cached
+        else:
+            todo.append(i)
+
+    batches = plan_batches(
+        articles, todo,
+        token_budget or settings.analysis_batch_token_budget,
+        max(1, settings.analysis_batch_max_articles),
+        fixed_tokens=prompt_tokens(symbol, price_context),
+    )
+    for batch in batches:
+        missing = batch
+        for attempt in range(1 + settings.analysis_batch_retries):
+            if attempt:
+                print(f"   ↻ Retrying {len(missing)} of {len(batch)} articles missing from the batch answer")
+            analyses = _request_batch(symbol, price_context, [articles[i] for i in missing])
+            if analyses is None:
+                break
+            for position, analysis in analyses.items():
+                i = missing[position]
+                results[i] = analysis
+                if use_cache:
+                    _analysis_cache.set(symbol, articles[i][0], articles[i][1], analysis)
+            missing = [i for i in missing if results[i] is None]
+            if not missing:
+                break
+
+        if analyses is None:
+            # Upstream is failing: sending each article on its own would only add calls
+            print(f"   ❌ {symbol}: {len(missing)} articles not analyzed (batch request failed)")
+            continue
+        # Last resort for items the batch answers keep dropping
+        for i in missing:
+            title, content = articles[i]
+            results[i] = analyze_single_article(symbol, price_context, title, content, use_cache)
+
+    if batches:
+        print(f"   🧮 {symbol}: {len(todo)} articles analyzed in {len(batches)} batch request(s)")
+    return [r or {} for r in results]
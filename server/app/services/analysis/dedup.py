@@ -0,0 +1,137 @@
+"""
+Near-Duplicate Detection
+SimHash fingerprints over shingled title + body text, so syndicated copies
+of one story (CafeF, Vietstock, VnExpress...) are recognised before an LLM
+call is spent on them. Text is lower-cased and stripped of diacritics before
+shingling. SimHashIndex finds fingerprints within a Hamming distance using
+band lookups (with k allowed bit flips, k+1 bands guarantee a shared band).
+"""
+
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+
+_BITS = 64
+_MASK = (1 << _BITS) - 1
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+T = TypeVar("T")
+
+
+def normalize(text: str) -> str:
+    """Lower-case, drop Vietnamese diacritics (đ -> d) and punctuation."""
+    text = unicodedata.normalize("NFKD", (text or "").lower().replace("đ", "d"))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(_WORD.findall(text))
+
+
+def shingles(text: str, size: int) -> List[str]:
+    words = normalize(text).split()
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def _hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def to_signed(value: int) -> int:
+    """Map an unsigned 64-bit fingerprint onto SQLite's signed INTEGER range."""
+    return value - (1 << _BITS) if value >= 1 << (_BITS - 1) else value
+
+
+def simhash(title: str, text: str, shingle_size: Optional[int] = None, body_chars: Optional[int] = None) -> int:
+    """
+    64-bit SimHash of an article (signed, ready to store).
+
+    The title is shingled together with the first `body_chars` of the body;
+    every shingle votes on each bit with its own 64-bit hash.
+    """
+    size = shingle_size or settings.dedup_shingle_size
+    chars = body_chars or settings.dedup_body_chars
+    votes = [0] * _BITS
+    for shingle in shingles(f"{title or ''} {(text or '')[:chars]}", size):
+        h = _hash64(shingle)
+        for bit in range(_BITS):
+            votes[bit] += 1 if h >> bit & 1 else -1
+    value = 0
+    for bit, vote in enumerate(votes):
+        if vote > 0:
+            value |= 1 << bit
+    return to_signed(value)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin((a ^ b) & _MASK).count("1")
+
+
+class SimHashIndex(Generic[T]):
+    """Fingerprints -> values, searchable by Hamming distance."""
+
+    def __init__(self, max_distance: int):
+        self.max_distance = max_distance
+        self._bands = max_distance + 1
+        self._width = -(-_BITS // self._bands)
+        self._tables: List[Dict[int, List[Tuple[int, T]]]] = [defaultdict(list) for _ in range(self._bands)]
+        self._size = 0
+
+    def _keys(self, fingerprint: int):
+        value = fingerprint & _MASK
+        mask = (1 << self._width) - 1
+        for band in range(self._bands):
+            yield band, (value >> (band * self._width)) & mask
+
+    def add(self, fingerprint: int, value: T):
+        for band, key in self._keys(fingerprint):
+            self._tables[band][key].append((fingerprint, value))
+        self._size += 1
+
+    def find(self, fingerprint: int) -> Optional[Tuple[T, int]]:
+        """Closest (value, distance) within max_distance, or None."""
+        best: Optional[Tuple[T, int]] = None
+        for band, key in self._keys(fingerprint):
+            for candidate, value in self._tables[band].get(key, ()):
+                distance = hamming(fingerprint, candidate)
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (value, distance)
+        return best
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class DedupStats:
+    """Process-wide counters for /analysis/status."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {"checked": 0, "duplicates": 0, "llm_calls_avoided": 0}
+
+    def record(self, duplicate: bool):
+        with self._lock:
+            self._stats["checked"] += 1
+            if duplicate:
+                self._stats["duplicates"] += 1
+                self._stats["llm_calls_avoided"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "enabled": settings.dedup_enabled,
+                "max_distance": settings.dedup_max_distance,
+                "window_days": settings.dedup_window_days,
+            }
+
+
+dedup_stats = DedupStats()
+
+
+def get_dedup_stats() -> Dict[str, Any]:
+    return dedup_stats.get_stats()
@@ -5,10 +5,9 @@ Maintains backward compatibility with existing analyze_stock and analyze_stock_s
 
 import json
 from typing import Dict, Any
-from newspaper import Article
-from app.services import news_service, stocks_service
-from .article_analyzer import analyze_single_article
-from .summary_generator import summarize_market_news
+from app.services import news_service, scraper, stocks_service, upstream
+from .article_analyzer import analyze_single_article, analyze_single_article_async
+from .summary_generator import summarize_market_news, summarize_market_news_async
 
 
 def analyze_stock(symbol: str) -> Dict[str, Any]:
@@ -27,21 +26,20 @@ def analyze_stock(symbol: str) -> Dict[str, Any]:
     
     analyzed_articles = []
     
-    for news in news_list:
+    # 3. Scrape Content (all articles concurrently)
+    news_list = [n for n in news_list if n.get('link') or n.get('news_link')]
+    scraped = scraper.scrape_articles_sync([n.get('link') or n.get('news_link') for n in news_list])
+    
+    for news, page in zip(news_list, scraped["results"]):
         try:
             link = news.get('link') or news.get('news_link')
             title = news.get('title') or news.get('news_title')
             
-            if not link:
-                continue
-
-            # 3. Scrape Content
-            article = Article(link)
-            article.download()
-            article.parse()
+            if page["error"]:
+                raise RuntimeError(page["error"])
             
             # 4. AI Analysis (Single) - with caching
-            analysis = analyze_single_article(symbol, context, title, article.text)
+            analysis = analyze_single_article(symbol, context, title, page["text"])
             
             analyzed_articles.append({
                 "title": title,
@@ -76,6 +74,8 @@ async def analyze_stock_stream(symbol: str):
     Generator that yields SSE events during the analysis process.
     
     Note: For production, use the background worker + database approach instead.
+    Upstream and LLM calls are awaited, so a slow completion does not block
+    the event loop.
     """
     def send_event(event_type: str, data: Any):
         """Helper to format SSE events"""
@@ -84,12 +84,12 @@ async def analyze_stock_stream(symbol: str):
     try:
         # Step 1: Get Context
         yield send_event("status", {"message": f"Fetching market context for {symbol}..."})
-        context = stocks_service.get_market_context(symbol)
+        context = await upstream.call(stocks_service.get_market_context, symbol)
         yield send_event("progress", {"step": 1, "total": 5, "message": "Context loaded"})
         
         # Step 2: Get News
         yield send_event("status", {"message": "Fetching recent news articles..."})
-        news_response = news_service.get_company_news(symbol, limit=5)
+        news_response = await news_service.get_company_news_async(symbol, limit=5)
         news_list = news_response.get('data', [])
         total_articles = len(news_list)
         yield send_event("progress", {
@@ -100,26 +100,27 @@ async def analyze_stock_stream(symbol: str):
         
         analyzed_articles = []
         
+        # Scrape all article pages concurrently up front
+        yield send_event("status", {"message": f"Downloading {total_articles} articles..."})
+        # (index, news) of every article with a link, paired with its page up front
+        linked = [(idx, news) for idx, news in enumerate(news_list) if news.get('link') or news.get('news_link')]
+        scraped = await scraper.scrape_articles([news.get('link') or news.get('news_link') for _, news in linked])
+        
         # Step 3: Analyze Each Article
-        for idx, news in enumerate(news_list):
+        for (idx, news), page in zip(linked, scraped["results"]):
             try:
                 link = news.get('link') or news.get('news_link')
                 title = news.get('title') or news.get('news_title')
                 
-                if not link:
-                    continue
-                
                 yield send_event("status", {
-                    "message": f"Analyzing article {idx+1}/{total_articles}: {title[:50]}..."
+                    "message": f"Analyzing article {idx+1}/{total_articles}: {(title or '')[:50]}..."
                 })
                 
-                # Scrape Content
-                article = Article(link)
-                article.download()
-                article.parse()
+                if page["error"]:
+                    raise RuntimeError(page["error"])
                 
                 # AI Analysis (Single) - with caching
-                analysis = analyze_single_article(symbol, context, title, article.text)
+                analysis = await analyze_single_article_async(symbol, context, title, page["text"])
                 
                 article_data = {
                     "title": title,
@@ -159,7 +160,7 @@ async def analyze_stock_stream(symbol: str):
         })
         
         # Step 4: Summarize
-        summary_data = summarize_market_news(symbol, analyzed_articles)
+        summary_data = await summarize_market_news_async(symbol, analyzed_articles)
         yield send_event("summary_generated", {"summary": summary_data})
         
         # Step 5: Complete
@@ -0,0 +1,273 @@
+"""
+LLM Gateway
+Single entry point for Perplexity chat completions, shared by the article
+analyzer and the summary generator. Sync and async callers draw from one
+global concurrency cap, every call has a deadline, and 429 / 5xx / connection
+errors are retried with jittered exponential backoff (honouring Retry-After)
+instead of dropping the article. Async callers wait for a slot on a small
+waiter thread pool (the cap is a threading semaphore shared with sync
+callers), so waiting never polls or blocks the loop. Latency and in-flight
+counts are tracked.
+"""
+
+import asyncio
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from perplexity import (
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    AsyncPerplexity,
+    Perplexity,
+    RateLimitError,
+)
+
+from app.core.config import settings
+
+# Latencies kept for the percentiles in get_stats()
+_LATENCY_SAMPLES = 500
+
+
+class LLMTimeout(Exception):
+    """The completion (including waiting and retries) did not finish before its deadline."""
+
+
+def _retryable(e: Exception) -> bool:
+    if isinstance(e, (RateLimitError, APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(e, APIStatusError) and e.status_code >= 500
+
+
+def _retry_after(e: Exception) -> Optional[float]:
+    response = getattr(e, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class LLMGateway:
+    """Concurrency-capped, deadline-bound, retrying chat completions."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        default_deadline: float = 90.0,
+        max_retries: int = 4,
+        backoff_base: float = 1.0,
+        backoff_max: float = 20.0,
+        sync_client: Optional[Callable[[], Any]] = None,
+        async_client: Optional[Callable[[], Any]] = None,
+    ):
+        """
+        Args:
+            max_concurrency: Completions in flight at once, across threads and event loops
+            default_deadline: Seconds a call may take in total, including retries
+            max_retries: Retries after the first attempt for 429/5xx/connection errors
+            backoff_base: First backoff ceiling in seconds (doubles per retry, full jitter)
+            backoff_max: Upper bound for one backoff
+            sync_client / async_client: Client factories (default: Perplexity with SDK retries off)
+        """
+        self.max_concurrency = max_concurrency
+        self.default_deadline = default_deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        # Threads async callers block in while waiting for a slot; more waiters queue in order
+        self._slot_waiters = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm-slot")
+        self._make_sync = sync_client or (lambda: Perplexity(api_key=settings.PERPLEXITY_API_KEY, max_retries=0))
+        self._make_async = async_client or (lambda: AsyncPerplexity(api_key=settings.PERPLEXITY_API_KEY, max_retries=0))
+        self._sync_client = None
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+        self._lock = threading.Lock()
+        self._latencies: deque = deque(maxlen=_LATENCY_SAMPLES)
+        self._stats = {
+            "requests": 0, "succeeded": 0, "failed": 0, "retries": 0, "timeouts": 0,
+            "rate_limited": 0, "server_errors": 0, "in_flight": 0, "waiting": 0,
+        }
+
+    # --- clients -------------------------------------------------------------
+
+    def _client(self):
+        with self._lock:
+            if self._sync_client is None:
+                self._sync_client = self._make_sync()
+            return self._sync_client
+
+    def _aclient(self):
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = self._make_async()
+        return client
+
+    # --- bookkeeping ---------------------------------------------------------
+
+    def _bump(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _backoff(self, attempt: int, e: Exception) -> float:
+        hinted = _retry_after(e)
+        if hinted is not None:
+            return min(hinted, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _failed_attempt(self, e: Exception, attempt: int, deadline_at: float) -> float:
+        """Classify a failed attempt; return the backoff or re-raise if it is final."""
+        if isinstance(e, RateLimitError):
+            self._bump("rate_limited")
+        elif isinstance(e, APIStatusError) and e.status_code >= 500:
+            self._bump("server_errors")
+        if not _retryable(e) or attempt >= self.max_retries:
+            self._bump("failed")
+            raise e
+        delay = self._backoff(attempt, e)
+        if time.monotonic() + delay >= deadline_at:
+            self._bump("timeouts")
+            raise LLMTimeout(f"LLM call out of time after {attempt + 1} attempts: {e}") from e
+        self._bump("retries")
+        print(f"⏳ LLM {type(e).__name__}, retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        return delay
+
+    def _remaining(self, deadline_at: float) -> float:
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            self._bump("timeouts")
+            raise LLMTimeout("LLM call out of time")
+        return remaining
+
+    def _acquire(self, deadline_at: float) -> bool:
+        """Take a slot, waiting at most until the deadline."""
+        return self._slots.acquire(timeout=max(0.0, deadline_at - time.monotonic()))
+
+    def _release_if_acquired(self, waiter: Future):
+        if not waiter.cancelled() and waiter.exception() is None and waiter.result():
+            self._slots.release()
+
+    async def _acquire_async(self, deadline_at: float) -> bool:
+        waiter = self._slot_waiters.submit(self._acquire, deadline_at)
+        try:
+            return await asyncio.shield(asyncio.wrap_future(waiter))
+        except asyncio.CancelledError:
+            # The waiter thread may still get a slot after the caller left: give it
+            # back from that thread, so it does not depend on the loop staying alive
+            waiter.add_done_callback(self._release_if_acquired)
+            raise
+
+    def _start(self) -> float:
+        with self._lock:
+            self._stats["waiting"] -= 1
+            self._stats["in_flight"] += 1
+        return time.monotonic()
+
+    def _finish(self, started: float, ok: bool):
+        with self._lock:
+            self._stats["in_flight"] -= 1
+            if ok:
+                self._stats["succeeded"] += 1
+                self._latencies.append(time.monotonic() - started)
+
+    # --- calls ---------------------------------------------------------------
+
+    def complete(self, deadline: Optional[float] = None, **kwargs) -> Any:
+        """Blocking chat completion (for worker threads and sync routes)."""
+        deadline_at = time.monotonic() + (deadline or self.default_deadline)
+        self._bump("requests")
+        for attempt in range(self.max_retries + 1):
+            self._bump("waiting")
+            if not self._acquire(deadline_at):
+                self._bump("waiting", -1)
+                self._bump("timeouts")
+                raise LLMTimeout("No LLM slot before the deadline")
+            started = self._start()
+            ok = False
+            try:
+                remaining = self._remaining(deadline_at)
+                response = self._client().with_options(timeout=remaining).chat.completions.create(**kwargs)
+                ok = True
+                return response
+            except LLMTimeout:
+                raise
+            except Exception as e:
+                delay = self._failed_attempt(e, attempt, deadline_at)
+            finally:
+                self._finish(started, ok)
+                self._slots.release()
+            time.sleep(delay)
+
+    async def complete_async(self, deadline: Optional[float] = None, **kwargs) -> Any:
+        """Chat completion for event-loop callers; never blocks the loop."""
+        deadline_at = time.monotonic() + (deadline or self.default_deadline)
+        self._bump("requests")
+        for attempt in range(self.max_retries + 1):
+            self._bump("waiting")
+            try:
+                acquired = await self._acquire_async(deadline_at)
+            except asyncio.CancelledError:
+                self._bump("waiting", -1)
+                raise
+            if not acquired:
+                self._bump("waiting", -1)
+                self._bump("timeouts")
+                raise LLMTimeout("No LLM slot before the deadline")
+            started = self._start()
+            ok = False
+            try:
+                remaining = self._remaining(deadline_at)
+                response = await self._aclient().with_options(timeout=remaining).chat.completions.create(**kwargs)
+                ok = True
+                return response
+            except LLMTimeout:
+                raise
+            except Exception as e:
+                delay = self._failed_attempt(e, attempt, deadline_at)
+            finally:
+                self._finish(started, ok)
+                self._slots.release()
+            await asyncio.sleep(delay)
+
+    async def close(self):
+        """Close the async client bound to the running loop."""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = dict(self._stats)
+
+        def pct(p: float) -> float:
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1) if latencies else 0.0
+
+        stats.update(
+            max_concurrency=self.max_concurrency,
+            avg_latency_ms=round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+            p50_latency_ms=pct(0.50),
+            p95_latency_ms=pct(0.95),
+            max_latency_ms=round(latencies[-1] * 1000, 1) if latencies else 0.0,
+        )
+        return stats
+
+
+llm_gateway = LLMGateway(
+    max_concurrency=settings.llm_max_concurrency,
+    default_deadline=settings.llm_deadline_seconds,
+    max_retries=settings.llm_max_retries,
+    backoff_base=settings.llm_backoff_base_seconds,
+    backoff_max=settings.llm_backoff_max_seconds,
+)
+
+
+def get_llm_stats() -> Dict[str, Any]:
+    return llm_gateway.get_stats()
@@ -0,0 +1,160 @@
+"""
+Signal Engine
+Turns newly stored AnalyzedArticle rows into investment signals (dividend
+announcements, earnings beats, major contracts...). Rules are plain data:
+keywords plus conditions on the analysis, with extra or overriding rules
+loaded from the JSON file at `signal_rules_path`. All rule keywords are
+compiled into one Aho-Corasick automaton over diacritics-free text, so each
+title is scanned once however many rules there are.
+"""
+
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import AnalyzedArticle, Signal
+from app.utils.aho_corasick import AhoCorasick
+from .dedup import normalize
+
+# Default rules. A rule fires for a relevant article whose title contains one of
+# its keywords (whole words, case and diacritics ignored, so list plural and
+# inflected forms) and whose analysis meets min_score / sentiment. Priority
+# becomes "high" from high_priority_score. Each rule is deduplicated on its
+# own, so one article can raise several signal types.
+SIGNAL_RULES: List[Dict[str, Any]] = [
+    {
+        "signal_type": "dividend_announced",
+        "keywords": ["cổ tức", "dividend", "dividends", "phân phối", "chia cổ"],
+        "min_score": 6,
+        "priority": "medium",
+        "high_priority_score": 8,
+        "title": "💰 {symbol}: Dividend Announcement",
+        "expires_days": 30,
+    },
+    {
+        "signal_type": "earnings_beat",
+        "keywords": ["doanh thu", "lợi nhuận", "kết quả kinh doanh", "earnings"],
+        "min_score": 7,
+        "sentiment": "Bullish",
+        "priority": "high",
+        "title": "📈 {symbol}: Strong Earnings Signal",
+        "expires_days": 7,
+    },
+    {
+        "signal_type": "major_contract",
+        "keywords": ["hợp đồng", "dự án", "contract", "contracts", "partnership", "partnerships"],
+        "min_score": 7,
+        "sentiment": "Bullish",
+        "priority": "medium",
+        "title": "📋 {symbol}: Major Contract/Partnership",
+        "expires_days": 14,
+    },
+]
+
+
+@dataclass(frozen=True)
+class SignalRule:
+    signal_type: str
+    keywords: Tuple[str, ...]
+    title: str
+    priority: str = "medium"
+    min_score: int = 0
+    sentiment: Optional[str] = None
+    high_priority_score: Optional[int] = None
+    expires_days: int = 7
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SignalRule":
+        return cls(**{**data, "keywords": tuple(data["keywords"])})
+
+    def applies(self, article: AnalyzedArticle) -> bool:
+        if (article.score or 0) < self.min_score:
+            return False
+        return self.sentiment is None or article.sentiment == self.sentiment
+
+    def priority_for(self, article: AnalyzedArticle) -> str:
+        if self.high_priority_score is not None and (article.score or 0) >= self.high_priority_score:
+            return "high"
+        return self.priority
+
+
+def load_rules(path: Optional[str] = None) -> List[SignalRule]:
+    """Default rules, with rules from the JSON file (a list of rule objects) added or replacing by signal_type."""
+    rules = {data["signal_type"]: data for data in SIGNAL_RULES}
+    path = path if path is not None else settings.signal_rules_path
+    if path and Path(path).exists():
+        for data in json.loads(Path(path).read_text(encoding="utf-8")):
+            rules[data["signal_type"]] = data
+    return [SignalRule.from_dict(data) for data in rules.values()]
+
+
+class SignalEngine:
+    """Rules compiled into a single keyword matcher."""
+
+    def __init__(self, rules: Sequence[SignalRule]):
+        self.rules = list(rules)
+        self._matcher: AhoCorasick[int] = AhoCorasick(
+            (normalize(keyword), i) for i, rule in enumerate(self.rules) for keyword in rule.keywords
+        )
+
+    def match(self, text: str) -> List[SignalRule]:
+        """Rules with a keyword in `text`, in declaration order."""
+        return [self.rules[i] for i in sorted(self._matcher.matches(normalize(text)))]
+
+    def evaluate(self, db: Session, articles: Iterable[AnalyzedArticle]) -> List[Signal]:
+        """New Signal rows for `articles` (not added to the session); one query for existing signals."""
+        articles = [a for a in articles if a.is_relevant and a.title]
+        if not articles:
+            return []
+        existing: Set[Tuple[int, str]] = set(
+            db.query(Signal.article_id, Signal.signal_type).filter(
+                Signal.article_id.in_([a.id for a in articles])
+            )
+        )
+        now = datetime.now()
+        signals = []
+        for article in articles:
+            for rule in self.match(article.title):
+                if (article.id, rule.signal_type) in existing or not rule.applies(article):
+                    continue
+                existing.add((article.id, rule.signal_type))
+                signals.append(Signal(
+                    symbol=article.symbol,
+                    signal_type=rule.signal_type,
+                    priority=rule.priority_for(article),
+                    title=rule.title.format(symbol=article.symbol),
+                    description=article.tldr,
+                    article_id=article.id,
+                    expires_at=now + timedelta(days=rule.expires_days),
+                ))
+        return signals
+
+
+_engine: Optional[SignalEngine] = None
+
+
+def get_engine() -> SignalEngine:
+    global _engine
+    if _engine is None:
+        _engine = SignalEngine(load_rules())
+    return _engine
+
+
+def detect_signals(db: Session, article_ids: Sequence[int]) -> List[Signal]:
+    """Evaluate the rules against newly stored articles and store the signals they raise."""
+    if not article_ids:
+        return []
+    articles = db.query(AnalyzedArticle).filter(AnalyzedArticle.id.in_(list(article_ids))).all()
+    signals = get_engine().evaluate(db, articles)
+    if signals:
+        db.add_all(signals)
+        db.commit()
+        for signal in signals:
+            print(f"  🚨 Signal: {signal.title}")
+        print(f"  ✓ Detected {len(signals)} new signals")
+    return signals
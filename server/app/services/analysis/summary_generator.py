@@ -5,33 +5,13 @@ Handles market summaries and weekly trend analysis
 
 import json
 from typing import List, Dict, Any
-from perplexity import Perplexity
-from app.core.config import settings
+from .llm_gateway import llm_gateway
 
-# Initialize Perplexity client
-client = Perplexity(api_key=settings.PERPLEXITY_API_KEY)
 MODEL_ID = "sonar"
 
 
-def summarize_market_news(symbol: str, articles: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """
-    Summarize multiple news articles to give a market overview.
-    
-    Args:
-        symbol: Stock symbol
-        articles: List of article dicts with 'title' and 'analysis' keys
-    
-    Returns:
-        Dict with keys: summary, market_sentiment, trend_analysis, confidence_score
-    """
-    if not articles:
-        return {
-            "summary": "No news articles to summarize.",
-            "market_sentiment": "Neutral",
-            "trend_analysis": "",
-            "confidence_score": 0
-        }
-
+def _market_summary_request(symbol: str, articles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Chat completion arguments for summarize_market_news."""
     articles_text = ""
     for idx, art in enumerate(articles[:5]):  # Limit to 5 articles for summary to fit context
         analysis = art.get('analysis')
@@ -81,49 +61,68 @@ def summarize_market_news(symbol: str, articles: List[Dict[str, Any]]) -> Dict[s
     Identify any major events or trends.
     """
     
-    try:
-        response = client.chat.completions.create(
-            model=MODEL_ID,
-            messages=[
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            response_format={"type": "json_schema", "json_schema": schema},
-        )
-        
-        return json.loads(response.choices[0].message.content)
-    except Exception as e:
-        print(f"Summary Generation Failed: {e}")
-        import traceback
-        traceback.print_exc()
-        return {
-            "summary": "Unable to generate summary",
-            "market_sentiment": "Neutral",
-            "trend_analysis": "",
-            "confidence_score": 0
-        }
+    return dict(
+        model=MODEL_ID,
+        messages=[
+            {"role": "system", "content": system_msg},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        response_format={"type": "json_schema", "json_schema": schema},
+    )
 
 
-def analyze_weekly_trends(symbol: str, articles: List[Any]) -> Dict[str, Any]:
+def _market_summary_fallback(summary: str) -> Dict[str, Any]:
+    return {
+        "summary": summary,
+        "market_sentiment": "Neutral",
+        "trend_analysis": "",
+        "confidence_score": 0
+    }
+
+
+def _market_summary_failed(e: Exception) -> Dict[str, Any]:
+    print(f"Summary Generation Failed: {e}")
+    import traceback
+    traceback.print_exc()
+    return _market_summary_fallback("Unable to generate summary")
+
+
+def summarize_market_news(symbol: str, articles: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
-    Analyze weekly trends from a list of AnalyzedArticle ORM objects.
+    Summarize multiple news articles to give a market overview.
     
     Args:
         symbol: Stock symbol
-        articles: List of AnalyzedArticle ORM objects with sentiment, score, published_at, etc.
+        articles: List of article dicts with 'title' and 'analysis' keys
     
     Returns:
-        Dict with keys: trend_direction, key_themes, momentum_shift, outlook
+        Dict with keys: summary, market_sentiment, trend_analysis, confidence_score
     """
-    if len(articles) < 3:
-        return {
-            "trend_direction": "Insufficient Data",
-            "key_themes": [],
-            "momentum_shift": "Not enough articles to determine trend",
-            "outlook": "Wait for more data"
-        }
-    
+    if not articles:
+        return _market_summary_fallback("No news articles to summarize.")
+
+    try:
+        response = llm_gateway.complete(**_market_summary_request(symbol, articles))
+        return json.loads(response.choices[0].message.content)
+    except Exception as e:
+        return _market_summary_failed(e)
+
+
+async def summarize_market_news_async(symbol: str, articles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Event-loop variant of summarize_market_news (same arguments and result)"""
+    if not articles:
+        return _market_summary_fallback("No news articles to summarize.")
+
+    try:
+        response = await llm_gateway.complete_async(**_market_summary_request(symbol, articles))
+        return json.loads(response.choices[0].message.content)
+    except Exception as e:
+        return _market_summary_failed(e)
+
+
+def _weekly_trends_request(symbol: str, articles: List[Any]) -> Dict[str, Any]:
+    """Chat completion arguments for analyze_weekly_trends."""
     # Build chronological summary
     articles_text = "\n".join([
         f"{a.published_at.strftime('%Y-%m-%d')}: {a.title} - {a.sentiment} (Score: {a.score})"
@@ -188,25 +187,70 @@ def analyze_weekly_trends(symbol: str, articles: List[Any]) -> Dict[str, Any]:
     Output in Vietnamese, cynical but helpful tone.
     """
     
+    return dict(
+        model=MODEL_ID,
+        messages=[
+            {"role": "system", "content": "You are a long-term investment analyst. Output JSON."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.3,
+        response_format={"type": "json_schema", "json_schema": schema}
+    )
+
+
+# Fewer articles than this give no meaningful weekly trend
+_MIN_TREND_ARTICLES = 3
+
+
+def _insufficient_trend_data() -> Dict[str, Any]:
+    return {
+        "trend_direction": "Insufficient Data",
+        "key_themes": [],
+        "momentum_shift": "Not enough articles to determine trend",
+        "outlook": "Wait for more data"
+    }
+
+
+def _weekly_trends_failed(e: Exception) -> Dict[str, Any]:
+    print(f"Weekly trend analysis failed: {e}")
+    import traceback
+    traceback.print_exc()
+    return {
+        "trend_direction": "Unknown",
+        "key_themes": [],
+        "momentum_shift": "Analysis failed",
+        "outlook": str(e)
+    }
+
+
+def analyze_weekly_trends(symbol: str, articles: List[Any]) -> Dict[str, Any]:
+    """
+    Analyze weekly trends from a list of AnalyzedArticle ORM objects.
+    
+    Args:
+        symbol: Stock symbol
+        articles: List of AnalyzedArticle ORM objects with sentiment, score, published_at, etc.
+    
+    Returns:
+        Dict with keys: trend_direction, key_themes, momentum_shift, outlook
+    """
+    if len(articles) < _MIN_TREND_ARTICLES:
+        return _insufficient_trend_data()
+    
     try:
-        response = client.chat.completions.create(
-            model=MODEL_ID,
-            messages=[
-                {"role": "system", "content": "You are a long-term investment analyst. Output JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            response_format={"type": "json_schema", "json_schema": schema}
-        )
-        
+        response = llm_gateway.complete(**_weekly_trends_request(symbol, articles))
         return json.loads(response.choices[0].message.content)
     except Exception as e:
-        print(f"Weekly trend analysis failed: {e}")
-        import traceback
-        traceback.print_exc()
-        return {
-            "trend_direction": "Unknown",
-            "key_themes": [],
-            "momentum_shift": "Analysis failed",
-            "outlook": str(e)
-        }
+        return _weekly_trends_failed(e)
+
+
+async def analyze_weekly_trends_async(symbol: str, articles: List[Any]) -> Dict[str, Any]:
+    """Event-loop variant of analyze_weekly_trends (same arguments and result)"""
+    if len(articles) < _MIN_TREND_ARTICLES:
+        return _insufficient_trend_data()
+    
+    try:
+        response = await llm_gateway.complete_async(**_weekly_trends_request(symbol, articles))
+        return json.loads(response.choices[0].message.content)
+    except Exception as e:
+        return _weekly_trends_failed(e)
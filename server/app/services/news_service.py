@@ -3,12 +3,14 @@ from __future__ import annotations
 from typing import Any, Dict, List, Optional
 
 import feedparser
-from vnstock import Company
 from datetime import datetime, date
 from app.db.session import SessionLocal
 from app.db.models import StockNews
 
+from app.services import upstream, vnstock_clients
 from app.utils.stock_utils import to_jsonable
+from app.utils.text_hash import link_hash
+from app.utils.singleflight import coalesced, flights
 
 
 def _ok(payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -90,35 +92,48 @@ def save_news_to_db(symbol: str, news_list: List[Dict[str, Any]]):
 	db = SessionLocal()
 	try:
 		today = date.today()
-		for item in news_list:
-			link_val = item.get('link') or item.get('news_link') or ""
+		items = [
+			(item, item.get('link') or item.get('news_link') or "")
+			for item in news_list
+		]
+		hashes = {link_hash(link_val) for _, link_val in items if link_val}
+		if not hashes:
+			return
+
+		# Deduplicate by normalized link: one indexed lookup for the whole list
+		seen = {
+			row[0]
+			for row in db.query(StockNews.link_hash).filter(StockNews.link_hash.in_(hashes))
+		}
+		for item, link_val in items:
 			if not link_val:
 				continue
+			key = link_hash(link_val)
+			if key in seen:
+				continue
+			seen.add(key)
 
-			# Simple deduplication by link
-			existing = db.query(StockNews).filter(StockNews.news_link == link_val).first()
-			if not existing:
-				raw_pub_date = (
-					item.get('news_pub_date')
-					or item.get('public_date')
-					or item.get('published')
-				)
-				pub_date = _parse_datetime(raw_pub_date)
-
-				db_news = StockNews(
-					id=item.get('id'),
-					symbol=symbol,
-					news_title=item.get('news_title') or item.get('title'),
-					news_link=link_val,
-					source=item.get('source'),
-					fetched_at=today,
-					news_pub_date=pub_date,
-					news_image_url=item.get('news_image_url') or item.get('imageUrl'),
-					ref_price=item.get('ref_price'),
-					price_change_pct=item.get('price_change_pct'),
-					public_date=item.get('published_at'),
-				)
-				db.add(db_news)
+			raw_pub_date = (
+				item.get('news_pub_date')
+				or item.get('public_date')
+				or item.get('published')
+			)
+			pub_date = _parse_datetime(raw_pub_date)
+
+			db_news = StockNews(
+				id=item.get('id'),
+				symbol=symbol,
+				news_title=item.get('news_title') or item.get('title'),
+				news_link=link_val,
+				source=item.get('source'),
+				fetched_at=today,
+				news_pub_date=pub_date,
+				news_image_url=item.get('news_image_url') or item.get('imageUrl'),
+				ref_price=item.get('ref_price'),
+				price_change_pct=item.get('price_change_pct'),
+				public_date=item.get('published_at'),
+			)
+			db.add(db_news)
 		db.commit()
 	except Exception as e:
 		print(f"Error saving news: {e}")
@@ -133,7 +148,7 @@ def get_news_from_db(symbol: str, date: date) -> List[Dict[str, Any]]:
         results = db.query(StockNews).filter(
             StockNews.symbol == symbol,
             StockNews.fetched_at == date 
-        ).all()
+        ).order_by(StockNews.news_pub_date.desc()).all()
 
         data = []
         for news in results:
@@ -145,6 +160,7 @@ def get_news_from_db(symbol: str, date: date) -> List[Dict[str, Any]]:
                     "link": news.news_link,
                     "news_link": news.news_link,
                     "public_date": news.public_date,
+                    "news_pub_date": news.news_pub_date,
                     "source": news.source,
                     "news_image_url": news.news_image_url,
                     "ref_price": news.ref_price,
@@ -156,6 +172,7 @@ def get_news_from_db(symbol: str, date: date) -> List[Dict[str, Any]]:
         db.close()
 
 
+@coalesced
 def get_company_news(
 	symbol: str,
 	limit: int = 5,
@@ -182,7 +199,7 @@ def get_company_news(
 
 	# 1) Fetch from vnstock and cache to DB (once per day)
 	try:
-		company = Company(symbol=symbol_u, source=source)
+		company = vnstock_clients.company(symbol_u, source)
 		df = company.news()
 		if getattr(df, "empty", True) or len(df) == 0:
 			return _no_data(
@@ -207,3 +224,23 @@ def get_company_news(
 		return _ok({"symbol": symbol_u, "data": data, "count": len(data)})
 	except Exception as e:
 		return _err(f"Failed to fetch news: {str(e)}", symbol=symbol_u)
+
+
+async def get_company_news_async(
+	symbol: str,
+	limit: int = 5,
+	source: str = "VCI",
+	fallback_to_google: bool = True,
+) -> Dict[str, Any]:
+	"""Async variant of get_company_news, run on the upstream gateway."""
+	try:
+		args = (symbol, limit, source, fallback_to_google)
+		return await flights.do_async(
+			flights.key(get_company_news, args),
+			# Undecorated: the request is already coalesced here
+			lambda: upstream.call(get_company_news.__wrapped__, *args),
+		)
+	except upstream.UpstreamTimeout as e:
+		return _err(f"Upstream timeout: {str(e)}", symbol=symbol.upper().strip(), upstream="timeout")
+	except upstream.UpstreamBusy as e:
+		return _err(f"Upstream busy: {str(e)}", symbol=symbol.upper().strip(), upstream="busy")
@@ -0,0 +1,109 @@
+"""
+News Watermarks
+Newest published timestamp and link ingested per (symbol, source), so each
+run only looks at items newer than the previous one. Each item is compared
+with its source's watermark on its own, so feeds in any order (such as the
+same-day cache) work. A fingerprint of the fetched feed lets a run skip a
+symbol whose feeds have not changed at all.
+"""
+
+import hashlib
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.models import NewsWatermark
+from app.services.news_service import _parse_datetime
+from app.utils.text_hash import HASH_LENGTH, link_hash
+
+
+def _source(item: Dict[str, Any]) -> str:
+    return item.get('source') or "unknown"
+
+
+def _link(item: Dict[str, Any]) -> Optional[str]:
+    return item.get('link') or item.get('news_link')
+
+
+def _published(item: Dict[str, Any]) -> Optional[datetime]:
+    value = _parse_datetime(
+        item.get('news_pub_date') or item.get('public_date') or item.get('published')
+    )
+    if value is not None and value.tzinfo is not None:
+        # SQLite hands back naive datetimes; compare everything as naive UTC
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _by_source(items: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for item in items:
+        groups[_source(item)].append(item)
+    return groups
+
+
+def feed_fingerprint(items: List[Dict[str, Any]]) -> str:
+    """Order-sensitive hash of the links of one source's feed."""
+    digest = hashlib.blake2b(digest_size=HASH_LENGTH // 2)
+    for item in items:
+        digest.update((link_hash(_link(item)) or "-").encode("ascii"))
+    return digest.hexdigest()
+
+
+def load(db: Session, symbol: str) -> Dict[str, NewsWatermark]:
+    """Watermarks of `symbol` by source (one query)."""
+    return {row.source: row for row in db.query(NewsWatermark).filter(NewsWatermark.symbol == symbol)}
+
+
+def unchanged(marks: Dict[str, NewsWatermark], items: List[Dict[str, Any]]) -> bool:
+    """True if every source in `items` was fetched before with exactly this feed."""
+    groups = _by_source(items)
+    return bool(groups) and all(
+        source in marks and marks[source].feed_hash == feed_fingerprint(group)
+        for source, group in groups.items()
+    )
+
+
+def _seen(mark: NewsWatermark, item: Dict[str, Any]) -> bool:
+    if mark.last_link_hash and link_hash(_link(item)) == mark.last_link_hash:
+        return True
+    published = _published(item)
+    return bool(published and mark.last_published_at and published < mark.last_published_at)
+
+
+def split_new(marks: Dict[str, NewsWatermark], items: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Items newer than their source's watermark, and how many were skipped.
+
+    An item is skipped if it is the watermark's link or published before the
+    watermark's timestamp; undated items are only matched by link.
+    """
+    fresh = [
+        item for item in items
+        if _source(item) not in marks or not _seen(marks[_source(item)], item)
+    ]
+    return fresh, len(items) - len(fresh)
+
+
+def advance(db: Session, symbol: str, items: List[Dict[str, Any]]):
+    """Move the watermarks of `symbol` to the newest of `items` and remember the feeds."""
+    if not items:
+        return
+    marks = load(db, symbol)
+    for source, group in _by_source(items).items():
+        published, newest = None, group[0]
+        for item in group:
+            value = _published(item)
+            if value is not None and (published is None or value > published):
+                published, newest = value, item
+        mark = marks.get(source)
+        if mark is None:
+            mark = NewsWatermark(symbol=symbol, source=source)
+            db.add(mark)
+        if published is None or mark.last_published_at is None or published >= mark.last_published_at:
+            mark.last_published_at = published or mark.last_published_at
+            mark.last_link_hash = link_hash(_link(newest))
+        mark.feed_hash = feed_fingerprint(group)
+    db.commit()
@@ -0,0 +1,176 @@
+"""
+Scrape Cache
+Persistent on-disk cache of extracted article text, keyed by normalized URL.
+Each entry is a gzip-compressed JSON file named by the SHA-256 of the URL, so
+repeat analyses of the same article (legacy stream, analyze_stock, worker
+retries) read it from disk instead of the network. Entries are fresh for
+`scrape_cache_fresh_hours`; after that the scraper revalidates them with the
+publisher's ETag / Last-Modified. The directory is trimmed by age and size.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.utils.text_hash import normalize_url
+
+# Run an eviction pass every N writes
+_EVICT_EVERY = 50
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+class ScrapeCache:
+    """Gzip JSON files under `root`, one per normalized URL."""
+
+    def __init__(self, root: str, fresh_seconds: float, max_age_seconds: float, max_bytes: int):
+        """
+        Args:
+            root: Cache directory
+            fresh_seconds: Serve an entry without any network I/O for this long
+            max_age_seconds: Entries older than this are evicted
+            max_bytes: Evict least recently validated entries above this total size
+        """
+        self.root = Path(root)
+        self.fresh_seconds = fresh_seconds
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats = {"hits": 0, "stale": 0, "misses": 0, "revalidated": 0, "stores": 0, "evicted": 0}
+
+    def _path(self, url: str) -> Path:
+        key = url_key(url)
+        return self.root / key[:2] / f"{key}.json.gz"
+
+    def _bump(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Cached entry for `url` or None. The entry carries `fresh` (usable as-is)
+        and the validators (`etag`, `last_modified`) for a conditional request.
+        """
+        path = self._path(url)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self._bump("misses")
+            return None
+        except (OSError, ValueError):
+            # Truncated or corrupt file: drop it and fetch again
+            path.unlink(missing_ok=True)
+            self._bump("misses")
+            return None
+
+        entry["fresh"] = time.time() - entry.get("validated_at", 0) < self.fresh_seconds
+        self._bump("hits" if entry["fresh"] else "stale")
+        return entry
+
+    def put(
+        self,
+        url: str,
+        title: Optional[str],
+        text: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        now = time.time()
+        entry = {
+            "url": normalize_url(url),
+            "title": title,
+            "text": text,
+            "content_hash": hashlib.sha256((text or "").encode("utf-8")).hexdigest(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": now,
+            "validated_at": now,
+        }
+        self._write(self._path(url), entry)
+        self._bump("stores")
+
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % _EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def touch(self, url: str, entry: Dict[str, Any]):
+        """Mark an entry as revalidated (the publisher answered 304)."""
+        entry = {k: v for k, v in entry.items() if k != "fresh"}
+        entry["validated_at"] = time.time()
+        self._write(self._path(url), entry)
+        self._bump("revalidated")
+
+    def _write(self, path: Path, entry: Dict[str, Any]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def evict(self) -> int:
+        """Delete entries past max age, then the oldest until under max_bytes."""
+        if not self.root.exists():
+            return 0
+        now = time.time()
+        files = []
+        removed = 0
+        for path in self.root.glob("*/*.json.gz"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - st.st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                files.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files, key=lambda f: f[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        if removed:
+            self._bump("evicted", removed)
+            print(f"🧹 Scrape cache: evicted {removed} entries")
+        return removed
+
+    def clear(self):
+        for path in self.root.glob("*/*.json.gz"):
+            path.unlink(missing_ok=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["stale"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["fresh_seconds"] = self.fresh_seconds
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+
+scrape_cache = ScrapeCache(
+    root=settings.scrape_cache_path,
+    fresh_seconds=settings.scrape_cache_fresh_hours * 3600,
+    max_age_seconds=settings.scrape_cache_max_age_days * 86400,
+    max_bytes=settings.scrape_cache_max_mb * 1024 * 1024,
+)
+
+
+def get_scrape_cache_stats() -> Dict[str, Any]:
+    return scrape_cache.get_stats()
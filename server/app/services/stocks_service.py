@@ -1,65 +1,131 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
 from typing import List, Optional, Dict, Any
+import numpy as np
 import pandas as pd
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-
-from vnstock import Quote, Company, Listing, Trading
+from sqlalchemy import Date, and_, bindparam, func, or_, text
 
+from app.core.config import settings
 from app.utils.stock_utils import to_jsonable
-from app.db.session import SessionLocal
+from app.utils import trading_calendar
+from app.utils.ttl_cache import MarketTTLCache
+from app.utils.singleflight import coalesced, flights, get_singleflight_stats
+from app.db.session import SessionLocal, engine
 from app.db.models import StockHistory, StockSymbol
+from app.db.history_store import get_history_store, use_arrow_backend
+from app.services import upstream, vnstock_clients
+
+
+# Rows per INSERT statement. 8 bound columns per row keeps a chunk under
+# SQLite's default 999 host-parameter limit.
+_UPSERT_CHUNK_SIZE = 100
+_OHLCV_COLUMNS = ("open", "high", "low", "close", "volume")
+# stock_history.time is a Date, so only bars of a day or longer can be stored;
+# intraday bars (1m, 15m, 1H...) would collapse into one row per day.
+_DATE_INTERVALS = {"1D", "1W", "1M"}
 
 
-def save_stock_history(symbol: str, df: pd.DataFrame, interval: str):
+def _history_columns(df: pd.DataFrame) -> Dict[str, list]:
+    """
+    Convert a vnstock history frame into plain column lists in one vectorized pass.
+    Duplicate bars (same date) keep the last occurrence; NaN becomes None.
+    """
+    times = pd.to_datetime(df["time"], errors="coerce")
+    frame = pd.DataFrame({"time": times.dt.date})
+    for col in _OHLCV_COLUMNS:
+        values = df[col] if col in df.columns else pd.Series(index=df.index, dtype="float64")
+        frame[col] = pd.to_numeric(values, errors="coerce").astype("float64")
+
+    frame = frame[times.notna()].drop_duplicates(subset="time", keep="last")
+    frame = frame.astype(object).where(frame.notna(), None)
+    return {col: frame[col].tolist() for col in frame.columns}
+
+
+def _upsert_statement(db: Session, rows: List[Dict[str, Any]]):
+    """Build a multi-row INSERT ... ON CONFLICT DO UPDATE on uix_symbol_time_interval."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    table = StockHistory.__table__
+    stmt = insert(table).values(rows)
+    excluded = stmt.excluded
+    # Only touch rows whose values actually changed, so rowcount tells us
+    # inserted + updated and untouched rows are reported as unchanged.
+    changed = or_(*[table.c[col].is_distinct_from(excluded[col]) for col in _OHLCV_COLUMNS])
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.symbol, table.c.time, table.c.interval],
+        set_={col: excluded[col] for col in _OHLCV_COLUMNS},
+        where=changed,
+    )
+
+
+def save_stock_history(symbol: str, df: pd.DataFrame, interval: str) -> Dict[str, int]:
+    """
+    Bulk upsert history bars into stock_history.
+
+    Returns counts: {"inserted": n, "updated": n, "unchanged": n}.
+    """
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+    if df is None or getattr(df, "empty", True) or "time" not in df.columns:
+        return stats
+    if interval not in _DATE_INTERVALS:
+        print(f"⚠️ Not saving {symbol} {interval} history: stock_history only stores daily or longer bars")
+        return stats
+
+    columns = _history_columns(df)
+    total = len(columns["time"])
+
+    if use_arrow_backend():
+        stats = get_history_store().upsert(symbol, columns, interval)
+        print(
+            f"Saved {symbol} {interval} history (arrow): {stats['inserted']} inserted, "
+            f"{stats['updated']} updated, {stats['unchanged']} unchanged"
+        )
+        return stats
+
     db: Session = SessionLocal()
     try:
-        records = []
-        for _, row in df.iterrows():
-            # Ensure time is a date object
-            time_val = row.get('time')
-            if isinstance(time_val, str):
-                try:
-                    time_val = datetime.strptime(time_val, "%Y-%m-%d").date()
-                except ValueError:
-                     # Handle cases where might be other format or already date
-                     pass
-            
-            # Create object but don't add yet
-            record = {
-                "symbol": symbol,
-                "time": time_val,
-                "open": row.get('open'),
-                "high": row.get('high'),
-                "low": row.get('low'),
-                "close": row.get('close'),
-                "volume": row.get('volume'),
-                "interval": interval
-            }
-            
-            # Simple upsert logic
-            existing = db.query(StockHistory).filter(
+        for offset in range(0, total, _UPSERT_CHUNK_SIZE):
+            chunk = {col: values[offset:offset + _UPSERT_CHUNK_SIZE] for col, values in columns.items()}
+            times = chunk["time"]
+            rows = [
+                {"symbol": symbol, "interval": interval, **dict(zip(chunk.keys(), values))}
+                for values in zip(*chunk.values())
+            ]
+
+            existing = db.query(func.count(StockHistory.id)).filter(
                 StockHistory.symbol == symbol,
-                StockHistory.time == time_val,
-                StockHistory.interval == interval
-            ).first()
-            
-            if not existing:
-                db_record = StockHistory(**record)
-                db.add(db_record)
-            else:
-                for key, value in record.items():
-                    setattr(existing, key, value)
-        
+                StockHistory.interval == interval,
+                StockHistory.time.in_(times),
+            ).scalar() or 0
+
+            changed = db.execute(_upsert_statement(db, rows)).rowcount
+            inserted = len(rows) - existing
+            updated = max(changed - inserted, 0)
+            stats["inserted"] += inserted
+            stats["updated"] += updated
+            stats["unchanged"] += existing - updated
+
         db.commit()
     except Exception as e:
         print(f"Error saving to DB: {e}")
         db.rollback()
+        return {"inserted": 0, "updated": 0, "unchanged": 0}
     finally:
         db.close()
 
+    print(
+        f"Saved {symbol} {interval} history: {stats['inserted']} inserted, "
+        f"{stats['updated']} updated, {stats['unchanged']} unchanged"
+    )
+    return stats
+
 def save_symbols_to_db(symbols_list: List[Dict[str, Any]]):
     db: Session = SessionLocal()
     try:
@@ -87,47 +153,224 @@ def get_symbols_from_db() -> List[Dict[str, Any]]:
     finally:
         db.close()
 
+_HISTORY_SELECT = text(
+    "SELECT time, open, high, low, close, volume FROM stock_history "
+    "WHERE symbol = :symbol AND interval = :interval AND time >= :start AND time <= :end "
+    "ORDER BY time"
+).bindparams(bindparam("start", type_=Date), bindparam("end", type_=Date))
+
+
+def get_history_frame(symbol: str, start_date: str, end_date: str, interval: str) -> pd.DataFrame:
+    """
+    Typed history frame: datetime64 `time` and float64 OHLCV columns.
+
+    Runs one SELECT of just the needed columns and builds each column array
+    straight from the driver rows - no ORM objects, dicts or per-row strftime.
+    """
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    end = datetime.strptime(end_date, "%Y-%m-%d").date()
+
+    if use_arrow_backend():
+        return get_history_store().read_frame(symbol, start, end, interval)
+
+    with engine.connect() as conn:
+        result = conn.execute(
+            _HISTORY_SELECT,
+            {"symbol": symbol, "interval": interval, "start": start, "end": end},
+        )
+        # Raw DBAPI tuples; skips building a SQLAlchemy Row per bar
+        rows = result.cursor.fetchall()
+
+    if not rows:
+        return pd.DataFrame()
+
+    time_col, *value_cols = zip(*rows)
+    data = {"time": np.array(time_col, dtype="datetime64[D]").astype("datetime64[ns]")}
+    for col, values in zip(_OHLCV_COLUMNS, value_cols):
+        data[col] = np.array(values, dtype=np.float64)
+    return pd.DataFrame(data)
+
+
 def get_history_from_db(symbol: str, start_date: str, end_date: str, interval: str) -> pd.DataFrame:
+    df = get_history_frame(symbol, start_date, end_date, interval)
+    if df.empty:
+        return pd.DataFrame()
+
+    # Same contract as before: "%Y-%m-%d" strings plus ticker column
+    df["time"] = np.datetime_as_string(df["time"].values, unit="D")
+    df["ticker"] = symbol  # match vnstock format often containing ticker/symbol
+    return df
+
+
+def get_stored_days(symbol: str, start_date: str, end_date: str, interval: str) -> set:
+    """Dates that already have a bar in stock_history for the given range."""
+    if use_arrow_backend():
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+        return get_history_store().stored_days(symbol, start, end, interval)
+
     db: Session = SessionLocal()
     try:
         start = datetime.strptime(start_date, "%Y-%m-%d").date()
         end = datetime.strptime(end_date, "%Y-%m-%d").date()
-        
-        results = db.query(StockHistory).filter(
+
+        rows = db.query(StockHistory.time).filter(
             StockHistory.symbol == symbol,
             StockHistory.interval == interval,
             StockHistory.time >= start,
             StockHistory.time <= end
-        ).order_by(StockHistory.time).all()
-        
-        if not results:
-            return pd.DataFrame()
-            
-        data = []
-        for r in results:
-            data.append({
-                "time": r.time.strftime("%Y-%m-%d"),
-                "open": r.open,
-                "high": r.high,
-                "low": r.low,
-                "close": r.close,
-                "volume": r.volume,
-                "ticker": r.symbol # match vnstock format often containing ticker/symbol
-            })
-            
-        return pd.DataFrame(data)
+        ).all()
+        return {r[0] for r in rows}
     finally:
         db.close()
 
 
+# Default quote window: about one month of sessions
+_DEFAULT_QUOTE_SESSIONS = 21
+
+
 def _default_dates(start_date: Optional[str], end_date: Optional[str]) -> tuple[str, str]:
-    if not start_date:
-        start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
     if not end_date:
-        end_date = datetime.now().strftime("%Y-%m-%d")
+        end_date = trading_calendar.now_vn().strftime("%Y-%m-%d")
+    if not start_date:
+        start_date = trading_calendar.previous_session(end_date, _DEFAULT_QUOTE_SESSIONS).strftime("%Y-%m-%d")
     return start_date, end_date
 
 
+# More gaps than this are fetched as one covering range instead
+_MAX_GAP_FETCHES = 3
+
+# Upstream calls one read used before read-through (a full-range fetch)
+_BASELINE_UPSTREAM_CALLS = 1
+
+# A day this old that upstream returned no bar for stays without one
+# (suspension, or a holiday the calendar does not know about)
+_SETTLED_DAYS = 7
+
+# (symbol, interval) -> sessions upstream was asked for and had no bar
+_empty_days: Dict[tuple[str, str], set] = {}
+_empty_days_lock = threading.Lock()
+
+
+def _known_empty(symbol: str, interval: str) -> set:
+    with _empty_days_lock:
+        return set(_empty_days.get((symbol, interval), ()))
+
+
+def _record_empty(symbol: str, interval: str, gap_start: date, gap_end: date, expected: List[date], returned: set):
+    """Remember sessions in a fetched range that upstream had no bar for, once they are settled."""
+    settled = trading_calendar.now_vn().date() - timedelta(days=_SETTLED_DAYS)
+    last_returned = max(returned) if returned else None
+    empty = {
+        d for d in expected
+        if gap_start <= d <= gap_end and d not in returned
+        and (d <= settled or (last_returned is not None and d < last_returned))
+    }
+    if empty:
+        with _empty_days_lock:
+            _empty_days.setdefault((symbol, interval), set()).update(empty)
+
+
+def _expected_days(start_date: str, end_date: str) -> List[date]:
+    """Sessions in the range that can already have a daily bar."""
+    end = min(datetime.strptime(end_date, "%Y-%m-%d").date(), trading_calendar.latest_session())
+    return trading_calendar.trading_days(start_date, end)
+
+
+def _missing_ranges(expected: List[date], stored: set) -> List[tuple[date, date]]:
+    """
+    Group expected days without a stored bar into contiguous (start, end) ranges.
+    Today's bar is always treated as missing since it keeps changing until close.
+    `stored` should include the days upstream is known to have no bar for.
+    """
+    today = trading_calendar.now_vn().date()
+    ranges: List[tuple[date, date]] = []
+    run_start = run_end = None
+    for day in expected:
+        if day in stored and day != today:
+            if run_start is not None:
+                ranges.append((run_start, run_end))
+                run_start = run_end = None
+            continue
+        if run_start is None:
+            run_start = day
+        run_end = day
+    if run_start is not None:
+        ranges.append((run_start, run_end))
+
+    if len(ranges) > _MAX_GAP_FETCHES:
+        ranges = [(ranges[0][0], ranges[-1][1])]
+    return ranges
+
+
+def _normalize_history(df: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    """Shape an upstream history frame like get_history_from_db output."""
+    out = pd.DataFrame({"time": pd.to_datetime(df["time"]).dt.strftime("%Y-%m-%d")})
+    for col in _OHLCV_COLUMNS:
+        out[col] = df[col].values if col in df.columns else None
+    out["ticker"] = symbol
+    return out
+
+
+def _read_through_history(symbol: str, start_date: str, end_date: str, interval: str) -> Dict[str, Any]:
+    """
+    Serve a daily range from stock_history, fetching only the sub-ranges with no
+    stored bars (usually just today) and merging them into one ordered frame.
+    """
+    expected = _expected_days(start_date, end_date)
+    stored_days = get_stored_days(symbol, start_date, end_date, interval)
+    gaps = _missing_ranges(expected, stored_days | _known_empty(symbol, interval))
+
+    df_db = get_history_from_db(symbol, start_date, end_date, interval)
+
+    fresh_frames = []
+    errors = []
+    for gap_start, gap_end in gaps:
+        try:
+            quote = vnstock_clients.quote(symbol)
+            df = quote.history(
+                interval=interval,
+                start=gap_start.strftime("%Y-%m-%d"),
+                end=gap_end.strftime("%Y-%m-%d"),
+            )
+        except Exception as e:
+            print(f"API Error for {symbol} {gap_start}..{gap_end}: {e}")
+            errors.append(str(e))
+            continue
+        if getattr(df, "empty", True):
+            _record_empty(symbol, interval, gap_start, gap_end, expected, set())
+            continue
+        save_stock_history(symbol, df, interval)
+        fresh = _normalize_history(df, symbol)
+        fresh_frames.append(fresh)
+        returned = {datetime.strptime(t, "%Y-%m-%d").date() for t in fresh["time"]}
+        _record_empty(symbol, interval, gap_start, gap_end, expected, returned)
+
+    frames = [f for f in [df_db, *fresh_frames] if not f.empty]
+    merged = (
+        pd.concat(frames, ignore_index=True)
+        .drop_duplicates(subset="time", keep="last")
+        .sort_values("time")
+        .reset_index(drop=True)
+        if frames else pd.DataFrame()
+    )
+
+    hits = sum(1 for d in expected if d in stored_days)
+    cache = {
+        "hit_ratio": round(hits / len(expected), 4) if expected else 1.0,
+        "bars_from_db": len(df_db),
+        "bars_from_upstream": sum(len(f) for f in fresh_frames),
+        "upstream_calls": len(gaps),
+        # Negative when gap fetches cost more calls than one full-range fetch would
+        "upstream_calls_saved": _BASELINE_UPSTREAM_CALLS - len(gaps),
+    }
+    print(
+        f"Quote {symbol} {start_date}..{end_date}: hit ratio {cache['hit_ratio']:.0%}, "
+        f"{cache['upstream_calls']} upstream call(s)"
+    )
+    return {"data": merged, "cache": cache, "errors": errors}
+
+
 def _ok(payload: Dict[str, Any]) -> Dict[str, Any]:
     # Ensure JSON-safe conversion at the service boundary
     payload.setdefault("status", "ok")
@@ -149,15 +392,19 @@ def _err(message: str, **extra: Any) -> Dict[str, Any]:
 
 def get_market_context(symbol: str) -> str:
     """
-    Get today's price action as a string context for AI analysis.
+    Get the latest session's price action as a string context for AI analysis.
+    Outside trading days this is the last session's bar, read from the DB when stored.
     """
     try:
-        quote = Quote(source="VCI", symbol=symbol.upper())
-        df = quote.history(
-            interval='1D', 
-            start=datetime.now().strftime("%Y-%m-%d"), 
-            end=datetime.now().strftime("%Y-%m-%d")
-        )
+        session = trading_calendar.latest_session()
+        session_str = session.strftime("%Y-%m-%d")
+
+        df = None
+        if session != trading_calendar.now_vn().date():
+            df = get_history_from_db(symbol.upper(), session_str, session_str, "1D")
+        if df is None or df.empty:
+            quote = vnstock_clients.quote(symbol.upper())
+            df = quote.history(interval='1D', start=session_str, end=session_str)
         
         if not df is None and not df.empty:
             close = df['close'].iloc[-1]
@@ -171,16 +418,37 @@ def get_market_context(symbol: str) -> str:
         return "Stock Price: Data Unavailable (API Error)"
 
 
+@coalesced
 def get_stock_quote(
     symbol: str,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     interval: str = "1D",
+    read_through: Optional[bool] = None,
 ) -> Dict[str, Any]:
     start_date, end_date = _default_dates(start_date, end_date)
-    
+
+    if read_through is None:
+        read_through = settings.history_read_through
+
+    # Daily bars map 1:1 to trading days, so gaps can be detected and filled
+    if read_through and interval == "1D":
+        try:
+            result = _read_through_history(symbol.upper(), start_date, end_date, interval)
+            df = result["data"]
+            if not df.empty:
+                return _ok({"symbol": symbol.upper(), "data": df, "count": len(df), "cache": result["cache"]})
+            if result["errors"]:
+                return _err(f"Failed to fetch quote data: {result['errors'][0]}", symbol=symbol.upper())
+            return _no_data(
+                {"symbol": symbol.upper(), "data": [], "count": 0, "cache": result["cache"]},
+                "No quote data available for the selected range (API & DB Empty).",
+            )
+        except Exception as e:
+            print(f"Read-through failed for {symbol}: {e}, fetching full range...")
+
     try:
-        quote = Quote(source="VCI", symbol=symbol.upper())
+        quote = vnstock_clients.quote(symbol.upper())
         df = quote.history(interval=interval, start=start_date, end=end_date)
         
         if getattr(df, "empty", True):
@@ -212,8 +480,9 @@ def get_stock_quote(
         return _err(f"Failed to fetch quote data: {str(e)}", symbol=symbol.upper())
 
 
+@coalesced
 def get_stock_intraday(symbol: str) -> Dict[str, Any]:
-    quote = Quote(source="VCI", symbol=symbol.upper())
+    quote = vnstock_clients.quote(symbol.upper())
 
     try:
         # vnstock variants differ; handle both call styles
@@ -238,9 +507,10 @@ def get_stock_intraday(symbol: str) -> Dict[str, Any]:
     return _ok({"symbol": symbol.upper(), "data": df, "count": len(df)})
 
 
+@coalesced
 def get_stock_price_depth(symbol: str) -> Dict[str, Any]:
     try:
-        quote = Quote(source="VCI", symbol=symbol.upper())
+        quote = vnstock_clients.quote(symbol.upper())
         depth = quote.price_depth()
 
         if len(depth) == 0:
@@ -254,9 +524,10 @@ def get_stock_price_depth(symbol: str) -> Dict[str, Any]:
         return _err(f"Failed to fetch price depth: {str(e)}", symbol=symbol.upper())
 
 
+@coalesced
 def get_company_info(symbol: str) -> Dict[str, Any]:
     try:
-        company = Company(source="VCI", symbol=symbol.upper())
+        company = vnstock_clients.company(symbol.upper())
         overview = company.overview()
 
         if len(overview) == 0:
@@ -270,9 +541,10 @@ def get_company_info(symbol: str) -> Dict[str, Any]:
         return _err(f"Failed to fetch company info: {str(e)}", symbol=symbol.upper())
 
 
+@coalesced
 def get_company_shareholders(symbol: str) -> Dict[str, Any]:
     try:
-        company = Company(source="VCI", symbol=symbol.upper())
+        company = vnstock_clients.company(symbol.upper())
         shareholders = company.shareholders()
 
         if len(shareholders) == 0:
@@ -286,9 +558,10 @@ def get_company_shareholders(symbol: str) -> Dict[str, Any]:
         return _err(f"Failed to fetch shareholders: {str(e)}", symbol=symbol.upper())
 
 
+@coalesced
 def get_price_board(symbols: List[str]) -> Dict[str, Any]:
     try:
-        trading = Trading(source="VCI")
+        trading = vnstock_clients.trading()
         symbols = [s.strip().upper() for s in symbols if s and s.strip()]
         board = trading.price_board(symbols)['ref_price']
         
@@ -304,36 +577,101 @@ def get_price_board(symbols: List[str]) -> Dict[str, Any]:
     except Exception as e:
         return _err(f"Failed to fetch price board: {str(e)}", symbols=symbols)
 
-# Temporary cache to avoid rate limits during testing
-_stock_info_cache: Dict[str, Any] = {}
+# Latest-session price snapshot per symbol; TTL follows the market phase
+_stock_info_cache = MarketTTLCache(
+    maxsize=settings.quote_cache_size,
+    live_ttl=settings.quote_cache_live_ttl,
+    stale_grace=settings.quote_cache_stale_seconds,
+)
+
+
+# Symbols per price_board request
+_PRICE_BOARD_CHUNK_SIZE = 50
+
+# Board prices are in VND; history (and the stock-info payload) use thousand VND
+_BOARD_PRICE_SCALE = 1000.0
+
+
+def _board_stock_info(board: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Derive close/change/change_percentage/volume for every board row at once."""
+    if board is None or len(board) == 0:
+        return {}
+    symbols = board[("listing", "symbol")].astype(str).str.upper().to_numpy()
+    ref = pd.to_numeric(board[("listing", "ref_price")], errors="coerce").to_numpy(dtype="float64")
+    match = pd.to_numeric(board[("match", "match_price")], errors="coerce").to_numpy(dtype="float64")
+    volume = pd.to_numeric(board[("match", "accumulated_volume")], errors="coerce").fillna(0).to_numpy()
+
+    # No match yet (pre-open): the reference price is the latest close
+    close = np.where(match > 0, match, ref) / _BOARD_PRICE_SCALE
+    ref = ref / _BOARD_PRICE_SCALE
+    change = close - ref
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change_percentage = np.where(ref > 0, change / ref * 100, np.nan)
+
+    info = {}
+    for i, symbol in enumerate(symbols):
+        if np.isnan(close[i]):
+            continue
+        info[symbol] = {
+            "close": round(float(close[i]), 2),
+            "change": round(float(change[i]), 2),
+            "change_percentage": float(change_percentage[i]),
+            "volume": int(volume[i]),
+        }
+    return info
+
+
+def _fetch_stock_info_history(symbol: str) -> Dict[str, Any]:
+    """Single-symbol fallback from the daily bars of the last two sessions."""
+    session = trading_calendar.latest_session()
+    start = trading_calendar.previous_session(session)
+    quote = vnstock_clients.quote(symbol)
+    df = quote.history(interval='1D', start=start.strftime("%Y-%m-%d"), end=session.strftime("%Y-%m-%d"))
+    close = float(df['close'].iloc[-1])
+    ref = float(df['close'].iloc[-2] if len(df) > 1 else df['open'].iloc[-1])
+    change = close - ref
+
+    return {
+        "close": close,
+        "change": round(change, 2),
+        "change_percentage": (change / ref) * 100,
+        "volume": int(df['volume'].iloc[-1]),
+    }
+
+
+def _fetch_stock_info(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Snapshot for many symbols: one price_board request per chunk, then
+    per-symbol history only for symbols the board did not return.
+    """
+    info: Dict[str, Dict[str, Any]] = {}
+    trading = vnstock_clients.trading()
+    for i in range(0, len(symbols), _PRICE_BOARD_CHUNK_SIZE):
+        chunk = symbols[i:i + _PRICE_BOARD_CHUNK_SIZE]
+        try:
+            info.update(_board_stock_info(trading.price_board(chunk)))
+        except Exception as e:
+            print(f"Price board failed for {len(chunk)} symbols: {e}")
+
+    missed = [s for s in symbols if s not in info]
+    if missed:
+        print(f"Price board missed {missed}; falling back to history")
+    for symbol in missed:
+        try:
+            info[symbol] = _fetch_stock_info_history(symbol)
+        except Exception as e:
+            print(f"Error fetching stock info for {symbol}: {e}")
+    return info
+
 
+@coalesced
 def get_stock_info(symbols: List[str]) -> Dict[str, Any]:
     try:
-        symbols = [s.strip().upper() for s in symbols if s and s.strip()]
-        
-        stock_info = {}
-        for symbol in symbols:
-            # Check cache first
-            if symbol in _stock_info_cache:
-                stock_info[symbol] = _stock_info_cache[symbol]
-                continue
+        symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+
+        found = _stock_info_cache.get_or_load_many(symbols, _fetch_stock_info)
+        stock_info = {symbol: found[symbol] for symbol in symbols if symbol in found}
 
-            quote = Quote(source="VCI", symbol=symbol)    
-            df = quote.history(interval='1D', start=datetime.now().strftime("%Y-%m-%d"), end=datetime.now().strftime("%Y-%m-%d"))
-            close = df['close'].iloc[-1]
-            change = close - df['open'].iloc[-1]
-            volume = df['volume'].iloc[-1]
-            change_percentage = ((change) / df['open'].iloc[-1]) * 100
-            
-            data = {
-                "close": close,
-                "change": change,
-                "change_percentage": change_percentage,
-                "volume": volume
-            }
-            stock_info[symbol] = data
-            _stock_info_cache[symbol] = data
-            
         # print("Fetched stock info:", to_jsonable(stock_info))
 
         if len(stock_info.keys()) == 0:
@@ -346,6 +684,16 @@ def get_stock_info(symbols: List[str]) -> Dict[str, Any]:
     except Exception as e:
         return _err(f"Failed to fetch price board: {str(e)}", symbols=symbols)
 
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Hit/miss/eviction counters of the stocks service caches."""
+    return {
+        "stock_info": _stock_info_cache.get_stats(),
+        "vnstock_clients": vnstock_clients.get_client_stats(),
+        "singleflight": get_singleflight_stats(),
+    }
+
+@coalesced
 def get_all_symbols() -> Dict[str, Any]:
     # Try DB first
     db_symbols = get_symbols_from_db()
@@ -354,7 +702,7 @@ def get_all_symbols() -> Dict[str, Any]:
         return _ok({"data": db_symbols, "count": len(db_symbols)})
 
     try:
-        listing = Listing(source="VCI")
+        listing = vnstock_clients.listing()
         all_symbols = listing.symbols_by_exchange()
         # print("Fetched all symbols:", all_symbols)
         symbols = to_jsonable(all_symbols)
@@ -371,9 +719,10 @@ def get_all_symbols() -> Dict[str, Any]:
         return _err(f"Failed to fetch all symbols: {str(e)}")
 
 
+@coalesced
 def get_indices() -> Dict[str, Any]:
     try:
-        listing = Listing(source="VCI")
+        listing = vnstock_clients.listing()
         indices = listing.all_indices()
 
         syms: List[str] = []
@@ -384,77 +733,207 @@ def get_indices() -> Dict[str, Any]:
     except Exception as e:
         return _err(f"Failed to fetch indices: {str(e)}")
     
-def get_stock_performance(symbol: str) -> Dict[str, Any]:
+# Horizon -> calendar offset back from the latest close, resolved to the
+# last session on or before that date
+_PERFORMANCE_HORIZONS = {
+    "1W": pd.DateOffset(weeks=1),
+    "1M": pd.DateOffset(months=1),
+    "3M": pd.DateOffset(months=3),
+    "6M": pd.DateOffset(months=6),
+    "1Y": pd.DateOffset(years=1),
+}
+# Enough calendar days to cover 1 year of sessions + holidays
+_PERFORMANCE_LOOKBACK_DAYS = 400
+
+
+_CLOSES_SELECT = text(
+    "SELECT symbol, time, close FROM stock_history "
+    "WHERE interval = :interval AND time >= :start AND time <= :end AND symbol IN :symbols"
+).bindparams(
+    bindparam("symbols", expanding=True),
+    bindparam("start", type_=Date),
+    bindparam("end", type_=Date),
+)
+
+
+def get_close_matrix(symbols: List[str], start_date: str, end_date: str, interval: str = "1D") -> pd.DataFrame:
     """
-    Calculates 1-Week, 1-Month, 3-Month, 6-Month, and 1-Year performance.
-    Logic: 
-    - 1 Week approx = 5 trading sessions
-    - 1 Month approx = 20 trading sessions
-    - 3 Months approx = 63 trading sessions
-    - 6 Months approx = 125 trading sessions
-    - 1 Year approx = 250 trading sessions
+    Stored closes for many symbols as one aligned matrix (rows: dates, columns: symbols).
+    Symbols without stored bars get an all-NaN column.
     """
-    try:
-        # Fetch enough history (~400 days to cover 1 year of trading sessions + holidays)
-        end_date = datetime.now().strftime("%Y-%m-%d")
-        start_date = (datetime.now() - timedelta(days=400)).strftime("%Y-%m-%d")
-        
-        quote = Quote(source="vci", symbol=symbol)
-        # Fetch Daily (1D) data
-        df = quote.history(start=start_date, end=end_date, interval='1D')
-        
-        if df.empty or len(df) < 2:
-            return {"1W": "N/A", "1M": "N/A", "3M": "N/A", "6M": "N/A", "1Y": "N/A"}
-
-        # Get the Latest Close Price (The last row)
-        current_price = df['close'].iloc[-1]
-        
-        # --- CALCULATE 1 WEEK (5 Sessions ago) ---
-        if len(df) >= 6:
-            price_1w = df['close'].iloc[-6]
-            pct_1w = ((current_price - price_1w) / price_1w) * 100
-            str_1w = f"{pct_1w:+.1f}%"
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    end = datetime.strptime(end_date, "%Y-%m-%d").date()
+
+    if use_arrow_backend():
+        store = get_history_store()
+        series = {}
+        for sym in symbols:
+            df = store.read_frame(sym, start, end, interval)
+            if not df.empty:
+                series[sym] = df.set_index("time")["close"]
+        matrix = pd.DataFrame(series)
+    else:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                _CLOSES_SELECT,
+                {"symbols": list(symbols), "interval": interval, "start": start, "end": end},
+            ).cursor.fetchall()
+        if rows:
+            sym_col, time_col, close_col = zip(*rows)
+            long = pd.DataFrame({
+                "symbol": sym_col,
+                "time": np.array(time_col, dtype="datetime64[D]").astype("datetime64[ns]"),
+                "close": np.array(close_col, dtype=np.float64),
+            })
+            matrix = long.pivot(index="time", columns="symbol", values="close")
         else:
-            str_1w = "N/A"
+            matrix = pd.DataFrame()
 
-        # --- CALCULATE 1 MONTH (20 Sessions ago) ---
-        if len(df) >= 21:
-            price_1m = df['close'].iloc[-21]
-            pct_1m = ((current_price - price_1m) / price_1m) * 100
-            str_1m = f"{pct_1m:+.1f}%"
-        else:
-            str_1m = "N/A"
+    return matrix.reindex(columns=list(symbols)).sort_index()
 
-        # --- CALCULATE 3 MONTHS (63 Sessions ago) ---
-        if len(df) >= 64:
-            price_3m = df['close'].iloc[-64]
-            pct_3m = ((current_price - price_3m) / price_3m) * 100
-            str_3m = f"{pct_3m:+.1f}%"
-        else:
-            str_3m = "N/A"
 
-        # --- CALCULATE 6 MONTHS (125 Sessions ago) ---
-        if len(df) >= 126:
-            price_6m = df['close'].iloc[-126]
-            pct_6m = ((current_price - price_6m) / price_6m) * 100
-            str_6m = f"{pct_6m:+.1f}%"
-        else:
-            str_6m = "N/A"
+# symbol -> range start of its last full-range upstream fetch; older bars do not exist.
+# Least recently refreshed symbols are dropped past _LISTING_STARTS_MAX (they are
+# simply fetched in full once more).
+_LISTING_STARTS_MAX = 4096
+_listing_starts: OrderedDict[str, date] = OrderedDict()
+_listing_starts_lock = threading.Lock()
 
-        # --- CALCULATE 1 YEAR (250 Sessions ago) ---
-        if len(df) >= 251:
-            price_1y = df['close'].iloc[-251]
-            pct_1y = ((current_price - price_1y) / price_1y) * 100
-            str_1y = f"{pct_1y:+.1f}%"
-        else:
-            str_1y = "N/A"
-            
-        return {"1W": str_1w, "1M": str_1m, "3M": str_3m, "6M": str_6m, "1Y": str_1y}
 
+def _listing_start(symbol: str) -> date:
+    with _listing_starts_lock:
+        return _listing_starts.get(symbol, date.max)
+
+
+def _record_listing_start(symbol: str, start: date):
+    with _listing_starts_lock:
+        _listing_starts[symbol] = start
+        _listing_starts.move_to_end(symbol)
+        while len(_listing_starts) > _LISTING_STARTS_MAX:
+            _listing_starts.popitem(last=False)
+
+
+def _stale_symbols(matrix: pd.DataFrame, start: date) -> List[str]:
+    """
+    Symbols whose stored history is missing or behind the latest closed session,
+    or shorter than the range and not fetched in full yet (a newly listed symbol
+    is fetched in full once, then its short history counts as complete).
+    """
+    latest = pd.Timestamp(trading_calendar.latest_closed_session())
+    earliest_needed = pd.Timestamp(start + timedelta(days=7))
+    stale = []
+    for sym in matrix.columns:
+        col = matrix[sym]
+        first, last = col.first_valid_index(), col.last_valid_index()
+        if last is None or last < latest:
+            stale.append(sym)
+        elif first > earliest_needed and _listing_start(sym) > start:
+            stale.append(sym)
+    return stale
+
+
+def _format_pct(value: float) -> str:
+    return "N/A" if np.isnan(value) else f"{value:+.1f}%"
+
+
+def compute_performance(matrix: pd.DataFrame) -> Dict[str, Dict[str, str]]:
+    """
+    Every horizon (1W/1M/3M/6M/1Y/YTD) for every symbol in one vectorized pass.
+
+    Rows are the union of trading days; days a symbol did not trade carry its
+    previous close forward so sessions line up across symbols. Each horizon's
+    base is the session on or before the same calendar date back (holidays
+    such as Tết are skipped naturally).
+    """
+    horizons = [*_PERFORMANCE_HORIZONS, "YTD"]
+    if matrix.empty:
+        return {sym: {h: "N/A" for h in horizons} for sym in matrix.columns}
+
+    values = matrix.ffill().to_numpy(dtype=np.float64)
+    n_rows = len(values)
+    present = matrix.notna().to_numpy()
+    first_valid = np.where(present.any(axis=0), present.argmax(axis=0), n_rows)
+
+    # Base row per horizon: last row on or before the anchor date; for YTD the
+    # last close of the previous year
+    latest = matrix.index[-1]
+    anchors = [latest - offset for offset in _PERFORMANCE_HORIZONS.values()]
+    anchors.append(pd.Timestamp(year=latest.year, month=1, day=1) - pd.Timedelta(days=1))
+    positions = matrix.index.searchsorted(pd.DatetimeIndex(anchors), side="right") - 1
+
+    safe = np.clip(positions, 0, None)
+    base = values[safe]  # (horizons, symbols)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = (values[-1] / base - 1.0) * 100.0
+    valid = (positions[:, None] >= first_valid[None, :]) & (positions[:, None] >= 0)
+    pct = np.where(valid & np.isfinite(pct), pct, np.nan)
+
+    return {
+        sym: {h: _format_pct(pct[i, j]) for i, h in enumerate(horizons)}
+        for j, sym in enumerate(matrix.columns)
+    }
+
+
+@coalesced
+def get_stocks_performance(symbols: List[str]) -> Dict[str, Any]:
+    """
+    1W/1M/3M/6M/1Y/YTD performance for many symbols from stored closes.
+    Upstream is only called for symbols whose stored history is stale.
+    """
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+    if not symbols:
+        return _err("symbols is required")
+
+    today = trading_calendar.now_vn().date()
+    start = today - timedelta(days=_PERFORMANCE_LOOKBACK_DAYS)
+    start_date, end_date = start.strftime("%Y-%m-%d"), today.strftime("%Y-%m-%d")
+
+    try:
+        matrix = get_close_matrix(symbols, start_date, end_date)
+
+        refreshed = []
+        for sym in _stale_symbols(matrix, start):
+            try:
+                quote = vnstock_clients.quote(sym)
+                df = quote.history(start=start_date, end=end_date, interval="1D")
+            except Exception as e:
+                print(f"Error refreshing history for {sym}: {e}")
+                continue
+            if not getattr(df, "empty", True):
+                _record_listing_start(sym, start)
+                save_stock_history(sym, df, "1D")
+                refreshed.append(sym)
+
+        if refreshed:
+            matrix = get_close_matrix(symbols, start_date, end_date)
+
+        performance = compute_performance(matrix)
+        return _ok({
+            "data": performance,
+            "count": len(performance),
+            "symbols": symbols,
+            "refreshed": refreshed,
+        })
     except Exception as e:
-        print(f"Error calculating performance for {symbol}: {e}")
-        return {"1W": "N/A", "1M": "N/A", "3M": "N/A", "6M": "N/A", "1Y": "N/A"}
-    
+        print(f"Error calculating performance for {symbols}: {e}")
+        return _err(f"Failed to calculate performance: {str(e)}", symbols=symbols)
+
+
+def _single_performance(symbol: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    na = {h: "N/A" for h in [*_PERFORMANCE_HORIZONS, "YTD"]}
+    if "error" in result:
+        return na
+    return result["data"].get(symbol.strip().upper(), na)
+
+
+def get_stock_performance(symbol: str) -> Dict[str, Any]:
+    """
+    Calculates 1-Week, 1-Month, 3-Month, 6-Month, 1-Year and YTD performance.
+    Single-symbol view over get_stocks_performance.
+    """
+    return _single_performance(symbol, get_stocks_performance([symbol]))
+
+@coalesced
 def get_stock_dividends(symbol: str) -> Dict[str, Any]:
     """
     Fetches dividend events (cash and stock), matches them with historical price
@@ -464,7 +943,7 @@ def get_stock_dividends(symbol: str) -> Dict[str, Any]:
         symbol = symbol.upper()
         
         # 1. Fetch Company Events using vnstock
-        company = Company(symbol=symbol, source='VCI')
+        company = vnstock_clients.company(symbol)
         try:
             events_df = company.events(page_size=50) # Fetch enough recent events
         except Exception:
@@ -497,7 +976,7 @@ def get_stock_dividends(symbol: str) -> Dict[str, Any]:
         start_str = (min_date - timedelta(days=5)).strftime("%Y-%m-%d")
         end_str = datetime.now().strftime("%Y-%m-%d")
 
-        quote = Quote(source="VCI", symbol=symbol)
+        quote = vnstock_clients.quote(symbol)
         price_df = quote.history(start=start_str, end=end_str, interval="1D")
 
         results = []
@@ -580,4 +1059,81 @@ def get_stock_dividends(symbol: str) -> Dict[str, Any]:
 
     except Exception as e:
         print(f"Error fetching dividends for {symbol}: {e}")
-        return _err(f"Failed to fetch dividend events: {str(e)}")
\ No newline at end of file
+        return _err(f"Failed to fetch dividend events: {str(e)}")
+
+
+# ---------------------------------------------------------------------------
+# Async variants for the API routes. Each runs the sync function above on the
+# upstream gateway so a slow VCI response never blocks the event loop or
+# FastAPI's shared threadpool; identical in-flight requests are coalesced.
+# ---------------------------------------------------------------------------
+
+async def _run_upstream(fn, *args, **kwargs) -> Dict[str, Any]:
+    # Identical concurrent requests share one gateway slot and one fetch. The
+    # gateway runs the undecorated function so each request is coalesced once.
+    key = flights.key(fn, args, kwargs)
+    inner = getattr(fn, "__wrapped__", fn)
+    try:
+        return await flights.do_async(key, lambda: upstream.call(inner, *args, **kwargs))
+    except upstream.UpstreamTimeout as e:
+        return _err(f"Upstream timeout: {str(e)}", upstream="timeout")
+    except upstream.UpstreamBusy as e:
+        return _err(f"Upstream busy: {str(e)}", upstream="busy")
+
+
+async def get_stock_quote_async(
+    symbol: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    interval: str = "1D",
+    read_through: Optional[bool] = None,
+) -> Dict[str, Any]:
+    return await _run_upstream(get_stock_quote, symbol, start_date, end_date, interval, read_through)
+
+
+async def get_stock_intraday_async(symbol: str) -> Dict[str, Any]:
+    return await _run_upstream(get_stock_intraday, symbol)
+
+
+async def get_stock_price_depth_async(symbol: str) -> Dict[str, Any]:
+    return await _run_upstream(get_stock_price_depth, symbol)
+
+
+async def get_company_info_async(symbol: str) -> Dict[str, Any]:
+    return await _run_upstream(get_company_info, symbol)
+
+
+async def get_company_shareholders_async(symbol: str) -> Dict[str, Any]:
+    return await _run_upstream(get_company_shareholders, symbol)
+
+
+async def get_price_board_async(symbols: List[str]) -> Dict[str, Any]:
+    return await _run_upstream(get_price_board, symbols)
+
+
+async def get_stock_info_async(symbols: List[str]) -> Dict[str, Any]:
+    return await _run_upstream(get_stock_info, symbols)
+
+
+async def get_stocks_performance_async(symbols: List[str]) -> Dict[str, Any]:
+    return await _run_upstream(get_stocks_performance, symbols)
+
+
+async def get_stock_performance_async(symbol: str) -> Dict[str, Any]:
+    # Coalesced on the same key as a one-symbol get_stocks_performance_async
+    result = await get_stocks_performance_async([symbol])
+    if result.get("upstream"):
+        return result
+    return _single_performance(symbol, result)
+
+
+async def get_stock_dividends_async(symbol: str) -> Dict[str, Any]:
+    return await _run_upstream(get_stock_dividends, symbol)
+
+
+async def get_all_symbols_async() -> Dict[str, Any]:
+    return await _run_upstream(get_all_symbols)
+
+
+async def get_indices_async() -> Dict[str, Any]:
+    return await _run_upstream(get_indices)
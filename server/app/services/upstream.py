@@ -0,0 +1,142 @@
+"""
+Upstream Gateway
+Runs blocking vnstock/news calls on a dedicated, size-bounded thread pool so
+slow upstream responses never tie up FastAPI's default threadpool or the
+event loop. Every call gets a deadline; queue depth and wait times are tracked.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+
+class UpstreamTimeout(Exception):
+    """The call did not finish before its deadline."""
+
+
+class UpstreamBusy(Exception):
+    """Too many calls are already waiting for a worker."""
+
+
+class UpstreamGateway:
+    """Bounded executor for blocking upstream calls with per-call deadlines."""
+
+    def __init__(self, max_workers: int = 8, max_queue: int = 64, default_deadline: float = 20.0):
+        """
+        Args:
+            max_workers: Threads running upstream calls concurrently
+            max_queue: Calls allowed to wait for a thread before rejecting
+            default_deadline: Seconds a call may take, including queue time
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.default_deadline = default_deadline
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upstream")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._stats = {
+            "submitted": 0, "completed": 0, "failed": 0, "timeouts": 0, "rejected": 0,
+            "total_wait": 0.0, "max_wait": 0.0, "started": 0,
+        }
+
+    async def call(self, fn: Callable[..., Any], *args, deadline: Optional[float] = None, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the upstream pool and await its result."""
+        deadline = self.default_deadline if deadline is None else deadline
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._stats["rejected"] += 1
+                raise UpstreamBusy(f"Upstream queue full ({self._queued} waiting)")
+            self._queued += 1
+            self._stats["submitted"] += 1
+
+        submitted_at = time.monotonic()
+        started = False
+        abandoned = False
+
+        def task():
+            nonlocal started
+            wait = time.monotonic() - submitted_at
+            with self._lock:
+                if abandoned:
+                    return None
+                started = True
+                self._queued -= 1
+                self._running += 1
+                self._stats["started"] += 1
+                self._stats["total_wait"] += wait
+                self._stats["max_wait"] = max(self._stats["max_wait"], wait)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        # Carry context variables (e.g. request priority) into the worker thread
+        ctx = contextvars.copy_context()
+        future = asyncio.get_running_loop().run_in_executor(self._executor, ctx.run, task)
+        try:
+            result = await asyncio.wait_for(future, timeout=deadline)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._stats["timeouts"] += 1
+                if not started:
+                    # Deadline hit while queued; the worker will skip it
+                    abandoned = True
+                    self._queued -= 1
+            raise UpstreamTimeout(f"{getattr(fn, '__name__', 'upstream call')} exceeded {deadline:.0f}s deadline")
+        except asyncio.CancelledError:
+            with self._lock:
+                if not started:
+                    # Caller went away while queued; the executor may never run the task
+                    abandoned = True
+                    self._queued -= 1
+            raise
+        except Exception:
+            with self._lock:
+                self._stats["failed"] += 1
+            raise
+
+        with self._lock:
+            self._stats["completed"] += 1
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            started = self._stats["started"]
+            return {
+                "max_workers": self.max_workers,
+                "running": self._running,
+                "queue_depth": self._queued,
+                "max_queue": self.max_queue,
+                "submitted": self._stats["submitted"],
+                "completed": self._stats["completed"],
+                "failed": self._stats["failed"],
+                "timeouts": self._stats["timeouts"],
+                "rejected": self._stats["rejected"],
+                "avg_wait_ms": round(self._stats["total_wait"] / started * 1000, 1) if started else 0.0,
+                "max_wait_ms": round(self._stats["max_wait"] * 1000, 1),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+gateway = UpstreamGateway(
+    max_workers=settings.upstream_max_workers,
+    max_queue=settings.upstream_max_queue,
+    default_deadline=settings.upstream_deadline_seconds,
+)
+
+
+async def call(fn: Callable[..., Any], *args, deadline: Optional[float] = None, **kwargs) -> Any:
+    return await gateway.call(fn, *args, deadline=deadline, **kwargs)
+
+
+def get_upstream_stats() -> Dict[str, Any]:
+    return gateway.get_stats()
@@ -0,0 +1,134 @@
+"""
+vnstock Client Registry
+Builds Quote/Company/Trading/Listing objects once per (kind, source, symbol)
+and reuses them behind a size-capped LRU. All vnstock HTTP traffic goes
+through one pooled keep-alive requests.Session and is charged against the
+shared vnstock rate limit.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from vnstock import Quote, Company, Listing, Trading
+
+from app.core.config import settings
+from app.utils.rate_limiter import vnstock_limiter
+
+_FACTORIES = {
+    "quote": Quote,
+    "company": Company,
+    "trading": Trading,
+    "listing": Listing,
+}
+
+
+class ClientRegistry:
+    """Thread-safe LRU of vnstock client objects."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._clients: "OrderedDict[Tuple[str, str, str], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "created": 0, "evictions": 0}
+
+    def get(self, kind: str, source: str = "VCI", symbol: str = "") -> Any:
+        key = (kind, source.upper(), symbol.upper())
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self._stats["hits"] += 1
+                return client
+
+        # Build outside the lock; construction loads provider modules
+        kwargs = {"source": source}
+        if symbol:
+            kwargs["symbol"] = symbol.upper()
+        client = _FACTORIES[kind](**kwargs)
+
+        with self._lock:
+            existing = self._clients.get(key)
+            if existing is not None:
+                return existing
+            self._clients[key] = client
+            self._stats["created"] += 1
+            while len(self._clients) > self.maxsize:
+                self._clients.popitem(last=False)
+                self._stats["evictions"] += 1
+        return client
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "size": len(self._clients), "maxsize": self.maxsize}
+
+
+class _PooledRequests:
+    """Stands in for the `requests` module inside vnstock's HTTP client so
+    every get/post waits for the shared rate limit and reuses one Session."""
+
+    def __init__(self, session: requests.Session):
+        self._session = session
+
+    def get(self, *args, **kwargs):
+        vnstock_limiter.acquire_sync(max_wait=settings.upstream_deadline_seconds)
+        return self._session.get(*args, **kwargs)
+
+    def post(self, *args, **kwargs):
+        vnstock_limiter.acquire_sync(max_wait=settings.upstream_deadline_seconds)
+        return self._session.post(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=settings.vnstock_http_pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+http_session = _build_session()
+
+
+def _install_shared_session():
+    try:
+        from vnstock.core.utils import client as vnstock_http
+    except ImportError:
+        print("⚠️  vnstock HTTP client not found; using per-request connections")
+        return
+    if isinstance(getattr(vnstock_http, "requests", None), type(requests)):
+        vnstock_http.requests = _PooledRequests(http_session)
+
+
+_install_shared_session()
+
+_registry = ClientRegistry(maxsize=settings.vnstock_client_cache_size)
+
+
+def quote(symbol: str, source: str = "VCI") -> Quote:
+    return _registry.get("quote", source, symbol)
+
+
+def company(symbol: str, source: str = "VCI") -> Company:
+    return _registry.get("company", source, symbol)
+
+
+def trading(source: str = "VCI") -> Trading:
+    return _registry.get("trading", source)
+
+
+def listing(source: str = "VCI") -> Listing:
+    return _registry.get("listing", source)
+
+
+def get_client_stats() -> Dict[str, Any]:
+    return _registry.get_stats()
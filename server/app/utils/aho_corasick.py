@@ -0,0 +1,67 @@
+"""
+Aho-Corasick Matcher
+Finds every occurrence of many keywords in one pass over the text, whatever
+the number of keywords. Matches are whole words only: a keyword must start
+and end at a word boundary of the (already normalized) text.
+"""
+
+from collections import deque
+from typing import Dict, Generic, Hashable, Iterable, List, Set, Tuple, TypeVar
+
+T = TypeVar("T", bound=Hashable)
+
+
+def _boundary(text: str, i: int) -> bool:
+    """True if position `i` is the start/end of the text or borders a non-word character."""
+    return i <= 0 or i >= len(text) or not (text[i - 1].isalnum() and text[i].isalnum())
+
+
+class AhoCorasick(Generic[T]):
+    """Keyword automaton; each keyword carries a value returned on match."""
+
+    def __init__(self, keywords: Iterable[Tuple[str, T]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, T]]] = [[]]  # (keyword length, value)
+        for keyword, value in keywords:
+            if keyword:
+                self._insert(keyword, value)
+        self._build()
+
+    def _insert(self, keyword: str, value: T):
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(keyword), value))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def matches(self, text: str) -> Set[T]:
+        """Values of all keywords found in `text` as whole words."""
+        found: Set[T] = set()
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length, value in self._out[state]:
+                if value not in found and _boundary(text, end - length) and _boundary(text, end):
+                    found.add(value)
+        return found
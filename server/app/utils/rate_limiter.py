@@ -0,0 +1,418 @@
+"""
+Token-Bucket Rate Limiter
+Shared limiter for the vnstock quota (20 requests per minute). Requests are
+spaced evenly at the refill rate with a small burst allowance, and a hard
+sliding-window cap guarantees the quota is never exceeded. Each caller reserves
+a slot and then waits for it, with asyncio.sleep (`acquire`) or time.sleep in
+worker threads (`acquire_sync`), so waiters are served in order.
+
+Bucket state lives in a backend: in process memory, or in a small SQLite file
+so every uvicorn worker process draws from the same budget.
+
+Callers run under a priority class (interactive, prefetch, background) taken
+from a context variable. Interactive requests book slots ahead; the lower
+classes only take a slot that is free right now and stay below a ceiling that
+leaves headroom for interactive traffic.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+
+_STAT_KEYS = ("granted", "waited", "rejected", "total_wait", "max_wait")
+
+PRIORITIES = ("interactive", "prefetch", "background")
+
+# Shortest pause before a deferred low-priority caller checks again
+_MIN_RETRY = 0.05
+
+_priority: ContextVar[str] = ContextVar("upstream_priority", default="interactive")
+
+
+@contextmanager
+def priority(name: str):
+    """Run the enclosed upstream calls under the given priority class."""
+    if name not in PRIORITIES:
+        raise ValueError(f"Unknown priority {name!r}; expected one of {PRIORITIES}")
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class RateLimitTimeout(Exception):
+    """The wait for a slot would exceed the caller's max_wait."""
+
+
+class _BucketState:
+    """Mutable bucket snapshot handed to the limiter inside a backend transaction."""
+
+    def __init__(self, tokens: float, updated: float, grants: List[Tuple[float, str]], stats: Dict[str, float]):
+        self.tokens = tokens
+        self.updated = updated
+        # (start time, priority) of granted requests in the current window, ascending
+        self.grants = grants
+        self.new_grants: List[Tuple[float, str]] = []
+        self.stats = stats
+
+    def bump(self, name: str, klass: str, amount: float = 1):
+        """Increment a counter both overall and for one priority class."""
+        self.stats[name] = self.stats.get(name, 0) + amount
+        key = f"{name}:{klass}"
+        self.stats[key] = self.stats.get(key, 0) + amount
+
+
+class MemoryBackend:
+    """Per-process state guarded by a thread lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state: Optional[_BucketState] = None
+
+    def clock(self) -> float:
+        return time.monotonic()
+
+    @contextmanager
+    def transaction(self, time_window: float, burst: int) -> Iterator[_BucketState]:
+        with self._lock:
+            if self._state is None:
+                self._state = _BucketState(float(burst), self.clock(), [], dict.fromkeys(_STAT_KEYS, 0))
+            state = self._state
+            cutoff = self.clock() - time_window
+            while state.grants and state.grants[0][0] <= cutoff:
+                state.grants.pop(0)
+            yield state
+            state.new_grants = []
+
+    def reset(self, burst: int):
+        with self._lock:
+            if self._state is not None:
+                self._state.grants.clear()
+                self._state.tokens = float(burst)
+                self._state.updated = self.clock()
+
+
+class SQLiteBackend:
+    """
+    State shared by all processes on the host through one SQLite file.
+    BEGIN IMMEDIATE takes the write lock up front, so reservations from
+    different processes are serialized.
+    """
+
+    def __init__(self, path: str, key: str = "vnstock"):
+        self.path = path
+        self.key = key
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_state ("
+            " key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL,"
+            " granted INTEGER NOT NULL DEFAULT 0, waited INTEGER NOT NULL DEFAULT 0,"
+            " rejected INTEGER NOT NULL DEFAULT 0, total_wait REAL NOT NULL DEFAULT 0,"
+            " max_wait REAL NOT NULL DEFAULT 0)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_grants ("
+            " key TEXT NOT NULL, start REAL NOT NULL, priority TEXT NOT NULL DEFAULT 'interactive')"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(rate_limit_grants)")}
+        if "priority" not in columns:
+            conn.execute("ALTER TABLE rate_limit_grants ADD COLUMN priority TEXT NOT NULL DEFAULT 'interactive'")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limit_grants_key_start ON rate_limit_grants (key, start)")
+        # Per-priority counters, e.g. ("granted:background", 12)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_counters ("
+            " key TEXT NOT NULL, name TEXT NOT NULL, value REAL NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (key, name))"
+        )
+
+    def clock(self) -> float:
+        # Wall clock: monotonic clocks are not comparable between processes
+        return time.time()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self, time_window: float, burst: int) -> Iterator[_BucketState]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cutoff = self.clock() - time_window
+            conn.execute("DELETE FROM rate_limit_grants WHERE key = ? AND start <= ?", (self.key, cutoff))
+            row = conn.execute(
+                f"SELECT tokens, updated, {', '.join(_STAT_KEYS)} FROM rate_limit_state WHERE key = ?",
+                (self.key,),
+            ).fetchone()
+            if row is None:
+                row = (float(burst), self.clock()) + (0,) * len(_STAT_KEYS)
+                conn.execute("INSERT INTO rate_limit_state (key, tokens, updated) VALUES (?, ?, ?)", (self.key, row[0], row[1]))
+            grants = [tuple(r) for r in conn.execute(
+                "SELECT start, priority FROM rate_limit_grants WHERE key = ? ORDER BY start", (self.key,)
+            )]
+            stats = dict(zip(_STAT_KEYS, row[2:]))
+            stats.update(conn.execute("SELECT name, value FROM rate_limit_counters WHERE key = ?", (self.key,)))
+            state = _BucketState(row[0], row[1], grants, stats)
+
+            yield state
+
+            conn.execute(
+                f"UPDATE rate_limit_state SET tokens = ?, updated = ?, "
+                f"{', '.join(f'{k} = ?' for k in _STAT_KEYS)} WHERE key = ?",
+                (state.tokens, state.updated, *(state.stats[k] for k in _STAT_KEYS), self.key),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO rate_limit_counters (key, name, value) VALUES (?, ?, ?)",
+                [(self.key, name, value) for name, value in state.stats.items() if ":" in name],
+            )
+            conn.executemany(
+                "INSERT INTO rate_limit_grants (key, start, priority) VALUES (?, ?, ?)",
+                [(self.key, start, klass) for start, klass in state.new_grants],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def reset(self, burst: int):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM rate_limit_grants WHERE key = ?", (self.key,))
+        conn.execute(
+            "UPDATE rate_limit_state SET tokens = ?, updated = ? WHERE key = ?",
+            (float(burst), self.clock(), self.key),
+        )
+        conn.execute("COMMIT")
+
+
+class TokenBucketLimiter:
+    """Token bucket with a hard sliding-window cap, safe across threads and tasks."""
+
+    def __init__(
+        self,
+        max_requests: int = 20,
+        time_window: float = 60,
+        burst: int = 3,
+        backend=None,
+        interactive_reserve: int = 0,
+    ):
+        """
+        Args:
+            max_requests: Requests allowed per time_window (hard cap)
+            time_window: Window length in seconds
+            burst: Requests that may go back-to-back before spacing kicks in
+            backend: MemoryBackend (default) or SQLiteBackend for a budget
+                shared between processes
+            interactive_reserve: Slots per window that prefetch and background
+                requests may never use
+        """
+        self.max_requests = max_requests
+        self.time_window = time_window
+        self.burst = max(1, min(burst, max_requests))
+        self.rate = max_requests / time_window
+        self.backend = backend or MemoryBackend()
+        self.interactive_reserve = max(0, min(interactive_reserve, max_requests - 1))
+
+    def _next_start(self, state: _BucketState, now: float) -> tuple[float, float]:
+        """(earliest start for one more request, refilled token count)."""
+        tokens = min(self.burst, state.tokens + (now - state.updated) * self.rate)
+        start = now if tokens >= 1 else now + (1 - tokens) / self.rate
+        if len(state.grants) >= self.max_requests:
+            start = max(start, state.grants[-self.max_requests][0] + self.time_window)
+        if state.grants:
+            start = max(start, state.grants[-1][0])
+        return start, tokens
+
+    def _ceiling(self, state: _BucketState, klass: str) -> int:
+        """Requests in the window above which `klass` must defer."""
+        if klass == "interactive":
+            return self.max_requests
+        ceiling = self.max_requests - self.interactive_reserve
+        if klass == "background":
+            # Every recent interactive request pushes background work further back
+            ceiling -= sum(1 for _, k in state.grants if k == "interactive")
+        return max(0, ceiling)
+
+    def _low_priority_wait(self, state: _BucketState, klass: str, now: float) -> float:
+        """Seconds until a prefetch/background request could go; 0 if it can go now."""
+        start, tokens = self._next_start(state, now)
+        # Background leaves one burst token for interactive callers
+        needed = 2 if klass == "background" and self.burst > 1 else 1
+        wait = max(start - now, (needed - tokens) / self.rate if tokens < needed else 0.0)
+        ceiling = self._ceiling(state, klass)
+        used = len(state.grants)
+        if used >= ceiling:
+            if ceiling == 0:
+                wait = max(wait, state.grants[0][0] + self.time_window - now)
+            else:
+                wait = max(wait, state.grants[used - ceiling][0] + self.time_window - now)
+        return max(0.0, wait)
+
+    def _grant(self, state: _BucketState, klass: str, now: float, start: float, tokens: float, wait: float):
+        # Tokens go negative while slots are booked ahead of time
+        state.tokens = tokens - 1
+        state.updated = now
+        state.grants.append((start, klass))
+        state.new_grants.append((start, klass))
+        state.bump("granted", klass)
+        if wait > 0:
+            state.bump("waited", klass)
+            state.bump("total_wait", klass, wait)
+            state.stats["max_wait"] = max(state.stats["max_wait"], wait)
+
+    def _reserve(self, max_wait: Optional[float], klass: str = "interactive", waited: float = 0.0) -> float:
+        """
+        Book a slot and return seconds until it starts. For prefetch and
+        background only slots free right now are booked; otherwise nothing is
+        booked and the (positive) time to retry after is returned as -wait.
+        """
+        with self.backend.transaction(self.time_window, self.burst) as state:
+            now = self.backend.clock()
+            rejection = None
+            if klass == "interactive":
+                start, tokens = self._next_start(state, now)
+                wait = start - now
+                if max_wait is not None and wait > max_wait:
+                    state.bump("rejected", klass)
+                    rejection = RateLimitTimeout(f"vnstock rate limit: next slot in {wait:.1f}s")
+                else:
+                    self._grant(state, klass, now, start, tokens, wait)
+            else:
+                wait = self._low_priority_wait(state, klass, now)
+                if wait == 0:
+                    _, tokens = self._next_start(state, now)
+                    self._grant(state, klass, now, now, tokens, waited)
+                elif max_wait is not None and waited + wait > max_wait:
+                    state.bump("rejected", klass)
+                    rejection = RateLimitTimeout(f"vnstock rate limit: {klass} deferred, next slot in {wait:.1f}s")
+                else:
+                    if waited == 0:
+                        state.bump("deferred", klass)
+                    wait = -wait
+        # Raised outside the transaction so the rejection counter is committed
+        if rejection is not None:
+            raise rejection
+        return wait
+
+    async def acquire(self, max_wait: Optional[float] = None, priority: Optional[str] = None):
+        """Wait (without blocking the event loop) until a request may be sent."""
+        klass = priority or current_priority()
+        waited = 0.0
+        while True:
+            wait = self._reserve(max_wait, klass, waited)
+            if wait >= 0:
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                return
+            pause = max(-wait, _MIN_RETRY)
+            await asyncio.sleep(pause)
+            waited += pause
+
+    def acquire_sync(self, max_wait: Optional[float] = None, priority: Optional[str] = None):
+        """Blocking variant for worker threads."""
+        klass = priority or current_priority()
+        waited = 0.0
+        while True:
+            wait = self._reserve(max_wait, klass, waited)
+            if wait >= 0:
+                if wait > 0:
+                    time.sleep(wait)
+                return
+            pause = max(-wait, _MIN_RETRY)
+            time.sleep(pause)
+            waited += pause
+
+    def next_slot_in(self, priority: Optional[str] = None) -> float:
+        """Seconds until a request of this class could start, without booking it."""
+        klass = priority or current_priority()
+        with self.backend.transaction(self.time_window, self.burst) as state:
+            now = self.backend.clock()
+            if klass == "interactive":
+                wait = self._next_start(state, now)[0] - now
+            else:
+                wait = self._low_priority_wait(state, klass, now)
+        return max(0.0, wait)
+
+    async def wait_ready(self, priority: Optional[str] = None):
+        """Sleep until a slot is free so the following call will not block its thread."""
+        klass = priority or current_priority()
+        while True:
+            wait = self.next_slot_in(klass)
+            if wait <= 0:
+                return
+            await asyncio.sleep(max(wait, _MIN_RETRY))
+
+    def reset(self):
+        self.backend.reset(self.burst)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.backend.transaction(self.time_window, self.burst) as state:
+            now = self.backend.clock()
+            live = [k for t, k in state.grants if t > now - self.time_window]
+            stats = dict(state.stats)
+        waited = stats["waited"]
+        return {
+            "requests_in_window": len(live),
+            "max_requests": self.max_requests,
+            "time_window": self.time_window,
+            "remaining": max(0, self.max_requests - len(live)),
+            "burst": self.burst,
+            "rate_per_second": round(self.rate, 4),
+            "backend": "sqlite" if isinstance(self.backend, SQLiteBackend) else "memory",
+            "interactive_reserve": self.interactive_reserve,
+            "granted": int(stats["granted"]),
+            "waited": int(waited),
+            "rejected": int(stats["rejected"]),
+            "avg_wait_seconds": round(stats["total_wait"] / waited, 2) if waited else 0.0,
+            "max_wait_seconds": round(stats["max_wait"], 2),
+            "classes": {
+                klass: {
+                    "requests_in_window": live.count(klass),
+                    "granted": int(stats.get(f"granted:{klass}", 0)),
+                    "waited": int(stats.get(f"waited:{klass}", 0)),
+                    "deferred": int(stats.get(f"deferred:{klass}", 0)),
+                    "rejected": int(stats.get(f"rejected:{klass}", 0)),
+                    "total_wait_seconds": round(stats.get(f"total_wait:{klass}", 0.0), 2),
+                }
+                for klass in PRIORITIES
+            },
+        }
+
+
+def _build_backend():
+    if settings.vnstock_rate_backend == "sqlite":
+        try:
+            return SQLiteBackend(settings.vnstock_rate_state_path)
+        except sqlite3.Error as e:
+            print(f"⚠️  Shared rate-limit store unavailable ({e}); using a per-process limiter")
+    return MemoryBackend()
+
+
+# One budget for every vnstock request: API routes, the background worker and,
+# with the sqlite backend, every uvicorn worker process on this host
+vnstock_limiter = TokenBucketLimiter(
+    max_requests=settings.vnstock_rate_limit,
+    time_window=settings.vnstock_rate_window,
+    burst=settings.vnstock_rate_burst,
+    backend=_build_backend(),
+    interactive_reserve=settings.vnstock_rate_interactive_reserve,
+)
@@ -0,0 +1,137 @@
+"""
+Single-Flight Request Coalescing
+Concurrent calls with the same key share one in-flight execution and its
+result (or exception). Keys are built from the function, its arguments and a
+short time bucket, so a burst of identical requests turns into one upstream
+fetch. Works across threads (`do`) and across asyncio tasks (`do_async`).
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from app.core.config import settings
+from app.utils.rate_limiter import current_priority
+
+
+def _freeze(value: Any) -> Hashable:
+    """Turn lists/dicts/sets in call arguments into hashable equivalents."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return tuple(sorted(_freeze(v) for v in value))
+    return value
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Deduplicates concurrent identical calls."""
+
+    def __init__(self, window: float = 1.0):
+        """
+        Args:
+            window: Width in seconds of the time bucket that is part of every key
+        """
+        self.window = window
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Hashable, "asyncio.Future"] = {}
+        self._stats = {"calls": 0, "executed": 0, "merged": 0}
+        self._merged_by_name: Dict[str, int] = defaultdict(int)
+
+    def key(self, fn: Callable, args: tuple = (), kwargs: Optional[dict] = None) -> Hashable:
+        name = f"{fn.__module__}.{getattr(fn, '__qualname__', repr(fn))}"
+        bucket = int(time.time() // self.window) if self.window > 0 else 0
+        # Never make an interactive caller wait on a deferred background fetch
+        return (name, _freeze(args), _freeze(kwargs or {}), bucket, current_priority())
+
+    def _record(self, key: Hashable, merged: bool):
+        self._stats["calls"] += 1
+        if merged:
+            self._stats["merged"] += 1
+            self._merged_by_name[key[0]] += 1
+        else:
+            self._stats["executed"] += 1
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn() unless a call with the same key is in flight; then wait for it."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._record(key, merged=not leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn() unless a task with the same key is in flight; then await that."""
+        with self._lock:
+            task = self._tasks.get(key)
+            leader = task is None
+            if leader:
+                task = self._tasks[key] = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda _t, key=key: self._forget_task(key))
+            self._record(key, merged=not leader)
+        # Shield so one caller going away does not cancel the shared fetch
+        return await asyncio.shield(task)
+
+    def _forget_task(self, key: Hashable):
+        with self._lock:
+            self._tasks.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self._stats["calls"]
+            return {
+                **self._stats,
+                "in_flight": len(self._calls) + len(self._tasks),
+                "merge_ratio": round(self._stats["merged"] / calls, 4) if calls else 0.0,
+                "merged_by_function": dict(self._merged_by_name),
+                "window_seconds": self.window,
+            }
+
+
+flights = SingleFlight(window=settings.singleflight_window_seconds)
+
+
+def coalesced(fn: Callable) -> Callable:
+    """Decorator: concurrent identical calls to fn share one execution."""
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return flights.do(flights.key(fn, args, kwargs), lambda: fn(*args, **kwargs))
+
+    return wrapper
+
+
+def get_singleflight_stats() -> Dict[str, Any]:
+    return flights.get_stats()
@@ -0,0 +1,61 @@
+"""
+Text Hashes
+Fixed-width hashes of normalized article titles and links. They are stored in
+indexed columns, so "was this already seen?" checks become index lookups
+instead of scans over Text columns.
+"""
+
+import hashlib
+import unicodedata
+from typing import Callable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that never change the article body: exact names, plus any utm_* key
+_TRACKING_PARAMS = {"fbclid", "gclid", "zarsrc", "ref"}
+_TRACKING_PREFIX = "utm_"
+
+# Stored instead of a hash when the title/link is NULL, so the row counts as hashed
+MISSING_HASH = ""
+
+# Hex characters kept from the digest (128 bits)
+HASH_LENGTH = 32
+
+
+def normalize_url(url: str) -> str:
+    """Lower-case scheme/host, drop fragment, tracking params and trailing slash, sort the query."""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in _TRACKING_PARAMS and not k.lower().startswith(_TRACKING_PREFIX)
+    )
+    path = parts.path.rstrip("/") or "/"
+    netloc = parts.netloc.lower()
+    if netloc.startswith("www."):
+        netloc = netloc[4:]
+    return urlunsplit((parts.scheme.lower() or "https", netloc, path, urlencode(query), ""))
+
+
+def normalize_title(title: str) -> str:
+    """NFC, lower-case, single spaces."""
+    return " ".join(unicodedata.normalize("NFC", title).lower().split())
+
+
+def _digest(value: str) -> str:
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=HASH_LENGTH // 2).hexdigest()
+
+
+def title_hash(title: Optional[str]) -> Optional[str]:
+    return _digest(normalize_title(title)) if title else None
+
+
+def link_hash(link: Optional[str]) -> Optional[str]:
+    return _digest(normalize_url(link)) if link else None
+
+
+def hashed_from(column: str, fn: Callable[[Optional[str]], Optional[str]]):
+    """Column default computing `fn` of another column in the same INSERT (MISSING_HASH for NULL)."""
+
+    def default(context):
+        return fn(context.get_current_parameters().get(column)) or MISSING_HASH
+
+    return default
@@ -0,0 +1,213 @@
+"""
+Vietnamese Trading Calendar (HOSE/HNX)
+Precomputed trading days, holidays and session times so services can tell
+whether market data can exist before calling upstream.
+
+Times are Vietnam local time (UTC+7, no DST).
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+VN_TZ = timezone(timedelta(hours=7))
+
+# HOSE/HNX session times
+MARKET_OPEN = time(9, 0)      # ATO auction 09:00-09:15, then continuous matching
+LUNCH_START = time(11, 30)
+LUNCH_END = time(13, 0)
+ATC_START = time(14, 30)      # closing auction
+MARKET_CLOSE = time(14, 45)
+
+# Market closures published by HOSE/HNX (weekdays only; weekends are always closed).
+# Tết and Hùng Kings follow the lunar calendar, so each year is listed explicitly.
+# Add next year's schedule when the exchanges publish it, or use
+# Settings.market_extra_holidays for ad-hoc closures.
+_HOLIDAYS = {
+    2023: [
+        "2023-01-02",
+        "2023-01-20", "2023-01-23", "2023-01-24", "2023-01-25", "2023-01-26",
+        "2023-05-01", "2023-05-02", "2023-05-03",
+        "2023-09-01", "2023-09-04",
+    ],
+    2024: [
+        "2024-01-01",
+        "2024-02-08", "2024-02-09", "2024-02-12", "2024-02-13", "2024-02-14",
+        "2024-04-18",
+        "2024-04-29", "2024-04-30", "2024-05-01",
+        "2024-09-02", "2024-09-03",
+    ],
+    2025: [
+        "2025-01-01",
+        "2025-01-27", "2025-01-28", "2025-01-29", "2025-01-30", "2025-01-31",
+        "2025-04-07",
+        "2025-04-30", "2025-05-01", "2025-05-02",
+        "2025-09-01", "2025-09-02",
+    ],
+    2026: [
+        "2026-01-01",
+        "2026-02-16", "2026-02-17", "2026-02-18", "2026-02-19", "2026-02-20",
+        "2026-04-27",
+        "2026-04-30", "2026-05-01",
+        "2026-09-01", "2026-09-02",
+    ],
+    # Provisional until the exchanges publish the 2027 schedule: Tết falls on
+    # Saturday 2027-02-06, Hùng Kings (10th day of the 3rd lunar month) on 04-16
+    2027: [
+        "2027-01-01",
+        "2027-02-04", "2027-02-05", "2027-02-08", "2027-02-09", "2027-02-10",
+        "2027-04-16",
+        "2027-04-30", "2027-05-03",
+        "2027-09-02", "2027-09-03",
+    ],
+}
+
+# Solar-calendar holidays assumed for years without a published schedule
+_FIXED_HOLIDAYS = [(1, 1), (4, 30), (5, 1), (9, 2)]
+
+_CALENDAR_YEARS = range(2000, 2036)
+
+
+def _build_calendar() -> np.busdaycalendar:
+    holidays = []
+    for year in _CALENDAR_YEARS:
+        if year in _HOLIDAYS:
+            holidays.extend(_HOLIDAYS[year])
+        else:
+            holidays.extend(date(year, m, d).isoformat() for m, d in _FIXED_HOLIDAYS)
+    holidays.extend(d.strip() for d in settings.market_extra_holidays.split(",") if d.strip())
+    return np.busdaycalendar(weekmask="1111100", holidays=holidays)
+
+
+_CAL = _build_calendar()
+
+
+_warned_years = set()
+
+
+def _check_years(start: date, end: date):
+    """Warn once per year without a published schedule (its lunar holidays count as sessions)."""
+    for year in range(start.year, end.year + 1):
+        if year not in _HOLIDAYS and year not in _warned_years:
+            _warned_years.add(year)
+            print(
+                f"⚠️  Trading calendar: no holiday schedule for {year}, assuming only "
+                f"fixed-date holidays (Tết and Hùng Kings count as sessions)"
+            )
+
+
+def _to_date(value) -> date:
+    if isinstance(value, datetime):
+        day = value.date()
+    elif isinstance(value, date):
+        day = value
+    else:
+        day = datetime.strptime(str(value), "%Y-%m-%d").date()
+    _check_years(day, day)
+    return day
+
+
+def now_vn() -> datetime:
+    """Current Vietnam local time as a naive datetime."""
+    return datetime.now(VN_TZ).replace(tzinfo=None)
+
+
+def is_trading_day(day) -> bool:
+    return bool(np.is_busday(np.datetime64(_to_date(day), "D"), busdaycal=_CAL))
+
+
+def trading_days(start, end) -> List[date]:
+    """All sessions in [start, end], in order."""
+    start, end = _to_date(start), _to_date(end)
+    if end < start:
+        return []
+    _check_years(start, end)
+    days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    return days[np.is_busday(days, busdaycal=_CAL)].astype(date).tolist()
+
+
+def count_sessions(start, end) -> int:
+    """Number of sessions in [start, end]."""
+    start, end = _to_date(start), _to_date(end)
+    if end < start:
+        return 0
+    _check_years(start, end)
+    return int(np.busday_count(np.datetime64(start, "D"), np.datetime64(end, "D") + 1, busdaycal=_CAL))
+
+
+def has_sessions(start, end) -> bool:
+    """Whether any market data can exist for [start, end]."""
+    return count_sessions(start, end) > 0
+
+
+def session_on_or_before(day) -> date:
+    return np.busday_offset(np.datetime64(_to_date(day), "D"), 0, roll="backward", busdaycal=_CAL).astype(date)
+
+
+def previous_session(day, n: int = 1) -> date:
+    """The N-th session strictly before `day`."""
+    d = np.datetime64(_to_date(day), "D")
+    if np.is_busday(d, busdaycal=_CAL):
+        return np.busday_offset(d, -n, busdaycal=_CAL).astype(date)
+    # `day` itself is closed: the previous session is the 1st one before it
+    return np.busday_offset(d, -(n - 1), roll="backward", busdaycal=_CAL).astype(date)
+
+
+def next_session(day) -> date:
+    """The first session strictly after `day`."""
+    d = np.datetime64(_to_date(day), "D") + 1
+    return np.busday_offset(d, 0, roll="forward", busdaycal=_CAL).astype(date)
+
+
+def latest_session(now: Optional[datetime] = None) -> date:
+    """Most recent session that has (or is building) a daily bar."""
+    now = now or now_vn()
+    if is_trading_day(now) and now.time() >= MARKET_OPEN:
+        return now.date()
+    return previous_session(now.date())
+
+
+def latest_closed_session(now: Optional[datetime] = None) -> date:
+    """Most recent session whose daily bar is final."""
+    now = now or now_vn()
+    if is_trading_day(now) and now.time() >= MARKET_CLOSE:
+        return now.date()
+    return previous_session(now.date())
+
+
+def market_phase(now: Optional[datetime] = None) -> str:
+    """
+    One of: closed (non-trading day), pre_open, morning, lunch, afternoon,
+    closing_auction, after_close.
+    """
+    now = now or now_vn()
+    if not is_trading_day(now):
+        return "closed"
+    t = now.time()
+    if t < MARKET_OPEN:
+        return "pre_open"
+    if t < LUNCH_START:
+        return "morning"
+    if t < LUNCH_END:
+        return "lunch"
+    if t < ATC_START:
+        return "afternoon"
+    if t < MARKET_CLOSE:
+        return "closing_auction"
+    return "after_close"
+
+
+def next_open(now: Optional[datetime] = None) -> datetime:
+    """Start of the next trading period (next open, or 13:00 during lunch)."""
+    now = now or now_vn()
+    phase = market_phase(now)
+    if phase == "pre_open":
+        return datetime.combine(now.date(), MARKET_OPEN)
+    if phase == "lunch":
+        return datetime.combine(now.date(), LUNCH_END)
+    if phase in ("morning", "afternoon", "closing_auction"):
+        return now
+    return datetime.combine(next_session(now.date()), MARKET_OPEN)
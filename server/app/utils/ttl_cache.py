@@ -0,0 +1,191 @@
+"""
+Market-Session-Aware TTL Cache
+Bounded LRU cache whose entry lifetime follows the market phase: a few seconds
+during continuous trading, until the next open once the market is closed.
+Supports stale-while-revalidate and is safe to share between threads.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from app.utils import trading_calendar
+from app.utils.rate_limiter import priority
+
+# Phases where prices move and entries must expire quickly
+_LIVE_PHASES = {"morning", "afternoon", "closing_auction"}
+
+_MISSING = object()
+
+# Shared by all caches; refreshes are short upstream calls
+_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+
+
+class MarketTTLCache:
+    """LRU cache with market-phase TTLs and stale-while-revalidate."""
+
+    def __init__(self, maxsize: int = 1024, live_ttl: float = 5.0, stale_grace: float = 30.0):
+        """
+        Args:
+            maxsize: Maximum number of entries before LRU eviction
+            live_ttl: Entry lifetime in seconds while the market is trading
+            stale_grace: Seconds past expiry an entry may still be served
+                while it is refreshed in the background
+        """
+        self.maxsize = maxsize
+        self.live_ttl = live_ttl
+        self.stale_grace = stale_grace
+        self._data: "OrderedDict[Hashable, tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing: set = set()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "refreshes": 0, "refresh_errors": 0}
+
+    def ttl(self, now: Optional[datetime] = None) -> float:
+        """Seconds a value stored now stays fresh."""
+        now = now or trading_calendar.now_vn()
+        if trading_calendar.market_phase(now) in _LIVE_PHASES:
+            return self.live_ttl
+        return max((trading_calendar.next_open(now) - now).total_seconds(), self.live_ttl)
+
+    def _lookup(self, key: Hashable):
+        """(value, is_fresh) or (_MISSING, False). Caller holds the lock."""
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING, False
+        value, expires_at = entry
+        now = time.monotonic()
+        if now < expires_at:
+            self._data.move_to_end(key)
+            return value, True
+        if now < expires_at + self.stale_grace:
+            self._data.move_to_end(key)
+            return value, False
+        del self._data[key]
+        return _MISSING, False
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Fresh value or None."""
+        with self._lock:
+            value, fresh = self._lookup(key)
+            if fresh:
+                self._stats["hits"] += 1
+                return value
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return a fresh value, or a stale one while `loader` refreshes it in the
+        background, or call `loader` synchronously on a miss.
+        """
+        with self._lock:
+            value, fresh = self._lookup(key)
+            if fresh:
+                self._stats["hits"] += 1
+                return value
+            if value is not _MISSING:
+                self._stats["stale_hits"] += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    _refresh_pool.submit(self._refresh, key, loader)
+                return value
+            self._stats["misses"] += 1
+
+        value = loader()
+        self.set(key, value)
+        return value
+
+    def get_or_load_many(
+        self, keys: List[Hashable], loader: Callable[[List[Hashable]], Dict[Hashable, Any]]
+    ) -> Dict[Hashable, Any]:
+        """
+        Batch form of get_or_load. `loader` takes a list of keys and returns a
+        dict for the ones it could load; it is called at most once
+        synchronously for all misses, and once in the background for all
+        stale keys. Keys the loader does not return are left out.
+        """
+        found: Dict[Hashable, Any] = {}
+        missing: List[Hashable] = []
+        stale: List[Hashable] = []
+        with self._lock:
+            for key in keys:
+                value, fresh = self._lookup(key)
+                if fresh:
+                    self._stats["hits"] += 1
+                    found[key] = value
+                elif value is not _MISSING:
+                    self._stats["stale_hits"] += 1
+                    found[key] = value
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        stale.append(key)
+                else:
+                    self._stats["misses"] += 1
+                    missing.append(key)
+            if stale:
+                _refresh_pool.submit(self._refresh_many, stale, loader)
+
+        if missing:
+            loaded = loader(missing)
+            for key, value in loaded.items():
+                self.set(key, value)
+            found.update(loaded)
+        return found
+
+    def _refresh_many(self, keys: List[Hashable], loader: Callable[[List[Hashable]], Dict[Hashable, Any]]):
+        try:
+            # Nobody is waiting on a refresh; it yields budget to interactive calls
+            with priority("prefetch"):
+                loaded = loader(keys)
+            for key, value in loaded.items():
+                self.set(key, value)
+            with self._lock:
+                self._stats["refreshes"] += 1
+        except Exception as e:
+            print(f"Cache refresh failed for {len(keys)} keys: {e}")
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(keys)
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any]):
+        try:
+            with priority("prefetch"):
+                value = loader()
+            self.set(key, value)
+            with self._lock:
+                self._stats["refreshes"] += 1
+        except Exception as e:
+            print(f"Cache refresh failed for {key}: {e}")
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["stale_hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hit_ratio": round((self._stats["hits"] + self._stats["stale_hits"]) / lookups, 4) if lookups else 0.0,
+                "current_ttl_seconds": round(self.ttl(), 1),
+            }
@@ -7,66 +7,17 @@ import asyncio
 from datetime import datetime, timedelta
 from typing import List
 from sqlalchemy.orm import Session
-from newspaper import Article
-import time
-from collections import deque
 
-from app.db.models import AnalyzedArticle, WeeklySummary, Signal, Watchlist
-from app.services import news_service, stocks_service
-from app.services.analysis import analyze_single_article, analyze_weekly_trends
+from app.db.models import AnalyzedArticle, WeeklySummary, Watchlist
+from app.utils.rate_limiter import priority, vnstock_limiter
+from app.workers.pipeline import run_pipeline
+from app.services.analysis import analyze_weekly_trends_async
+from app.services.analysis.signal_engine import detect_signals
 
 
-# Rate limiter for vnstock API (20 requests per minute)
-class RateLimiter:
-    def __init__(self, max_requests: int = 20, time_window: int = 60):
-        """
-        Args:
-            max_requests: Maximum number of requests allowed
-            time_window: Time window in seconds (default 60 = 1 minute)
-        """
-        self.max_requests = max_requests
-        self.time_window = time_window
-        self.requests = deque()
-    
-    def wait_if_needed(self):
-        """
-        Check if we've exceeded rate limit and wait if necessary
-        """
-        now = time.time()
-        
-        # Remove requests older than time window
-        while self.requests and self.requests[0] < now - self.time_window:
-            self.requests.popleft()
-        
-        # If we've hit the limit, wait until oldest request expires
-        if len(self.requests) >= self.max_requests:
-            wait_time = self.time_window - (now - self.requests[0]) + 1  # +1 for safety margin
-            if wait_time > 0:
-                print(f"⏳ Rate limit reached ({self.max_requests} requests/minute). Waiting {wait_time:.1f}s...")
-                time.sleep(wait_time)
-                # Clean up old requests after waiting
-                now = time.time()
-                while self.requests and self.requests[0] < now - self.time_window:
-                    self.requests.popleft()
-        
-        # Record this request
-        self.requests.append(time.time())
-    
-    def get_stats(self):
-        """Get current rate limiter statistics"""
-        now = time.time()
-        # Count requests in current window
-        recent = sum(1 for req_time in self.requests if req_time >= now - self.time_window)
-        return {
-            "requests_in_window": recent,
-            "max_requests": self.max_requests,
-            "time_window": self.time_window,
-            "remaining": self.max_requests - recent
-        }
-
-
-# Global rate limiter instance
-vnstock_rate_limiter = RateLimiter(max_requests=20, time_window=60)
+# Shared vnstock limiter (20 requests per minute). It is charged per vnstock
+# HTTP request, so API traffic and this worker draw from the same budget.
+vnstock_rate_limiter = vnstock_limiter
 
 
 async def analyze_watchlist_stocks(db: Session):
@@ -94,14 +45,9 @@ async def analyze_watchlist_stocks(db: Session):
     
     print(f"📋 Monitoring {len(symbols)} stocks: {', '.join(symbols)}\n")
     
-    for idx, symbol in enumerate(symbols, 1):
-        try:
-            print(f"[{idx}/{len(symbols)}] Processing {symbol}...")
-            await analyze_symbol_news(db, symbol)
-        except Exception as e:
-            print(f"❌ Error analyzing {symbol}: {e}")
-            import traceback
-            traceback.print_exc()
+    # Background class: vnstock calls defer to API requests when they spike
+    with priority("background"):
+        await analyze_symbols(db, symbols)
     
     print(f"\n{'='*60}")
     print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Completed watchlist analysis")
@@ -112,196 +58,42 @@ async def analyze_watchlist_stocks(db: Session):
     print(f"{'='*60}\n")
 
 
-async def analyze_symbol_news(db: Session, symbol: str):
-    """Analyze recent news for a single symbol"""
-    print(f"\n📊 Analyzing {symbol}...")
-    print("-" * 40)
-    
-    # Rate limit check before making API call
-    vnstock_rate_limiter.wait_if_needed()
-    
-    # 1. Get latest news (check past 6 hours only to avoid re-processing old news)
-    cutoff_time = datetime.now() - timedelta(hours=6)
-    news_response = news_service.get_company_news(symbol, limit=20)
-    news_list = news_response.get('data', [])
-    
-    # 2. Filter out already-analyzed articles
-    new_articles = []
-    for news in news_list:
-        title = news.get('title') or news.get('news_title')
-        
-        # Check if already in DB
-        existing = db.query(AnalyzedArticle).filter_by(
-            symbol=symbol,
-            title=title
-        ).first()
-        
-        if not existing:
-            new_articles.append(news)
-    
-    if not new_articles:
-        print(f"✓ {symbol}: No new articles (all analyzed)")
-        return
-    
-    print(f"📰 {symbol}: Found {len(new_articles)} new articles to analyze\n")
-    
-    # 3. Get market context (once per symbol)
-    # Rate limit check before API call
-    vnstock_rate_limiter.wait_if_needed()
-    context = stocks_service.get_market_context(symbol)
-    
-    # 4. Analyze each new article
-    for idx, news in enumerate(new_articles):
-        await analyze_and_store_article(db, symbol, context, news, idx + 1, len(new_articles))
-    
-    # 5. Check for signals (dividend announcements, major events)
-    await detect_signals(db, symbol)
-    
-    # 6. Generate weekly summary if it's Monday or new week
-    await update_weekly_summary(db, symbol)
-
+async def analyze_symbols(db: Session, symbols: List[str]):
+    """
+    Run the fetch -> scrape -> analyze -> store pipeline for all symbols, then
+    signals for the new articles and the weekly summary for every symbol that
+    got new articles.
 
-async def analyze_and_store_article(
-    db: Session, 
-    symbol: str, 
-    context: str, 
-    news: dict,
-    idx: int,
-    total: int
-):
-    """Analyze single article and store in DB"""
-    title = news.get('title') or news.get('news_title')
-    link = news.get('link') or news.get('news_link')
-    pub_date_str = news.get('published') or news.get('news_pub_date')
-    
-    if not link:
-        return
-    
-    print(f"  [{idx}/{total}] {title[:60]}...")
+    Symbols without new articles keep their summary: it is built only from
+    stored articles, so it cannot change until one arrives (the per-symbol
+    loop this replaced also returned before the summary step in that case).
+    """
+    result = await run_pipeline(db, symbols)
     
-    # Scrape and analyze
     try:
-        article = Article(link)
-        article.download()
-        article.parse()
-        
-        analysis = analyze_single_article(
-            symbol, context, title, article.text, use_cache=False
-        )
-        
+        # Signals (dividend announcements, major events) from the articles stored in this run only
+        detect_signals(db, result["new_article_ids"])
     except Exception as e:
-        print(f"      ❌ Failed: {str(e)[:50]}")
-        return
-    
-    # Parse published date
-    try:
-        pub_date = datetime.fromisoformat(pub_date_str.replace('Z', '+00:00'))
-    except:
-        pub_date = datetime.now()
-    
-    # Store in database
-    analyzed = AnalyzedArticle(
-        symbol=symbol,
-        title=title,
-        link=link,
-        published_at=pub_date,
-        is_relevant=analysis.get('is_relevant'),
-        sentiment=analysis.get('sentiment'),
-        tldr=analysis.get('tldr'),
-        rationale=analysis.get('rationale'),
-        key_drivers=analysis.get('key_drivers'),
-        risks_or_caveats=analysis.get('risks_or_caveats'),
-        score=analysis.get('score'),
-        confidence=analysis.get('confidence')
-    )
-    
-    db.add(analyzed)
-    db.commit()
-    
-    sentiment_emoji = {
-        'Bullish': '📈',
-        'Bearish': '📉',
-        'Neutral': '➡️'
-    }.get(analysis.get('sentiment'), '❓')
-    
-    print(f"      ✓ {sentiment_emoji} {analysis.get('sentiment')} (Score: {analysis.get('score')}/10)")
+        db.rollback()
+        print(f"❌ Error detecting signals: {e}")
+
+    # Nothing new stored means nothing new to summarize; skip the LLM call
+    for symbol in result["symbols_with_new"]:
+        try:
+            # Generate weekly summary if it's Monday or new week
+            await update_weekly_summary(db, symbol)
+        except Exception as e:
+            print(f"❌ Error analyzing {symbol}: {e}")
+            import traceback
+            traceback.print_exc()
+    return result
 
 
-async def detect_signals(db: Session, symbol: str):
-    """
-    Detect investment signals from recent articles
-    - Dividend announcements
-    - Earnings beats
-    - Major contracts
-    """
-    # Get articles from past 24 hours
-    recent = db.query(AnalyzedArticle).filter(
-        AnalyzedArticle.symbol == symbol,
-        AnalyzedArticle.published_at >= datetime.now() - timedelta(hours=24),
-        AnalyzedArticle.is_relevant == True
-    ).all()
-    
-    signals_detected = 0
-    
-    for article in recent:
-        # Check for dividend signals
-        if any(keyword in article.title.lower() for keyword in ['cổ tức', 'dividend', 'phân phối', 'chia cổ']):
-            # Create signal if not already exists
-            existing = db.query(Signal).filter_by(article_id=article.id).first()
-            
-            if not existing and article.score >= 6:
-                signal = Signal(
-                    symbol=symbol,
-                    signal_type='dividend_announced',
-                    priority='high' if article.score >= 8 else 'medium',
-                    title=f"💰 {symbol}: Dividend Announcement",
-                    description=article.tldr,
-                    article_id=article.id,
-                    expires_at=datetime.now() + timedelta(days=30)
-                )
-                db.add(signal)
-                signals_detected += 1
-                print(f"  🚨 Signal: {signal.title}")
-        
-        # Check for earnings/revenue beats
-        if any(keyword in article.title.lower() for keyword in ['doanh thu', 'lợi nhuận', 'kết quả kinh doanh', 'earnings']):
-            existing = db.query(Signal).filter_by(article_id=article.id).first()
-            
-            if not existing and article.sentiment == 'Bullish' and article.score >= 7:
-                signal = Signal(
-                    symbol=symbol,
-                    signal_type='earnings_beat',
-                    priority='high',
-                    title=f"📈 {symbol}: Strong Earnings Signal",
-                    description=article.tldr,
-                    article_id=article.id,
-                    expires_at=datetime.now() + timedelta(days=7)
-                )
-                db.add(signal)
-                signals_detected += 1
-                print(f"  🚨 Signal: {signal.title}")
-        
-        # Check for major contracts
-        if any(keyword in article.title.lower() for keyword in ['hợp đồng', 'dự án', 'contract', 'partnership']):
-            existing = db.query(Signal).filter_by(article_id=article.id).first()
-            
-            if not existing and article.sentiment == 'Bullish' and article.score >= 7:
-                signal = Signal(
-                    symbol=symbol,
-                    signal_type='major_contract',
-                    priority='medium',
-                    title=f"📋 {symbol}: Major Contract/Partnership",
-                    description=article.tldr,
-                    article_id=article.id,
-                    expires_at=datetime.now() + timedelta(days=14)
-                )
-                db.add(signal)
-                signals_detected += 1
-                print(f"  🚨 Signal: {signal.title}")
-    
-    if signals_detected > 0:
-        db.commit()
-        print(f"  ✓ Detected {signals_detected} new signals")
+async def analyze_symbol_news(db: Session, symbol: str):
+    """Analyze recent news for a single symbol"""
+    print(f"\n📊 Analyzing {symbol}...")
+    print("-" * 40)
+    return await analyze_symbols(db, [symbol])
 
 
 async def update_weekly_summary(db: Session, symbol: str):
@@ -340,7 +132,7 @@ async def update_weekly_summary(db: Session, symbol: str):
     
     # AI-generated weekly insights
     print(f"  📊 Generating weekly summary ({total} articles)...")
-    trend_data = analyze_weekly_trends(symbol, articles)
+    trend_data = await analyze_weekly_trends_async(symbol, articles)
     
     # Upsert weekly summary
     if existing:
@@ -387,5 +179,5 @@ def reset_rate_limiter():
     """
     Reset rate limiter (for testing or manual intervention)
     """
-    vnstock_rate_limiter.requests.clear()
+    vnstock_rate_limiter.reset()
     print("✓ Rate limiter reset")
@@ -0,0 +1,605 @@
+"""
+Watchlist Analysis Pipeline
+Staged asyncio pipeline for the background worker:
+
+    fetch news -> scrape -> LLM analyze -> store
+
+Stages are joined by bounded queues and each runs a configurable number of
+workers, so downloads and LLM calls for different articles overlap. Blocking
+work never runs on the event loop: vnstock calls go through the upstream
+gateway (and the shared rate limiter), articles are fetched by the async
+scraper and LLM calls go through the async LLM gateway. With
+`analysis_batch_enabled` the analyze stage sends the queued articles of a
+symbol as one batch request (on a small thread pool). Per-source news
+watermarks cut each fetched feed down to the items newer than the last
+complete run, and symbols whose feeds have not changed are skipped. Before
+any LLM call the article's SimHash is looked up among recent and in-flight
+articles of the symbol; a near-duplicate reuses that analysis. Article content is shared
+across symbols: each canonical URL is scraped at most once per run (and not
+at all if the `articles` table already holds it), and every symbol's job for
+that article is handed to the analyze stage together. A single store worker
+owns the DB session writes.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import AnalyzedArticle, Article
+from app.services import news_service, news_watermarks, scraper, stocks_service, upstream
+from app.services.analysis import analyze_articles_batch, analyze_single_article_async
+from app.services.analysis.dedup import SimHashIndex, dedup_stats, simhash
+from app.utils.rate_limiter import vnstock_limiter
+from app.utils.text_hash import link_hash, normalize_url, title_hash
+
+# Marks the end of a stage's input
+_DONE = object()
+
+_pool = ThreadPoolExecutor(
+    max_workers=settings.pipeline_analyze_workers,
+    thread_name_prefix="pipeline",
+)
+
+
+class ArticleJob:
+    """One article moving through the pipeline."""
+
+    def __init__(self, symbol: str, context: str, news: Dict[str, Any]):
+        self.symbol = symbol
+        self.context = context
+        self.news = news
+        self.title = news.get('title') or news.get('news_title')
+        self.link = news.get('link') or news.get('news_link')
+        self.url = normalize_url(self.link) if self.link else None
+        self.article_id: Optional[int] = None
+        self.text: Optional[str] = None
+        self.analysis: Optional[Dict[str, Any]] = None
+        # Near-duplicate bookkeeping
+        self.simhash: Optional[int] = None
+        self.duplicate_of: Optional[int] = None  # stored article whose analysis was reused
+        self.source_job: Optional["ArticleJob"] = None  # in-flight article whose analysis was reused
+        self.analyzed: Optional[asyncio.Future] = None  # resolves to this job's analysis
+        self.row_id: Optional[int] = None
+
+
+class _SharedArticle:
+    """One canonical URL in this run: scraped once, then released to every symbol's job."""
+
+    def __init__(self):
+        self.done = False
+        self.text: Optional[str] = None
+        self.waiting: List[ArticleJob] = []
+
+
+class PipelineStats:
+    """Per-stage item counts, failures and busy time."""
+
+    STAGES = ("fetch", "scrape", "analyze", "store")
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.stages = {stage: {"items": 0, "failed": 0, "busy_seconds": 0.0} for stage in self.STAGES}
+        self.stages["scrape"].update(download_seconds=0.0, parse_seconds=0.0)
+        self.symbols_with_new: List[str] = []
+        self.new_article_ids: List[int] = []
+        self.llm_calls_avoided = 0
+        self.scrapes_shared = 0
+        self.items_skipped = 0  # at or behind a news watermark
+        self.symbols_unchanged = 0
+
+    def add_scrape_timings(self, result: Dict[str, Any]):
+        self.stages["scrape"]["download_seconds"] += result["download_seconds"]
+        self.stages["scrape"]["parse_seconds"] += result["parse_seconds"]
+
+    def record(self, stage: str, elapsed: float, ok: bool = True):
+        entry = self.stages[stage]
+        entry["items" if ok else "failed"] += 1
+        entry["busy_seconds"] += elapsed
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "wall_seconds": round(time.monotonic() - self.started, 2),
+            "stages": {
+                stage: {k: round(v, 2) if isinstance(v, float) else v for k, v in entry.items()}
+                for stage, entry in self.stages.items()
+            },
+            "symbols_with_new": list(self.symbols_with_new),
+            "new_article_ids": list(self.new_article_ids),
+            "llm_calls_avoided": self.llm_calls_avoided,
+            "scrapes_shared": self.scrapes_shared,
+            "items_skipped": self.items_skipped,
+            "symbols_unchanged": self.symbols_unchanged,
+        }
+
+
+async def _in_thread(fn: Callable, *args):
+    # Keep context variables (e.g. upstream priority) in the worker thread
+    ctx = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(_pool, ctx.run, fn, *args)
+
+
+def parse_published(pub_date_str: Optional[str]) -> datetime:
+    try:
+        return datetime.fromisoformat(pub_date_str.replace('Z', '+00:00'))
+    except:
+        return datetime.now()
+
+
+def build_analyzed_article(symbol: str, news: Dict[str, Any], analysis: Dict[str, Any]) -> AnalyzedArticle:
+    return AnalyzedArticle(
+        symbol=symbol,
+        title=news.get('title') or news.get('news_title'),
+        link=news.get('link') or news.get('news_link'),
+        published_at=parse_published(news.get('published') or news.get('news_pub_date')),
+        is_relevant=analysis.get('is_relevant'),
+        sentiment=analysis.get('sentiment'),
+        tldr=analysis.get('tldr'),
+        rationale=analysis.get('rationale'),
+        key_drivers=analysis.get('key_drivers'),
+        risks_or_caveats=analysis.get('risks_or_caveats'),
+        score=analysis.get('score'),
+        confidence=analysis.get('confidence')
+    )
+
+
+def stored_analysis(row: AnalyzedArticle) -> Dict[str, Any]:
+    """The analysis fields of a stored article (inverse of build_analyzed_article)."""
+    return {
+        "is_relevant": row.is_relevant,
+        "sentiment": row.sentiment,
+        "tldr": row.tldr,
+        "rationale": row.rationale,
+        "key_drivers": row.key_drivers,
+        "risks_or_caveats": row.risks_or_caveats,
+        "score": row.score,
+        "confidence": row.confidence,
+    }
+
+
+def log_analysis(title: str, analysis: Dict[str, Any]):
+    sentiment_emoji = {
+        'Bullish': '📈',
+        'Bearish': '📉',
+        'Neutral': '➡️'
+    }.get(analysis.get('sentiment'), '❓')
+    print(f"      ✓ {sentiment_emoji} {analysis.get('sentiment')} (Score: {analysis.get('score')}/10) {(title or '')[:50]}")
+
+
+def _new_articles(db: Session, symbol: str, news_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """News items not analyzed yet for this symbol, by normalized title or link (one indexed query)."""
+    keys = [
+        (title_hash(n.get('title') or n.get('news_title')), link_hash(n.get('link') or n.get('news_link')))
+        for n in news_list
+    ]
+    titles = {t for t, _ in keys if t}
+    links = {l for _, l in keys if l}
+    seen_titles, seen_links = set(), set()
+    if titles or links:
+        # UNION ALL rather than OR so each half searches its (symbol, hash) index
+        hashes = db.query(AnalyzedArticle.title_hash, AnalyzedArticle.link_hash)
+        by_title = hashes.filter(AnalyzedArticle.symbol == symbol, AnalyzedArticle.title_hash.in_(titles))
+        by_link = hashes.filter(AnalyzedArticle.symbol == symbol, AnalyzedArticle.link_hash.in_(links))
+        for row_title, row_link in by_title.union_all(by_link):
+            # Not yet backfilled (NULL) or MISSING_HASH: no key to match on
+            if row_title:
+                seen_titles.add(row_title)
+            if row_link:
+                seen_links.add(row_link)
+    fresh = []
+    for news, (t, l) in zip(news_list, keys):
+        if (t and t in seen_titles) or (l and l in seen_links):
+            continue
+        if t:
+            seen_titles.add(t)
+        if l:
+            seen_links.add(l)
+        fresh.append(news)
+    return fresh
+
+
+def _stored_articles(db: Session, jobs: List[ArticleJob]):
+    """Fill text/article_id of jobs whose content is already in the articles table (one query)."""
+    urls = {job.url for job in jobs if job.url}
+    if not urls:
+        return
+    stored = {
+        row.url: row
+        for row in db.query(Article).filter(Article.url.in_(urls), Article.content.isnot(None))
+    }
+    for job in jobs:
+        row = stored.get(job.url)
+        if row is not None:
+            job.text, job.article_id = row.content, row.id
+
+
+class _Duplicates:
+    """Near-duplicate lookups for one run: recently stored articles plus articles in flight."""
+
+    def __init__(self, db: Session, symbols: List[str]):
+        self.enabled = settings.dedup_enabled
+        self.indexes: Dict[str, SimHashIndex] = {
+            symbol: SimHashIndex(settings.dedup_max_distance) for symbol in symbols
+        }
+        if self.enabled and symbols:
+            since = datetime.now() - timedelta(days=settings.dedup_window_days)
+            rows = db.query(AnalyzedArticle).filter(
+                AnalyzedArticle.symbol.in_(symbols),
+                AnalyzedArticle.simhash.isnot(None),
+                AnalyzedArticle.analyzed_at >= since,
+            )
+            for row in rows:
+                self.indexes[row.symbol].add(row.simhash, (row.id, stored_analysis(row)))
+
+    def match(self, job: ArticleJob) -> Optional[Union[ArticleJob, Tuple[int, Dict[str, Any]]]]:
+        if not self.enabled:
+            return None
+        job.simhash = simhash(job.title, job.text)
+        found = self.indexes[job.symbol].find(job.simhash)
+        dedup_stats.record(duplicate=found is not None)
+        return found[0] if found else None
+
+    def register(self, job: ArticleJob):
+        """Make `job` visible to later lookups; must run before its analysis starts."""
+        job.analyzed = asyncio.get_running_loop().create_future()
+        if self.enabled:
+            self.indexes[job.symbol].add(job.simhash, job)
+
+
+async def _reuse_duplicate(dups: _Duplicates, job: ArticleJob, stats: PipelineStats) -> bool:
+    """Copy the analysis of a near-duplicate instead of calling the LLM. True if reused."""
+    match = dups.match(job)
+    if match is None:
+        return False
+    if isinstance(match, ArticleJob):
+        # Only registered jobs are matched, and their workers never wait here: no deadlock
+        analysis = await match.analyzed
+        if not analysis:
+            return False
+        job.source_job = match
+    else:
+        job.duplicate_of, analysis = match
+    job.analysis = dict(analysis)
+    stats.llm_calls_avoided += 1
+    print(f"      ♻️  Near-duplicate, reusing analysis: {(job.title or '')[:50]}")
+    return True
+
+
+def _past_watermarks(db: Session, symbol: str, items: List[Dict[str, Any]], stats: PipelineStats) -> Optional[List[Dict[str, Any]]]:
+    """Items newer than the symbol's watermarks, or None if its feeds are unchanged."""
+    marks = news_watermarks.load(db, symbol)
+    if news_watermarks.unchanged(marks, items):
+        stats.symbols_unchanged += 1
+        stats.items_skipped += len(items)
+        print(f"✓ {symbol}: Feed unchanged since last run, skipped {len(items)} items")
+        return None
+    fresh, skipped = news_watermarks.split_new(marks, items)
+    if skipped:
+        stats.items_skipped += skipped
+        print(f"⏭️  {symbol}: Skipped {skipped} items at or behind the watermark")
+    return fresh
+
+
+async def _fetch_worker(
+    db: Session,
+    symbols: asyncio.Queue,
+    out: asyncio.Queue,
+    stats: PipelineStats,
+    feeds: Dict[str, Tuple[List[Dict[str, Any]], List[ArticleJob]]],
+):
+    while True:
+        symbol = await symbols.get()
+        if symbol is _DONE:
+            return
+        started = time.monotonic()
+        try:
+            # Wait for vnstock budget on the event loop, not in a gateway thread
+            await vnstock_limiter.wait_ready()
+            news_response = await news_service.get_company_news_async(symbol, limit=20)
+            items = news_response.get('data', [])
+            if settings.news_watermarks_enabled:
+                fresh = _past_watermarks(db, symbol, items, stats)
+                if fresh is None:
+                    stats.record("fetch", time.monotonic() - started)
+                    continue
+            else:
+                fresh = items
+            new_articles = _new_articles(db, symbol, fresh)
+            if not new_articles:
+                print(f"✓ {symbol}: No new articles (all analyzed)")
+                feeds[symbol] = (items, [])
+                stats.record("fetch", time.monotonic() - started)
+                continue
+
+            print(f"📰 {symbol}: Found {len(new_articles)} new articles to analyze")
+            await vnstock_limiter.wait_ready()
+            context = await upstream.call(stocks_service.get_market_context, symbol)
+            stats.symbols_with_new.append(symbol)
+            jobs = [ArticleJob(symbol, context, news) for news in new_articles]
+            feeds[symbol] = (items, jobs)
+            _stored_articles(db, jobs)
+            stats.record("fetch", time.monotonic() - started)
+            for job in jobs:
+                await out.put(job)
+        except Exception as e:
+            stats.record("fetch", time.monotonic() - started, ok=False)
+            print(f"❌ Error fetching news for {symbol}: {e}")
+
+
+async def _scrape_worker(
+    shared: Dict[str, _SharedArticle], jobs: asyncio.Queue, out: asyncio.Queue, stats: PipelineStats
+):
+    while True:
+        job = await jobs.get()
+        if job is _DONE:
+            return
+        if not job.link:
+            continue
+        if job.text:
+            # Content already in the articles table (e.g. analyzed for another symbol before)
+            stats.scrapes_shared += 1
+            await out.put(job)
+            continue
+
+        entry = shared.get(job.url)
+        if entry is not None:
+            # Another symbol's job owns this URL: ride along instead of downloading again
+            stats.scrapes_shared += 1
+            if not entry.done:
+                entry.waiting.append(job)
+            elif entry.text:
+                job.text = entry.text
+                await out.put(job)
+            continue
+
+        entry = shared[job.url] = _SharedArticle()
+        started = time.monotonic()
+        result = await scraper.scrape_article(job.link)
+        stats.record("scrape", time.monotonic() - started, ok=not result["error"])
+        stats.add_scrape_timings(result)
+        entry.done = True
+        if result["error"]:
+            print(f"      ❌ Failed to scrape {job.link[:60]}: {result['error'][:60]}")
+            continue
+        entry.text = result["text"]
+        # Every symbol that shares the article goes to the analyze stage together
+        for member in [job, *entry.waiting]:
+            member.text = entry.text
+            await out.put(member)
+        entry.waiting.clear()
+
+
+def _analysis_failed(job: ArticleJob, stats: PipelineStats, started: float, error: Exception):
+    """Count a job that raised as failed; the worker moves on to the next one."""
+    job.analysis = None
+    stats.record("analyze", time.monotonic() - started, ok=False)
+    print(f"      ❌ Failed to analyze {(job.title or '')[:50]}: {str(error)[:80]}")
+
+
+def _release(job: ArticleJob):
+    """Hand the job's analysis (or {} on failure) to near-duplicates waiting on it."""
+    if job.analyzed is not None and not job.analyzed.done():
+        job.analyzed.set_result(job.analysis or {})
+
+
+async def _analyze_worker(dups: _Duplicates, jobs: asyncio.Queue, out: asyncio.Queue, stats: PipelineStats):
+    while True:
+        job = await jobs.get()
+        if job is _DONE:
+            return
+        started = time.monotonic()
+        try:
+            if await _reuse_duplicate(dups, job, stats):
+                stats.record("analyze", time.monotonic() - started)
+                await out.put(job)
+                continue
+
+            dups.register(job)
+            job.analysis = await analyze_single_article_async(job.symbol, job.context, job.title, job.text)
+            # No analysis (LLM failed after retries): do not store it, so the next run retries the article
+            stats.record("analyze", time.monotonic() - started, ok=bool(job.analysis))
+            if job.analysis:
+                await out.put(job)
+            else:
+                print(f"      ❌ Failed to analyze {(job.title or '')[:50]}")
+        except Exception as e:
+            _analysis_failed(job, stats, started, e)
+        finally:
+            # After out.put, so the original is stored before its duplicates
+            _release(job)
+
+
+def _take_batch(pending: List[ArticleJob], limit: int) -> List[ArticleJob]:
+    """Pop up to `limit` jobs of the first pending job's symbol."""
+    symbol = pending[0].symbol
+    batch = [job for job in pending if job.symbol == symbol][:limit]
+    for job in batch:
+        pending.remove(job)
+    return batch
+
+
+async def _analyze_batch_worker(dups: _Duplicates, jobs: asyncio.Queue, out: asyncio.Queue, stats: PipelineStats):
+    """Batch mode: analyze whatever is queued for one symbol in one LLM request."""
+    limit = max(1, settings.analysis_batch_max_articles)
+    pending: List[ArticleJob] = []
+    done = False
+    while pending or not done:
+        if not pending:
+            job = await jobs.get()
+            if job is _DONE:
+                return
+            pending.append(job)
+        # Take everything already scraped without waiting for more
+        while not done and len(pending) < limit * 2:
+            try:
+                job = jobs.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if job is _DONE:
+                done = True
+            else:
+                pending.append(job)
+
+        batch = []
+        for job in _take_batch(pending, limit):
+            started = time.monotonic()
+            try:
+                if await _reuse_duplicate(dups, job, stats):
+                    stats.record("analyze", time.monotonic() - started)
+                    await out.put(job)
+                else:
+                    batch.append(job)
+            except Exception as e:
+                _analysis_failed(job, stats, started, e)
+        if not batch:
+            continue
+        # Registered only after every lookup above, so this worker never waits on its own jobs
+        for job in batch:
+            dups.register(job)
+
+        started = time.monotonic()
+        try:
+            analyses = await _in_thread(
+                analyze_articles_batch, batch[0].symbol, batch[0].context,
+                [(job.title, job.text) for job in batch],
+            )
+        except Exception as e:
+            analyses = [{}] * len(batch)
+            print(f"      ❌ Failed to analyze batch for {batch[0].symbol}: {str(e)[:50]}")
+        per_item = (time.monotonic() - started) / len(batch)
+        try:
+            for job, analysis in zip(batch, analyses):
+                stats.record("analyze", per_item, ok=bool(analysis))
+                if analysis:
+                    job.analysis = analysis
+                    await out.put(job)
+        except Exception as e:
+            print(f"      ❌ Failed to hand off batch for {batch[0].symbol}: {str(e)[:50]}")
+        finally:
+            for job in batch:
+                _release(job)
+
+
+def _article_id(db: Session, job: ArticleJob, article_ids: Dict[str, int]) -> Optional[int]:
+    """Id of the shared Article row for the job's URL, creating it on first use."""
+    if job.article_id or not job.url:
+        return job.article_id
+    if job.url not in article_ids:
+        article = db.query(Article).filter(Article.url == job.url).first()
+        if article is None:
+            article = Article(
+                url=job.url,
+                title=job.title,
+                content=job.text,
+                content_hash=hashlib.sha256((job.text or "").encode("utf-8")).hexdigest(),
+            )
+            db.add(article)
+            db.flush()
+        article_ids[job.url] = article.id
+    return article_ids[job.url]
+
+
+async def _store_worker(db: Session, jobs: asyncio.Queue, stats: PipelineStats):
+    article_ids: Dict[str, int] = {}
+    while True:
+        job = await jobs.get()
+        if job is _DONE:
+            return
+        started = time.monotonic()
+        try:
+            row = build_analyzed_article(job.symbol, job.news, job.analysis)
+            row.simhash = job.simhash
+            row.duplicate_of = job.duplicate_of or (job.source_job.row_id if job.source_job else None)
+            row.article_id = _article_id(db, job, article_ids)
+            db.add(row)
+            db.commit()
+            job.row_id = row.id
+            stats.new_article_ids.append(row.id)
+            stats.record("store", time.monotonic() - started)
+            log_analysis(job.title, job.analysis)
+        except Exception as e:
+            db.rollback()
+            article_ids.pop(job.url, None)
+            stats.record("store", time.monotonic() - started, ok=False)
+            print(f"      ❌ Failed to store {(job.title or '')[:50]}: {e}")
+
+
+async def _drain(workers: List[asyncio.Task], downstream: Optional[asyncio.Queue], downstream_workers: int):
+    """Wait for a stage to finish, then tell every worker of the next stage to stop."""
+    await asyncio.gather(*workers)
+    if downstream is not None:
+        for _ in range(downstream_workers):
+            await downstream.put(_DONE)
+
+
+def _advance_watermarks(db: Session, feeds: Dict[str, Tuple[List[Dict[str, Any]], List[ArticleJob]]]):
+    """Move each symbol's watermarks past its feed, unless an article failed (so the next run retries it)."""
+    for symbol, (items, jobs) in feeds.items():
+        if any(job.link and job.row_id is None for job in jobs):
+            print(f"   {symbol}: Watermark kept, some articles were not stored")
+            continue
+        try:
+            news_watermarks.advance(db, symbol, items)
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Failed to update news watermark for {symbol}: {e}")
+
+
+async def run_pipeline(db: Session, symbols: List[str]) -> Dict[str, Any]:
+    """
+    Fetch, scrape, analyze and store new articles for `symbols`.
+
+    Returns:
+        Per-stage counts and busy time, wall time, the symbols that had new
+        articles and the ids of the stored rows (signals/weekly summaries are
+        run for those by the caller)
+    """
+    fetch_n = max(1, settings.pipeline_fetch_workers)
+    scrape_n = max(1, settings.pipeline_scrape_workers)
+    analyze_n = max(1, settings.pipeline_analyze_workers)
+    size = settings.pipeline_queue_size
+
+    stats = PipelineStats()
+    dups = _Duplicates(db, symbols)
+    shared: Dict[str, _SharedArticle] = {}
+    # symbol -> (fetched items, jobs); watermarks move once every job is stored
+    feeds: Dict[str, Tuple[List[Dict[str, Any]], List[ArticleJob]]] = {}
+    symbol_q: asyncio.Queue = asyncio.Queue()
+    scrape_q: asyncio.Queue = asyncio.Queue(maxsize=size)
+    analyze_q: asyncio.Queue = asyncio.Queue(maxsize=size)
+    store_q: asyncio.Queue = asyncio.Queue(maxsize=size)
+
+    for symbol in symbols:
+        symbol_q.put_nowait(symbol)
+    for _ in range(fetch_n):
+        symbol_q.put_nowait(_DONE)
+
+    fetchers = [asyncio.create_task(_fetch_worker(db, symbol_q, scrape_q, stats, feeds)) for _ in range(fetch_n)]
+    scrapers = [asyncio.create_task(_scrape_worker(shared, scrape_q, analyze_q, stats)) for _ in range(scrape_n)]
+    analyze = _analyze_batch_worker if settings.analysis_batch_enabled else _analyze_worker
+    analyzers = [asyncio.create_task(analyze(dups, analyze_q, store_q, stats)) for _ in range(analyze_n)]
+    writer = asyncio.create_task(_store_worker(db, store_q, stats))
+
+    await _drain(fetchers, scrape_q, scrape_n)
+    await _drain(scrapers, analyze_q, analyze_n)
+    await _drain(analyzers, store_q, 1)
+    await writer
+    if settings.news_watermarks_enabled:
+        _advance_watermarks(db, feeds)
+
+    summary = stats.summary()
+    stages = summary["stages"]
+    print(
+        f"⏱️  Pipeline: {len(symbols)} symbols in {summary['wall_seconds']}s — "
+        + ", ".join(f"{name} {s['items']} ok/{s['failed']} failed" for name, s in stages.items())
+        + f", {stats.llm_calls_avoided} LLM calls avoided (near-duplicates)"
+        + f", {stats.scrapes_shared} scrapes shared across symbols"
+        + f", {stats.items_skipped} items skipped by watermarks ({stats.symbols_unchanged} feeds unchanged)"
+    )
+    return summary
@@ -1,11 +1,12 @@
 """
 Database Migration Script
-Creates new tables and adds initial watchlist stocks
+Creates new tables, adds new columns to existing ones and adds initial watchlist stocks
 """
 
 from app.db.base import Base
 from app.db.session import engine
 from app.db.models import Watchlist
+from app.db.schema import add_missing_columns, backfill_hashes
 from sqlalchemy.orm import Session
 
 def create_tables():
@@ -14,6 +15,13 @@ def create_tables():
     Base.metadata.create_all(bind=engine)
     print("✓ Tables created successfully")
 
+def upgrade_tables():
+    """Add model columns missing from existing tables and backfill derived columns"""
+    print("\nUpgrading existing tables...")
+    add_missing_columns(engine)
+    backfill_hashes(engine)
+    print("✓ Tables up to date")
+
 def add_default_watchlist():
     """Add default stocks to watchlist"""
     print("\nAdding default stocks to watchlist...")
@@ -41,6 +49,7 @@ if __name__ == "__main__":
     print("="*60)
     
     create_tables()
+    upgrade_tables()
     add_default_watchlist()
     
     print("\n" + "="*60)
@@ -0,0 +1,78 @@
+"""
+History Store Migration Script
+Copies every (symbol, interval) series from the stock_history table into the
+columnar Arrow store at Settings.history_store_path.
+
+Usage:
+    python migrate_history_store.py [--symbol HPG] [--interval 1D]
+
+Afterwards set history_backend=arrow in .env to serve history from the store.
+"""
+
+import argparse
+import time
+
+import pandas as pd
+from sqlalchemy import text
+
+from app.db.session import engine
+from app.db.history_store import get_history_store, OHLCV_COLUMNS
+
+
+def migrate(symbol: str = None, interval: str = None):
+    store = get_history_store()
+
+    where = []
+    params = {}
+    if symbol:
+        where.append("symbol = :symbol")
+        params["symbol"] = symbol.upper()
+    if interval:
+        where.append("interval = :interval")
+        params["interval"] = interval
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+
+    with engine.connect() as conn:
+        series = conn.execute(
+            text(f"SELECT DISTINCT symbol, interval FROM stock_history {clause}"), params
+        ).fetchall()
+
+        print(f"Migrating {len(series)} series to {store.root}...")
+        totals = {"inserted": 0, "updated": 0, "unchanged": 0}
+        started = time.perf_counter()
+
+        for sym, ivl in series:
+            df = pd.read_sql(
+                text(
+                    "SELECT time, open, high, low, close, volume FROM stock_history "
+                    "WHERE symbol = :symbol AND interval = :interval ORDER BY time"
+                ),
+                conn,
+                params={"symbol": sym, "interval": ivl},
+            )
+            columns = {"time": pd.to_datetime(df["time"]).dt.date.tolist()}
+            for col in OHLCV_COLUMNS:
+                columns[col] = df[col].tolist()
+
+            stats = store.upsert(sym, columns, ivl)
+            for key in totals:
+                totals[key] += stats[key]
+            print(f"  ✓ {sym} {ivl}: {len(df)} bars")
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"\n✓ Migrated {len(series)} series in {elapsed:.1f}s "
+        f"({totals['inserted']} inserted, {totals['updated']} updated, {totals['unchanged']} unchanged)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy stock_history into the columnar history store")
+    parser.add_argument("--symbol", help="Only migrate this symbol")
+    parser.add_argument("--interval", help="Only migrate this interval (e.g. 1D)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Stock Me 2 - History Store Migration")
+    print("=" * 60)
+    migrate(args.symbol, args.interval)
@@ -0,0 +1,77 @@
+"""
+Benchmark: single-article vs batched LLM analysis.
+
+Fetches recent news for a symbol, scrapes the articles (through the scrape
+cache), then analyzes the same articles once per article and once in batch
+mode with the analysis cache disabled. Reports requests, wall time and token
+cost per article for both modes, and how often the two modes agree on
+sentiment. Makes real Perplexity calls (needs PERPLEXITY_API_KEY).
+
+Usage:
+    python scripts/bench_analysis_batch.py --symbol HPG --articles 10
+    python scripts/bench_analysis_batch.py --symbol VNM --articles 20 --budget 12000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+server_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(server_dir))
+
+from app.services import news_service, scraper, stocks_service  # noqa: E402
+from app.services.analysis import analyze_articles_batch, analyze_single_article  # noqa: E402
+from app.services.analysis.article_analyzer import llm_usage  # noqa: E402
+
+
+def load_articles(symbol: str, limit: int):
+    news = news_service.get_company_news(symbol, limit=limit).get("data", [])
+    news = [n for n in news if n.get("link") or n.get("news_link")]
+    pages = scraper.scrape_articles_sync([n.get("link") or n.get("news_link") for n in news])["results"]
+    return [
+        (n.get("title") or n.get("news_title"), page["text"])
+        for n, page in zip(news, pages)
+        if not page["error"]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single and batched article analysis")
+    parser.add_argument("--symbol", default="HPG")
+    parser.add_argument("--articles", type=int, default=10)
+    parser.add_argument("--budget", type=int, default=None, help="Batch token budget override")
+    args = parser.parse_args()
+
+    articles = load_articles(args.symbol, args.articles)
+    if not articles:
+        print("No articles could be scraped")
+        return
+    context = stocks_service.get_market_context(args.symbol)
+    print(f"\n{len(articles)} articles for {args.symbol}\n")
+
+    llm_usage.reset()
+    started = time.perf_counter()
+    single = [analyze_single_article(args.symbol, context, title, text, use_cache=False) for title, text in articles]
+    single_wall = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = analyze_articles_batch(args.symbol, context, articles, use_cache=False, token_budget=args.budget)
+    batch_wall = time.perf_counter() - started
+
+    usage = llm_usage.get_stats()
+    print(f"{'mode':<8}{'requests':>10}{'wall s':>10}{'prompt tok':>12}{'compl tok':>12}{'tok/article':>13}")
+    for mode, wall in (("single", single_wall), ("batch", batch_wall)):
+        u = usage.get(mode, {})
+        print(
+            f"{mode:<8}{u.get('requests', 0):>10}{wall:>10.1f}{u.get('prompt_tokens', 0):>12}"
+            f"{u.get('completion_tokens', 0):>12}{u.get('tokens_per_article', 0):>13}"
+        )
+
+    agree = sum(1 for a, b in zip(single, batch) if a and b and a.get("sentiment") == b.get("sentiment"))
+    print(f"\nSentiment agreement: {agree}/{len(articles)}")
+    print(f"Throughput: single {len(articles) / single_wall:.2f} articles/s, batch {len(articles) / batch_wall:.2f} articles/s")
+
+
+if __name__ == "__main__":
+    main()
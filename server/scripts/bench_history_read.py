@@ -0,0 +1,108 @@
+"""
+Benchmark: get_history_from_db fast path vs the previous ORM implementation.
+
+Loads synthetic daily bars into a throwaway SQLite database and reports
+rows per second for both read paths over the same ranges.
+
+Usage:
+    python scripts/bench_history_read.py --years 5 --reads 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_tmp = Path(tempfile.mkdtemp(prefix="bench_history_read_"))
+os.environ["database_url"] = f"sqlite:///{_tmp / 'bench.db'}"
+os.environ["history_backend"] = "sql"
+
+server_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(server_dir))
+
+import app.db  # noqa: E402,F401  (creates tables)
+from app.db.session import SessionLocal  # noqa: E402
+from app.db.models import StockHistory  # noqa: E402
+from app.services import stocks_service  # noqa: E402
+
+
+def legacy_get_history_from_db(symbol: str, start_date: str, end_date: str, interval: str) -> pd.DataFrame:
+    """The ORM read path get_history_from_db used before the fast path."""
+    db = SessionLocal()
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+
+        results = db.query(StockHistory).filter(
+            StockHistory.symbol == symbol,
+            StockHistory.interval == interval,
+            StockHistory.time >= start,
+            StockHistory.time <= end
+        ).order_by(StockHistory.time).all()
+
+        if not results:
+            return pd.DataFrame()
+
+        data = []
+        for r in results:
+            data.append({
+                "time": r.time.strftime("%Y-%m-%d"),
+                "open": r.open,
+                "high": r.high,
+                "low": r.low,
+                "close": r.close,
+                "volume": r.volume,
+                "ticker": r.symbol
+            })
+
+        return pd.DataFrame(data)
+    finally:
+        db.close()
+
+
+def rows_per_second(read, symbol: str, start: str, end: str, reads: int) -> float:
+    rows = 0
+    started = time.perf_counter()
+    for _ in range(reads):
+        rows += len(read(symbol, start, end, "1D"))
+    return rows / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history read paths")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--reads", type=int, default=100)
+    args = parser.parse_args()
+
+    days = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=args.years * 250)
+    close = 20 + np.cumsum(np.random.default_rng(7).normal(0, 0.3, len(days)))
+    df = pd.DataFrame({
+        "time": days, "open": close, "high": close + 0.5, "low": close - 0.5,
+        "close": close, "volume": 1e6,
+    })
+    stocks_service.save_stock_history("HPG", df, "1D")
+
+    start, end = days[0].strftime("%Y-%m-%d"), days[-1].strftime("%Y-%m-%d")
+
+    # Both paths must return the same frame
+    pd.testing.assert_frame_equal(
+        legacy_get_history_from_db("HPG", start, end, "1D"),
+        stocks_service.get_history_from_db("HPG", start, end, "1D"),
+    )
+
+    legacy = rows_per_second(legacy_get_history_from_db, "HPG", start, end, args.reads)
+    fast = rows_per_second(stocks_service.get_history_from_db, "HPG", start, end, args.reads)
+
+    print(f"\n--- {len(days)} bars per read, {args.reads} reads ---")
+    print(f"  ORM path  : {legacy:>12,.0f} rows/s")
+    print(f"  fast path : {fast:>12,.0f} rows/s  ({fast / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: stock_history ORM table vs columnar Arrow store.
+
+Builds a synthetic market (symbols x years of daily bars) in a temporary
+directory, loads it into both backends, then compares random range-read
+latency and disk size.
+
+Usage:
+    python scripts/bench_history_store.py --symbols 200 --years 10 --reads 500
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Point the app at a throwaway database before importing it
+_tmp = Path(tempfile.mkdtemp(prefix="bench_history_"))
+os.environ["database_url"] = f"sqlite:///{_tmp / 'bench.db'}"
+os.environ["history_store_path"] = str(_tmp / "store")
+
+server_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(server_dir))
+
+import app.db  # noqa: E402,F401  (creates tables)
+from app.core.config import settings  # noqa: E402
+from app.db.history_store import get_history_store  # noqa: E402
+from app.services import stocks_service  # noqa: E402
+
+
+def synthetic_history(days: pd.DatetimeIndex, rng: np.random.Generator) -> pd.DataFrame:
+    close = 20 + np.cumsum(rng.normal(0, 0.3, len(days)))
+    return pd.DataFrame({
+        "time": days,
+        "open": close + rng.normal(0, 0.1, len(days)),
+        "high": close + 0.5,
+        "low": close - 0.5,
+        "close": close,
+        "volume": rng.integers(1e4, 1e7, len(days)).astype(float),
+    })
+
+
+def timed_reads(symbols, days, reads: int, span: int) -> float:
+    started = time.perf_counter()
+    for _ in range(reads):
+        sym = random.choice(symbols)
+        i = random.randrange(0, len(days) - span)
+        stocks_service.get_history_from_db(
+            sym, days[i].strftime("%Y-%m-%d"), days[i + span].strftime("%Y-%m-%d"), "1D"
+        )
+    return (time.perf_counter() - started) / reads * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history backends")
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--reads", type=int, default=300)
+    parser.add_argument("--span", type=int, default=250, help="Bars per range read")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    days = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=args.years * 250)
+    symbols = [f"S{i:04d}" for i in range(args.symbols)]
+
+    print(f"Loading {len(symbols)} symbols x {len(days)} bars into both backends...")
+    for sym in symbols:
+        df = synthetic_history(days, rng)
+        settings.history_backend = "sql"
+        stocks_service.save_stock_history(sym, df, "1D")
+        settings.history_backend = "arrow"
+        stocks_service.save_stock_history(sym, df, "1D")
+
+    results = {}
+    for backend in ("sql", "arrow"):
+        settings.history_backend = backend
+        results[backend] = timed_reads(symbols, days, args.reads, args.span)
+
+    sql_size = (_tmp / "bench.db").stat().st_size
+    arrow_size = get_history_store().disk_usage()
+
+    print("\n--- Results ---")
+    print(f"Range read ({args.span} bars), avg over {args.reads} reads:")
+    print(f"  sql   : {results['sql']:.2f} ms")
+    print(f"  arrow : {results['arrow']:.2f} ms  ({results['sql'] / results['arrow']:.1f}x)")
+    print("Disk size:")
+    print(f"  sql   : {sql_size / 1e6:.1f} MB")
+    print(f"  arrow : {arrow_size / 1e6:.1f} MB")
+    print(f"\nScratch data left in {_tmp}")
+
+
+if __name__ == "__main__":
+    main()
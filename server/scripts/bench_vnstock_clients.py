@@ -0,0 +1,71 @@
+"""
+Microbenchmark: fresh vnstock client objects per request vs the client registry.
+
+Measures the client setup cost paid by /stocks/quote (one Quote) and
+/stocks/stock-info (one Quote per symbol). With --live it also times real
+history calls, where the registry additionally reuses pooled connections.
+
+Usage:
+    python scripts/bench_vnstock_clients.py --requests 200
+    python scripts/bench_vnstock_clients.py --live --requests 5
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+server_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(server_dir))
+
+from vnstock import Quote  # noqa: E402
+
+from app.services import vnstock_clients  # noqa: E402
+
+SYMBOLS = ["HPG", "VNM", "FPT", "VCB", "MWG", "SSI", "TCB", "MSN", "VIC", "GAS"]
+
+
+def per_request_ms(build, requests: int, symbols) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        for sym in symbols:
+            build(sym)
+    return (time.perf_counter() - started) / requests * 1000
+
+
+def live_ms(build, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        build("HPG").history(interval="1D", start="2024-01-02", end="2024-01-31")
+    return (time.perf_counter() - started) / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vnstock client reuse")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--live", action="store_true", help="Also time real VCI history calls")
+    args = parser.parse_args()
+
+    def fresh(sym):
+        return Quote(source="VCI", symbol=sym)
+
+    pooled = vnstock_clients.quote
+    pooled("HPG")  # warm the registry like a running server
+
+    print(f"\n--- Client setup cost per request ({args.requests} requests) ---")
+    for label, symbols in (("/stocks/quote", SYMBOLS[:1]), ("/stocks/stock-info (10 symbols)", SYMBOLS)):
+        fresh_ms = per_request_ms(fresh, args.requests, symbols)
+        pooled_ms = per_request_ms(pooled, args.requests, symbols)
+        print(f"{label}:")
+        print(f"  fresh objects : {fresh_ms:8.3f} ms")
+        print(f"  registry      : {pooled_ms:8.3f} ms  (saves {fresh_ms - pooled_ms:.3f} ms)")
+
+    if args.live:
+        print("\n--- Live VCI history call (counts against the vnstock quota) ---")
+        print(f"  registry + pooled session : {live_ms(pooled, args.requests):8.1f} ms")
+
+    print(f"\nRegistry stats: {vnstock_clients.get_client_stats()}")
+
+
+if __name__ == "__main__":
+    main()
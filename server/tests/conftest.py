@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.workers import pipeline
+
+
+@pytest.fixture
+def db_engine():
+    """In-memory SQLite with every table, shared across threads (StaticPool)."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(db_engine):
+    return sessionmaker(bind=db_engine)
+
+
+@pytest.fixture
+def db_session(session_factory):
+    db = session_factory()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def stub_pipeline(monkeypatch):
+    """
+    Replace the pipeline's outside world: stub(news, scrape=None, analyze=None).
+
+    `news` is the feed every symbol gets (read on each fetch, so tests may
+    mutate it) or a callable symbol -> feed. Market context is "context",
+    scrapes return "text of <link>" and analyses are Neutral/3 unless
+    `scrape` / `analyze` replace them.
+    """
+
+    def stub(news, scrape=None, analyze=None):
+        async def fake_news(symbol, limit=20):
+            return {"data": list(news(symbol) if callable(news) else news)}
+
+        async def fake_upstream(fn, *args, **kwargs):
+            return "context"
+
+        async def fake_scrape(link):
+            return {"text": f"text of {link}", "error": None, "download_seconds": 0.0, "parse_seconds": 0.0}
+
+        async def fake_analyze(symbol, context, title, text, use_cache=True):
+            return {"sentiment": "Neutral", "score": 3}
+
+        monkeypatch.setattr(pipeline.news_service, "get_company_news_async", fake_news)
+        monkeypatch.setattr(pipeline.upstream, "call", fake_upstream)
+        monkeypatch.setattr(pipeline.scraper, "scrape_article", scrape or fake_scrape)
+        monkeypatch.setattr(pipeline, "analyze_single_article_async", analyze or fake_analyze)
+
+    return stub
@@ -0,0 +1,65 @@
+from app.services.analysis.article_analyzer import ArticleAnalysisCache
+from app.workers import pipeline
+
+
+def test_lru_byte_budget_and_persistent_tier(session_factory):
+    cache = ArticleAnalysisCache(max_bytes=120, session_factory=session_factory)
+    for i in range(5):
+        cache.set("HPG", f"title {i}", f"body {i}", {"tldr": "x" * 30, "score": i})
+
+    stats = cache.get_stats()
+    assert stats["memory_bytes"] <= 120 and stats["evictions"] > 0
+    # Same title with different content is a different entry
+    assert cache.get("HPG", "title 4", "edited body") is None
+
+    # A fresh process only has the store tier, and promotes hits into memory
+    restarted = ArticleAnalysisCache(max_bytes=120, session_factory=session_factory)
+    assert restarted.get("HPG", "title 0", "body 0")["score"] == 0
+    assert restarted.get("HPG", "title 0", "body 0")["score"] == 0
+    assert restarted.get_stats()["store_hits"] == 1 and restarted.get_stats()["memory_hits"] == 1
+
+
+def test_warm_up_from_analyzed_articles(session_factory, db_session):
+    db = db_session
+    for title in ("a", "b"):
+        news = {"title": title, "link": f"https://cafef.vn/{title}", "published": "2026-01-05T09:00:00"}
+        db.add(pipeline.build_analyzed_article("VNM", news, {"sentiment": "Bullish", "score": 7}))
+    db.commit()
+
+    cache = ArticleAnalysisCache(max_bytes=10**6, session_factory=session_factory)
+    texts = {"https://cafef.vn/a": "text of a"}
+    counts = cache.warm_up(db, texts.get)
+
+    assert counts == {"rows": 2, "warmed": 1, "no_text": 1}
+    assert cache.get("VNM", "a", "text of a")["sentiment"] == "Bullish"
+    # Warming twice does not duplicate store rows
+    assert cache.warm_up(db, texts.get)["warmed"] == 1
+
+
+def test_warm_up_with_syndicated_copies_of_one_article(session_factory, db_session):
+    db = db_session
+    for n, link in enumerate(("https://cafef.vn/a", "https://vietstock.vn/a")):
+        news = {"title": "a", "link": link, "published": f"2026-01-0{n + 5}T09:00:00"}
+        db.add(pipeline.build_analyzed_article("VNM", news, {"sentiment": "Bullish", "score": 5 + n}))
+    db.commit()
+
+    cache = ArticleAnalysisCache(max_bytes=10**6, session_factory=session_factory)
+    texts = {"https://cafef.vn/a": "same text", "https://vietstock.vn/a": "same text"}
+    assert cache.warm_up(db, texts.get) == {"rows": 2, "warmed": 1, "no_text": 0}
+    assert cache.get("VNM", "a", "same text")["score"] == 6
+
+
+def test_warm_up_reads_stored_article_text_first(session_factory, db_session):
+    db = db_session
+    article = pipeline.Article(url="https://cafef.vn/a", title="a", content="stored text", content_hash="h")
+    db.add(article)
+    db.flush()
+    row = pipeline.build_analyzed_article("VNM", {"title": "a", "link": "https://cafef.vn/a"}, {"score": 6})
+    row.article_id = article.id
+    db.add(row)
+    db.commit()
+
+    cache = ArticleAnalysisCache(max_bytes=10**6, session_factory=session_factory)
+    # The scrape cache entry has expired: the articles table still has the text
+    assert cache.warm_up(db, lambda link: None)["warmed"] == 1
+    assert cache.get("VNM", "a", "stored text")["score"] == 6
@@ -0,0 +1,78 @@
+import json
+from types import SimpleNamespace
+
+from app.services.analysis import batch_analyzer
+
+
+def _analysis(index, score):
+    return {
+        "index": index, "is_relevant": True, "relevance_reason": "r", "sentiment": "Bullish",
+        "tldr": "t", "rationale": "r", "key_drivers": ["d"], "risks_or_caveats": [],
+        "score": score, "confidence": 0.8,
+    }
+
+
+class _FakeCompletions:
+    def __init__(self):
+        self.requests = []
+
+    def create(self, messages, **kwargs):
+        prompt = messages[1]["content"]
+        count = prompt.count("- Title:")
+        self.requests.append(count)
+        # First answer drops the last article, later answers are complete
+        keep = count - 1 if len(self.requests) == 1 else count
+        content = json.dumps({"results": [_analysis(i, 5 + i) for i in range(keep)]})
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=100 * count, completion_tokens=50 * count),
+        )
+
+
+def test_batch_retries_only_missing_items(monkeypatch):
+    fake = _FakeCompletions()
+    monkeypatch.setattr(batch_analyzer, "llm_gateway", SimpleNamespace(complete=fake.create))
+    batch_analyzer.llm_usage.reset()
+
+    articles = [(f"title {i}", f"body {i}") for i in range(3)]
+    results = batch_analyzer.analyze_articles_batch("HPG", "ctx", articles, use_cache=False, token_budget=10**6)
+
+    assert fake.requests == [3, 1]
+    assert [r["score"] for r in results] == [5, 6, 5]
+    assert "index" not in results[0]
+    usage = batch_analyzer.llm_usage.get_stats()["batch"]
+    assert usage["requests"] == 2 and usage["articles"] == 4
+
+
+def test_plan_batches_respects_token_budget():
+    articles = [("t", "x" * 1500)] * 5
+    cost = batch_analyzer.estimate_tokens(*articles[0])
+    batches = batch_analyzer.plan_batches(articles, list(range(5)), token_budget=cost * 2, max_articles=8)
+    assert batches == [[0, 1], [2, 3], [4]]
+    assert batch_analyzer.plan_batches(articles, [0, 1, 2], token_budget=1, max_articles=8) == [[0], [1], [2]]
+
+
+def test_failed_batch_request_is_not_repeated_per_article(monkeypatch):
+    requests = []
+
+    def failing(**kwargs):
+        requests.append(kwargs)
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(batch_analyzer, "llm_gateway", SimpleNamespace(complete=failing))
+    monkeypatch.setattr(batch_analyzer, "analyze_single_article", lambda *a: requests.append("single") or {})
+
+    articles = [(f"title {i}", f"body {i}") for i in range(3)]
+    results = batch_analyzer.analyze_articles_batch("HPG", "ctx", articles, use_cache=False, token_budget=10**6)
+
+    assert results == [{}, {}, {}]
+    assert len(requests) == 1
+
+
+def test_plan_batches_counts_the_shared_prompt():
+    articles = [("t", "x" * 1500)] * 4
+    cost = batch_analyzer.estimate_tokens(*articles[0])
+    fixed = batch_analyzer.prompt_tokens("HPG", "ctx")
+    assert fixed > 0
+    batches = batch_analyzer.plan_batches(articles, list(range(4)), token_budget=fixed + cost * 2, max_articles=8, fixed_tokens=fixed)
+    assert batches == [[0, 1], [2, 3]]
@@ -0,0 +1,84 @@
+import asyncio
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+
+from app.db.schema import add_missing_columns
+from app.services.analysis.dedup import SimHashIndex, hamming, simhash
+from app.workers import pipeline
+
+_STORY = (
+    "Tập đoàn Hòa Phát vừa công bố kết quả kinh doanh quý III với doanh thu thuần đạt 35.000 tỷ đồng, "
+    "tăng 12% so với cùng kỳ năm trước. Lợi nhuận sau thuế đạt 3.000 tỷ đồng nhờ giá thép phục hồi, "
+    "sản lượng bán hàng thép xây dựng và HRC đều tăng mạnh, trong khi chi phí nguyên liệu đầu vào giảm. "
+    "Ban lãnh đạo cho biết dự án Dung Quất 2 sẽ vận hành lò cao số 1 trong quý tới, nâng công suất thép "
+    "thô thêm 2,8 triệu tấn mỗi năm và giúp doanh nghiệp chủ động nguồn cung HRC cho thị trường nội địa."
+)
+
+# Full-length article body (SimHash is noisy on very short texts)
+_ARTICLE = " ".join(f"Phần {i}. {_STORY}" for i in range(6))
+
+
+def test_syndicated_copy_is_near_duplicate():
+    original = simhash("Hòa Phát lãi 3.000 tỷ quý III", _STORY)
+    # Another outlet: no diacritics in the title, a byline appended
+    copy = simhash("Hoa Phat lai 3.000 ty quy III", _STORY + " Theo Vietstock.")
+    other = simhash("Vinamilk chia cổ tức đợt 2", "Vinamilk thông báo chốt quyền trả cổ tức bằng tiền mặt tỷ lệ 15%.")
+
+    assert hamming(original, copy) <= 3
+    assert hamming(original, other) > 3
+
+    index = SimHashIndex(max_distance=3)
+    index.add(original, "hpg-1")
+    assert index.find(copy)[0] == "hpg-1"
+    assert index.find(other) is None
+
+
+def test_pipeline_reuses_analysis_of_near_duplicates(db_session, stub_pipeline):
+    db = db_session
+    outlets = ["cafef", "vietstock", "vnexpress"]
+
+    async def fake_scrape(link):
+        return {"text": _ARTICLE, "error": None, "download_seconds": 0.0, "parse_seconds": 0.0}
+
+    calls = []
+
+    async def fake_analyze(symbol, context, title, text, use_cache=True):
+        calls.append(title)
+        await asyncio.sleep(0.02)
+        return {"sentiment": "Bullish", "score": 8}
+
+    stub_pipeline(
+        lambda symbol: [{"title": f"HPG lãi lớn ({o})", "link": f"https://{o}.vn/hpg"} for o in outlets],
+        scrape=fake_scrape,
+        analyze=fake_analyze,
+    )
+
+    result = asyncio.run(pipeline.run_pipeline(db, ["HPG"]))
+
+    assert len(calls) == 1 and result["llm_calls_avoided"] == 2
+    rows = db.query(pipeline.AnalyzedArticle).order_by(pipeline.AnalyzedArticle.id).all()
+    original = [r for r in rows if r.duplicate_of is None]
+    assert len(rows) == 3 and len(original) == 1
+    assert all(r.duplicate_of == original[0].id and r.sentiment == "Bullish" for r in rows if r.duplicate_of)
+
+    # Next run: a fourth outlet matches the stored fingerprint
+    outlets[:] = ["tinnhanhchungkhoan"]
+    result = asyncio.run(pipeline.run_pipeline(db, ["HPG"]))
+    assert len(calls) == 1 and result["llm_calls_avoided"] == 1
+
+
+def test_add_missing_columns_upgrades_old_table():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE analyzed_articles (id INTEGER PRIMARY KEY, symbol VARCHAR NOT NULL, "
+            "title TEXT NOT NULL, link VARCHAR NOT NULL, published_at DATETIME NOT NULL, analyzed_at DATETIME NOT NULL)"
+        ))
+
+    added = add_missing_columns(engine)
+
+    columns = {c["name"] for c in inspect(engine).get_columns("analyzed_articles")}
+    assert {"simhash", "duplicate_of", "sentiment"} <= columns
+    assert "analyzed_articles.simhash" in added
+    assert add_missing_columns(engine) == []
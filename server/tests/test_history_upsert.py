@@ -0,0 +1,16 @@
+import pandas as pd
+
+from app.services import stocks_service
+
+
+def test_intraday_bars_are_not_collapsed_into_daily_rows(monkeypatch):
+    def fail():
+        raise AssertionError("intraday bars must not reach stock_history")
+
+    monkeypatch.setattr(stocks_service, "SessionLocal", fail)
+    df = pd.DataFrame({
+        "time": ["2024-03-11 09:15", "2024-03-11 09:30", "2024-03-11 09:45"],
+        "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "volume": 1,
+    })
+    stats = stocks_service.save_stock_history("HPG", df, "15m")
+    assert stats == {"inserted": 0, "updated": 0, "unchanged": 0}
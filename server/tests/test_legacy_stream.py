@@ -0,0 +1,36 @@
+import asyncio
+import json
+
+from app.services.analysis import legacy_api
+
+
+def test_stream_pairs_each_article_with_its_own_page(stub_pipeline, monkeypatch):
+    news = [
+        {"title": None, "link": "https://x.vn/1"},
+        {"title": "no link"},
+        {"title": "second", "link": "https://x.vn/2"},
+    ]
+
+    async def fake_scrape(urls):
+        return {"results": [{"text": f"page {url}", "error": None} for url in urls]}
+
+    async def fake_analyze(symbol, context, title, text):
+        return {"tldr": text}
+
+    async def fake_summary(symbol, articles):
+        return {}
+
+    # News and market context come from the same services the pipeline uses
+    stub_pipeline(news)
+    monkeypatch.setattr(legacy_api.scraper, "scrape_articles", fake_scrape)
+    monkeypatch.setattr(legacy_api, "analyze_single_article_async", fake_analyze)
+    monkeypatch.setattr(legacy_api, "summarize_market_news_async", fake_summary)
+
+    async def collect():
+        return [json.loads(e[len("data: "):]) async for e in legacy_api.analyze_stock_stream("HPG")]
+
+    analyzed = [e["data"]["article"] for e in asyncio.run(collect()) if e["type"] == "article_analyzed"]
+    assert [(a["link"], a["analysis"]["tldr"]) for a in analyzed] == [
+        ("https://x.vn/1", "page https://x.vn/1"),
+        ("https://x.vn/2", "page https://x.vn/2"),
+    ]
@@ -0,0 +1,107 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from perplexity import BadRequestError, RateLimitError
+
+from app.services.analysis.llm_gateway import LLMGateway, LLMTimeout
+
+
+def _error(cls, status):
+    response = httpx.Response(status, request=httpx.Request("POST", "https://api.perplexity.ai/chat/completions"))
+    return cls("boom", response=response, body=None)
+
+
+class _FakeClient:
+    """Stands in for Perplexity / AsyncPerplexity."""
+
+    def __init__(self, outcomes, is_async=False, delay=0.0):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        create = self._acreate if is_async else self._create
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+        self.delay = delay
+
+    def with_options(self, **kwargs):
+        return self
+
+    def _next(self):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def _create(self, **kwargs):
+        return self._next()
+
+    async def _acreate(self, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            return self._next()
+        finally:
+            self.active -= 1
+
+
+def test_retries_429_and_5xx_then_succeeds():
+    client = _FakeClient([_error(RateLimitError, 429), _error(RateLimitError, 429), "ok"])
+    gw = LLMGateway(max_retries=3, backoff_base=0.01, backoff_max=0.02, sync_client=lambda: client)
+
+    assert gw.complete(model="sonar") == "ok"
+    stats = gw.get_stats()
+    assert client.calls == 3 and stats["retries"] == 2 and stats["rate_limited"] == 2
+    assert stats["succeeded"] == 1 and stats["in_flight"] == 0
+
+
+def test_client_errors_are_not_retried_and_deadline_is_enforced():
+    client = _FakeClient([_error(BadRequestError, 400)])
+    gw = LLMGateway(max_retries=3, backoff_base=0.01, sync_client=lambda: client)
+    with pytest.raises(BadRequestError):
+        gw.complete(model="sonar")
+    assert client.calls == 1
+
+    slow = _FakeClient([_error(RateLimitError, 429)] * 5)
+    gw = LLMGateway(max_retries=5, backoff_base=5.0, backoff_max=5.0, sync_client=lambda: slow)
+    # Backoff would overrun the deadline: fail fast instead of sleeping
+    with pytest.raises(LLMTimeout):
+        gw.complete(model="sonar", deadline=0.5)
+
+
+def test_async_calls_share_the_concurrency_cap():
+    client = _FakeClient([], is_async=True, delay=0.05)
+    gw = LLMGateway(max_concurrency=2, async_client=lambda: client)
+
+    async def run():
+        return await asyncio.gather(*(gw.complete_async(model="sonar") for _ in range(6)))
+
+    assert asyncio.run(run()) == ["ok"] * 6
+    assert client.peak == 2
+    assert gw.get_stats()["p95_latency_ms"] >= 40
+
+
+def test_async_waiters_time_out_and_cancelled_waiters_release_their_slot():
+    client = _FakeClient([], is_async=True, delay=0.2)
+    gw = LLMGateway(max_concurrency=1, async_client=lambda: client)
+
+    async def run():
+        holder = asyncio.ensure_future(gw.complete_async(model="sonar"))
+        await asyncio.sleep(0.02)
+        with pytest.raises(LLMTimeout):
+            await gw.complete_async(model="sonar", deadline=0.05)
+        waiter = asyncio.ensure_future(gw.complete_async(model="sonar"))
+        await asyncio.sleep(0.02)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert await holder == "ok"
+        # The cancelled waiter's thread got the slot later and handed it back
+        return await gw.complete_async(model="sonar", deadline=1)
+
+    assert asyncio.run(run()) == "ok"
+    stats = gw.get_stats()
+    assert stats["waiting"] == 0 and stats["in_flight"] == 0 and stats["timeouts"] == 1
@@ -0,0 +1,57 @@
+import asyncio
+
+from app.db.models import AnalyzedArticle, NewsWatermark
+from app.services import news_watermarks
+from app.workers import pipeline
+
+
+def _item(n, source="vnstock"):
+    return {"title": f"t{n}", "link": f"https://x.vn/{n}", "published": f"2024-05-{n:02d}T09:00:00Z", "source": source}
+
+
+def test_split_compares_each_item_with_its_source_watermark(db_session):
+    db = db_session
+    news_watermarks.advance(db, "HPG", [_item(3), _item(2), _item(5, "google_news_rss")])
+    marks = news_watermarks.load(db, "HPG")
+
+    feed = [_item(6), _item(4), _item(3), _item(2), _item(7, "google_news_rss"), _item(1, "google_news_rss")]
+    fresh, skipped = news_watermarks.split_new(marks, feed)
+    assert [n["title"] for n in fresh] == ["t6", "t4", "t7"]
+    assert skipped == 3
+
+    # Order does not matter (the same-day DB cache is not sorted)
+    fresh, skipped = news_watermarks.split_new(marks, [_item(2), _item(3), _item(6), {"title": "x", "link": "https://x.vn/x"}])
+    assert [n["title"] for n in fresh] == ["t6", "x"] and skipped == 2
+
+    assert not news_watermarks.unchanged(marks, feed)
+    assert news_watermarks.unchanged(marks, [_item(3), _item(2), _item(5, "google_news_rss")])
+
+
+def test_pipeline_skips_unchanged_feeds_and_keeps_watermark_on_failure(db_session, stub_pipeline):
+    db = db_session
+    feed = [_item(2), _item(1)]
+    fail = {"t3"}
+    analyzed = []
+
+    async def fake_analyze(symbol, context, title, text, use_cache=True):
+        analyzed.append(title)
+        return {} if title in fail else {"sentiment": "Neutral", "score": 3}
+
+    stub_pipeline(feed, analyze=fake_analyze)
+
+    asyncio.run(pipeline.run_pipeline(db, ["HPG"]))
+    assert db.query(NewsWatermark).one().feed_hash is not None
+
+    result = asyncio.run(pipeline.run_pipeline(db, ["HPG"]))
+    assert result["symbols_unchanged"] == 1 and result["items_skipped"] == 2
+
+    # t3 fails: the watermark stays, so the next run sees t3 again
+    feed.insert(0, _item(3))
+    result = asyncio.run(pipeline.run_pipeline(db, ["HPG"]))
+    assert result["items_skipped"] == 2
+    fail.clear()
+    result = asyncio.run(pipeline.run_pipeline(db, ["HPG"]))
+    assert result["items_skipped"] == 2 and result["stages"]["store"]["items"] == 1
+    assert analyzed == ["t2", "t1", "t3", "t3"]
+    assert db.query(AnalyzedArticle).count() == 3
+    assert news_watermarks.unchanged(news_watermarks.load(db, "HPG"), feed)
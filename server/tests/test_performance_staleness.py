@@ -0,0 +1,49 @@
+import asyncio
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.services import stocks_service
+from app.utils import trading_calendar
+
+
+def test_short_history_is_fetched_in_full_once(monkeypatch):
+    latest = trading_calendar.latest_closed_session()
+    start = latest - timedelta(days=400)
+    index = pd.DatetimeIndex([pd.Timestamp(latest - timedelta(days=30)), pd.Timestamp(latest)])
+    matrix = pd.DataFrame({"OLD": [np.nan, 1.0], "NEW": [np.nan, 1.0]}, index=index)
+    monkeypatch.setattr(stocks_service, "_listing_starts", OrderedDict(OLD=date(2000, 1, 1)))
+
+    assert stocks_service._stale_symbols(matrix, start) == ["NEW"]
+    stocks_service._record_listing_start("NEW", start)
+    assert stocks_service._stale_symbols(matrix, start) == []
+    # Behind the latest session is stale regardless
+    assert stocks_service._stale_symbols(matrix.iloc[:1].fillna(1.0), start) == ["OLD", "NEW"]
+
+
+def test_listing_starts_are_bounded(monkeypatch):
+    monkeypatch.setattr(stocks_service, "_listing_starts", OrderedDict())
+    monkeypatch.setattr(stocks_service, "_LISTING_STARTS_MAX", 2)
+    for sym in ("A", "B", "A", "C"):
+        stocks_service._record_listing_start(sym, date(2024, 1, 1))
+    assert list(stocks_service._listing_starts) == ["A", "C"]
+    assert stocks_service._listing_start("B") == date.max
+
+
+def test_single_symbol_performance_is_coalesced_once(monkeypatch):
+    calls = []
+
+    async def fake_call(fn, *args, **kwargs):
+        calls.append(fn)
+        return fn(*args, **kwargs)
+
+    monkeypatch.setattr(stocks_service.upstream, "call", fake_call)
+    monkeypatch.setattr(stocks_service, "get_close_matrix", lambda symbols, start, end: pd.DataFrame(columns=symbols))
+    monkeypatch.setattr(stocks_service, "_stale_symbols", lambda matrix, start: [])
+
+    result = asyncio.run(stocks_service.get_stock_performance_async("hpg"))
+    assert result["1W"] == "N/A"
+    # The gateway ran the undecorated batch function, not another coalesced wrapper
+    assert calls == [stocks_service.get_stocks_performance.__wrapped__]
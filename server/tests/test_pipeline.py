@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import pytest
+
+from app.db.models import AnalyzedArticle
+from app.workers import pipeline
+
+
+def test_pipeline_overlaps_stages_and_skips_known_articles(db_session, stub_pipeline):
+    db = db_session
+    db.add(pipeline.build_analyzed_article("HPG", {"title": "old", "link": "l0"}, {}))
+    db.commit()
+
+    active = {"n": 0, "peak": 0}
+
+    async def slow_scrape(link):
+        active["n"] += 1
+        active["peak"] = max(active["peak"], active["n"])
+        await asyncio.sleep(0.05)
+        active["n"] -= 1
+        return {"text": f"text of {link}", "error": None, "download_seconds": 0.05, "parse_seconds": 0.0}
+
+    stub_pipeline(
+        lambda symbol: [{"title": t, "link": f"https://x/{symbol}/{t}"} for t in ("old", "a", "b", "c")],
+        scrape=slow_scrape,
+    )
+
+    start = time.monotonic()
+    result = asyncio.run(pipeline.run_pipeline(db, ["HPG", "VNM"]))
+    elapsed = time.monotonic() - start
+
+    assert sorted(result["symbols_with_new"]) == ["HPG", "VNM"]
+    # "old" is already analyzed for HPG only: 3 new for HPG, 4 for VNM
+    assert result["stages"]["store"]["items"] == 7
+    assert db.query(AnalyzedArticle).count() == 8
+    assert active["peak"] > 1
+    assert elapsed < 6 * 0.05
+
+
+def test_batch_mode_groups_articles_by_symbol(db_session, stub_pipeline, monkeypatch):
+    batches = []
+
+    def fake_batch(symbol, context, articles):
+        batches.append((symbol, len(articles)))
+        return [{"sentiment": "Neutral", "score": 3} for _ in articles]
+
+    monkeypatch.setattr(pipeline.settings, "analysis_batch_enabled", True)
+    monkeypatch.setattr(pipeline, "analyze_articles_batch", fake_batch)
+    stub_pipeline(lambda symbol: [{"title": t, "link": f"https://x/{symbol}/{t}"} for t in ("a", "b", "c")])
+
+    result = asyncio.run(pipeline.run_pipeline(db_session, ["HPG", "VNM"]))
+
+    assert result["stages"]["store"]["items"] == 6
+    assert sum(n for _, n in batches) == 6
+    # Each request carries a single symbol's articles
+    assert {symbol for symbol, _ in batches} == {"HPG", "VNM"}
+
+
+def test_shared_article_is_scraped_once_and_analyzed_per_symbol(db_session, stub_pipeline):
+    db = db_session
+    sector = "https://cafef.vn/gia-thep-hoi-phuc.chn?utm_source=zalo"
+    feeds = {
+        "HPG": [("Giá thép hồi phục", sector), ("HPG riêng", "https://x/hpg")],
+        "HSG": [("Giá thép hồi phục", "https://www.cafef.vn/gia-thep-hoi-phuc.chn"), ("HSG riêng", "https://x/hsg")],
+        "NKG": [("Giá thép hồi phục", sector)],
+    }
+    scraped = []
+    analyzed = []
+
+    async def fake_scrape(link):
+        scraped.append(link)
+        await asyncio.sleep(0.05)
+        return {"text": f"text of {link}", "error": None, "download_seconds": 0.05, "parse_seconds": 0.0}
+
+    async def fake_analyze(symbol, context, title, text, use_cache=True):
+        analyzed.append((symbol, title))
+        return {"sentiment": "Bullish", "score": 6}
+
+    stub_pipeline(
+        lambda symbol: [{"title": t, "link": link} for t, link in feeds[symbol]],
+        scrape=fake_scrape,
+        analyze=fake_analyze,
+    )
+
+    result = asyncio.run(pipeline.run_pipeline(db, ["HPG", "HSG"]))
+
+    # Same canonical URL (tracking params, www) is downloaded once for both symbols
+    assert len(scraped) == 3 and result["scrapes_shared"] == 1
+    shared_jobs = [i for i, (_, title) in enumerate(analyzed) if title == "Giá thép hồi phục"]
+    assert len(shared_jobs) == 2 and shared_jobs[1] - shared_jobs[0] == 1
+    rows = db.query(AnalyzedArticle).filter(AnalyzedArticle.title == "Giá thép hồi phục").all()
+    assert {r.symbol for r in rows} == {"HPG", "HSG"}
+    assert rows[0].article_id == rows[1].article_id is not None
+    assert db.query(pipeline.Article).count() == 3
+
+    # A later run for another symbol reads the content from the article store
+    result = asyncio.run(pipeline.run_pipeline(db, ["NKG"]))
+    assert len(scraped) == 3 and result["scrapes_shared"] == 1
+    nkg = db.query(AnalyzedArticle).filter(AnalyzedArticle.symbol == "NKG").one()
+    assert nkg.article_id == rows[0].article_id
+
+
+@pytest.mark.parametrize("batch_mode", [False, True])
+def test_analyzer_errors_fail_one_article_not_the_run(batch_mode, db_session, stub_pipeline, monkeypatch):
+    real_reuse = pipeline._reuse_duplicate
+
+    async def fake_analyze(symbol, context, title, text, use_cache=True):
+        if title == "boom":
+            raise RuntimeError("analyzer crashed")
+        return {"sentiment": "Neutral", "score": 3}
+
+    async def flaky_reuse(dups, job, stats):
+        if batch_mode and job.title == "boom":
+            raise RuntimeError("duplicate lookup crashed")
+        return await real_reuse(dups, job, stats)
+
+    monkeypatch.setattr(pipeline.settings, "analysis_batch_enabled", batch_mode)
+    monkeypatch.setattr(pipeline, "analyze_articles_batch", lambda s, c, articles: [{"score": 3}] * len(articles))
+    monkeypatch.setattr(pipeline, "_reuse_duplicate", flaky_reuse)
+    stub_pipeline(
+        lambda symbol: [{"title": t, "link": f"https://x/{symbol}/{t}"} for t in ("a", "boom", "c")],
+        analyze=fake_analyze,
+    )
+
+    result = asyncio.run(pipeline.run_pipeline(db_session, ["HPG", "VNM"]))
+
+    assert result["stages"]["analyze"]["failed"] == 2
+    assert result["stages"]["store"]["items"] == 4
+    assert db_session.query(AnalyzedArticle).filter(AnalyzedArticle.title == "boom").count() == 0
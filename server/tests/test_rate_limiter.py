@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+from app.utils.rate_limiter import (
+    RateLimitTimeout,
+    SQLiteBackend,
+    TokenBucketLimiter,
+    current_priority,
+    priority,
+)
+
+
+def test_burst_then_even_spacing():
+    limiter = TokenBucketLimiter(max_requests=100, time_window=1, burst=2)
+    waits = [limiter._reserve(None) for _ in range(4)]
+    assert waits[0] == 0 and waits[1] == 0
+    # Later slots are spaced by 1 / rate = 10ms
+    assert 0.005 < waits[2] < 0.015
+    assert 0.015 < waits[3] < 0.025
+
+
+def test_hard_window_cap_and_max_wait():
+    limiter = TokenBucketLimiter(max_requests=3, time_window=60, burst=3)
+    for _ in range(3):
+        limiter.acquire_sync()
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire_sync(max_wait=1)
+    stats = limiter.get_stats()
+    assert stats["requests_in_window"] == 3 and stats["remaining"] == 0
+    assert stats["rejected"] == 1
+    limiter.reset()
+    assert limiter.get_stats()["remaining"] == 3
+
+
+def test_async_acquire_does_not_block_loop():
+    limiter = TokenBucketLimiter(max_requests=20, time_window=1, burst=1)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        task = asyncio.ensure_future(ticker())
+        start = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire()
+        elapsed = time.monotonic() - start
+        task.cancel()
+        return elapsed, ticks
+
+    elapsed, ticks = asyncio.run(scenario())
+    assert elapsed >= 0.09
+    assert ticks > 5
+
+
+def test_sqlite_backend_shares_budget_between_instances(tmp_path):
+    path = str(tmp_path / "rate_limit.sqlite")
+    # Two limiters on one file stand in for two uvicorn worker processes
+    a = TokenBucketLimiter(max_requests=3, time_window=60, burst=3, backend=SQLiteBackend(path))
+    b = TokenBucketLimiter(max_requests=3, time_window=60, burst=3, backend=SQLiteBackend(path))
+    a.acquire_sync()
+    b.acquire_sync()
+    a.acquire_sync()
+    with pytest.raises(RateLimitTimeout):
+        b.acquire_sync(max_wait=1)
+
+    stats = b.get_stats()
+    assert stats["backend"] == "sqlite"
+    assert stats["requests_in_window"] == 3 and stats["remaining"] == 0
+    assert stats["granted"] == 3 and stats["rejected"] == 1
+    assert a.get_stats() == stats
+
+
+def test_background_defers_to_interactive_headroom():
+    limiter = TokenBucketLimiter(max_requests=4, time_window=60, burst=4, interactive_reserve=1)
+    limiter.acquire_sync(priority="interactive")
+    # Ceiling for background: 4 - 1 reserved - 1 recent interactive = 2 requests in window
+    limiter.acquire_sync(priority="background")
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire_sync(max_wait=0.1, priority="background")
+
+    with priority("interactive"):
+        limiter.acquire_sync(max_wait=0.1)
+
+    classes = limiter.get_stats()["classes"]
+    assert classes["interactive"]["requests_in_window"] == 2
+    assert classes["background"]["granted"] == 1
+    assert classes["background"]["rejected"] == 1
+
+
+def test_priority_context_is_used_by_default():
+    limiter = TokenBucketLimiter(max_requests=2, time_window=60, burst=2, interactive_reserve=1)
+    with priority("prefetch"):
+        assert current_priority() == "prefetch"
+        limiter.acquire_sync()
+        with pytest.raises(RateLimitTimeout):
+            limiter.acquire_sync(max_wait=0.1)
+    assert current_priority() == "interactive"
+    assert limiter.get_stats()["classes"]["prefetch"]["granted"] == 1
@@ -0,0 +1,32 @@
+import pandas as pd
+
+from app.services import stocks_service
+
+
+def test_days_upstream_has_no_bar_for_are_not_refetched(monkeypatch):
+    # 2024-03-11..15: upstream has every session but the 13th (suspension)
+    bars = ["2024-03-11", "2024-03-12", "2024-03-14", "2024-03-15"]
+    calls = []
+
+    class FakeQuote:
+        def history(self, interval, start, end):
+            calls.append((start, end))
+            days = [d for d in bars if start <= d <= end]
+            return pd.DataFrame({"time": days, "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "volume": 1})
+
+    stored = set()
+    monkeypatch.setattr(stocks_service, "_empty_days", {})
+    monkeypatch.setattr(stocks_service.vnstock_clients, "quote", lambda symbol: FakeQuote())
+    monkeypatch.setattr(stocks_service, "get_stored_days", lambda *a: set(stored))
+    monkeypatch.setattr(stocks_service, "get_history_from_db", lambda *a: pd.DataFrame())
+    monkeypatch.setattr(
+        stocks_service, "save_stock_history",
+        lambda symbol, df, interval: stored.update(pd.to_datetime(df["time"]).dt.date),
+    )
+
+    first = stocks_service._read_through_history("HPG", "2024-03-11", "2024-03-15", "1D")
+    assert first["cache"]["upstream_calls"] == 1 and first["cache"]["upstream_calls_saved"] == 0
+
+    second = stocks_service._read_through_history("HPG", "2024-03-11", "2024-03-15", "1D")
+    assert calls == [("2024-03-11", "2024-03-15")]
+    assert second["cache"]["upstream_calls"] == 0 and second["cache"]["upstream_calls_saved"] == 1
@@ -0,0 +1,96 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.services import scrape_cache, scraper
+
+_PAGE = """<html><head><title>Hoa Phat posts record profit</title></head><body>
+<nav>Home | Markets</nav>
+<article><h1>Hoa Phat posts record profit</h1>
+<p>Hoa Phat Group reported record third quarter profit as steel prices recovered and sales volume climbed, with the company saying that demand from the construction sector was stronger than it had expected at the start of the year and that it would keep expanding capacity at its new plant.</p>
+<p>Hoa Phat Group reported record third quarter profit as steel prices recovered and sales volume climbed, with the company saying that demand from the construction sector was stronger than it had expected at the start of the year and that it would keep expanding capacity at its new plant.</p>
+<p>Hoa Phat Group reported record third quarter profit as steel prices recovered and sales volume climbed, with the company saying that demand from the construction sector was stronger than it had expected at the start of the year and that it would keep expanding capacity at its new plant.</p>
+<p>Hoa Phat Group reported record third quarter profit as steel prices recovered and sales volume climbed, with the company saying that demand from the construction sector was stronger than it had expected at the start of the year and that it would keep expanding capacity at its new plant.</p>
+</article><footer>Copyright</footer></body></html>"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/missing"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = _PAGE.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_batch_scrape_extracts_text_and_reports_timings(tmp_path, monkeypatch):
+    cache = scrape_cache.ScrapeCache(str(tmp_path), fresh_seconds=3600, max_age_seconds=86400, max_bytes=10**6)
+    monkeypatch.setattr(scraper, "scrape_cache", cache)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        batch = scraper.scrape_articles_sync([f"{base}/a1", f"{base}/a2", f"{base}/missing"])
+    finally:
+        server.shutdown()
+        scraper.shutdown()
+
+    ok, other, missing = batch["results"]
+    assert "record third quarter profit" in ok["text"] and ok["error"] is None
+    assert other["text"] == ok["text"]
+    assert missing["error"].startswith("download failed")
+    assert batch["timings"]["ok"] == 2 and batch["timings"]["failed"] == 1
+    assert batch["timings"]["parse_seconds"] > 0
+
+
+def test_repeat_scrape_is_served_from_cache(tmp_path, monkeypatch):
+    cache = scrape_cache.ScrapeCache(str(tmp_path), fresh_seconds=3600, max_age_seconds=86400, max_bytes=10**6)
+    monkeypatch.setattr(scraper, "scrape_cache", cache)
+    hits = {"n": 0}
+
+    class CountingHandler(_Handler):
+        def do_GET(self):
+            hits["n"] += 1
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = _PAGE.encode("utf-8")
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/a1?utm_source=zalo"
+    try:
+        first = scraper.scrape_articles_sync([url])["results"][0]
+        # Tracking params do not change the key; fresh entry means no request
+        again = scraper.scrape_articles_sync([url.split("?")[0]])["results"][0]
+        assert hits["n"] == 1 and again["cached"] and again["text"] == first["text"]
+
+        # Stale entry is revalidated with the ETag and answered by 304
+        cache.fresh_seconds = 0
+        revalidated = scraper.scrape_articles_sync([url])["results"][0]
+        assert hits["n"] == 2 and revalidated["cached"] and revalidated["text"] == first["text"]
+        assert cache.get_stats()["revalidated"] == 1
+    finally:
+        server.shutdown()
+        scraper.shutdown()
+
+
+def test_scrape_cache_evicts_oldest_over_size(tmp_path):
+    cache = scrape_cache.ScrapeCache(str(tmp_path), fresh_seconds=3600, max_age_seconds=86400, max_bytes=1)
+    for i in range(3):
+        cache.put(f"https://cafef.vn/a{i}", "t", "x" * 1000)
+    assert cache.evict() == 3
+    assert cache.get("https://cafef.vn/a0") is None
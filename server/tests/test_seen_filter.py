@@ -0,0 +1,86 @@
+from sqlalchemy import event, text
+
+from app.db.models import AnalyzedArticle, StockNews
+from app.db.schema import backfill_hashes
+from app.utils.text_hash import link_hash, title_hash
+from app.workers import pipeline
+
+
+def test_hashes_are_filled_on_insert_and_match_normalized_input(db_session):
+    db = db_session
+    db.add(pipeline.build_analyzed_article("HPG", {"title": "Old  News", "link": "https://www.x.vn/a/?utm_source=fb"}, {}))
+    db.commit()
+
+    row = db.query(AnalyzedArticle).one()
+    assert row.title_hash == title_hash("old news")
+    assert row.link_hash == link_hash("https://x.vn/a")
+
+    news = [
+        {"title": "  OLD news ", "link": "https://x.vn/other"},   # same title
+        {"title": "Renamed", "link": "https://x.vn/a#top"},       # same link
+        {"title": "fresh", "link": "https://x.vn/b"},
+        {"title": "Fresh", "link": "https://x.vn/c"},              # repeated within the list
+    ]
+    assert pipeline._new_articles(db, "HPG", news) == [news[2]]
+    assert len(pipeline._new_articles(db, "VNM", news)) == 3
+
+
+def test_backfill_fills_rows_written_before_the_columns(db_engine, db_session):
+    engine, db = db_engine, db_session
+    db.add(pipeline.build_analyzed_article("HPG", {"title": "Tin A", "link": "https://x.vn/a"}, {}))
+    db.add(StockNews(symbol="HPG", news_title="Tin A", news_link="https://x.vn/a"))
+    db.commit()
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE analyzed_articles SET title_hash = NULL, link_hash = NULL"))
+        conn.execute(text("UPDATE stock_news SET title_hash = NULL, link_hash = NULL"))
+
+    assert backfill_hashes(engine) == 2
+    assert backfill_hashes(engine) == 0
+    db.expire_all()
+    assert db.query(AnalyzedArticle).one().title_hash == title_hash("tin a")
+    assert db.query(StockNews).one().link_hash == link_hash("https://x.vn/a")
+
+
+def test_seen_lookup_uses_the_hash_indexes(db_engine, db_session):
+    engine = db_engine
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, params, *_: statements.append((sql, params)))
+    pipeline._new_articles(db_session, "HPG", [{"title": "a", "link": "https://x.vn/a"}])
+
+    sql, params = statements[-1]
+    with engine.connect() as conn:
+        plan = " ".join(str(row[-1]) for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params))
+    assert "ix_analyzed_articles_symbol_title_hash" in plan
+    assert "ix_analyzed_articles_symbol_link_hash" in plan
+
+
+def test_tracking_params_are_matched_by_name():
+    assert link_hash("https://x.vn/a?ref=home&utm_medium=zalo&fbclid=1") == link_hash("https://x.vn/a")
+    assert link_hash("https://x.vn/a?refid=1") != link_hash("https://x.vn/a?refid=2")
+
+
+def test_backfill_marks_rows_without_title_as_done(db_engine, db_session):
+    engine, db = db_engine, db_session
+    db.add(StockNews(symbol="HPG", news_title=None, news_link="https://x.vn/a"))
+    db.commit()
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE stock_news SET title_hash = NULL, link_hash = NULL"))
+
+    assert backfill_hashes(engine) == 1
+    assert backfill_hashes(engine) == 0
+
+
+def test_untitled_items_are_only_matched_by_link(db_engine, db_session):
+    engine, db = db_engine, db_session
+    db.add(pipeline.build_analyzed_article("HPG", {"title": "Tin A", "link": "https://x.vn/a"}, {}))
+    db.commit()
+    with engine.begin() as conn:
+        # Matched by link only, before the backfill reached its title
+        conn.execute(text("UPDATE analyzed_articles SET title_hash = NULL"))
+
+    news = [
+        {"title": None, "link": "https://x.vn/a"},
+        {"title": None, "link": "https://x.vn/b"},
+        {"title": "", "link": "https://x.vn/c"},
+    ]
+    assert pipeline._new_articles(db, "HPG", news) == news[1:]
@@ -0,0 +1,71 @@
+import json
+from datetime import datetime
+
+from app.db.models import AnalyzedArticle, Signal
+from app.services.analysis import signal_engine
+from app.utils.aho_corasick import AhoCorasick
+
+
+def _article(title, score, sentiment, relevant=True):
+    return AnalyzedArticle(
+        symbol="HPG", title=title, link=f"https://x.vn/{len(title)}", is_relevant=relevant,
+        score=score, sentiment=sentiment,
+        tldr=title, published_at=datetime(2024, 5, 2, 9, 0),
+    )
+
+
+def test_matcher_finds_whole_words_only():
+    matcher = AhoCorasick([("he", "he"), ("she", "she"), ("hers", "hers"), ("co tuc", "dividend")])
+    assert matcher.matches("she said hers") == {"she", "hers"}
+    assert matcher.matches("ushers") == set()
+    assert matcher.matches("chia co tuc, 20%") == {"dividend"}
+
+
+def test_rules_match_normalized_titles():
+    engine = signal_engine.SignalEngine(signal_engine.load_rules(path=""))
+    types = [r.signal_type for r in engine.match("HPG CHỐT QUYỀN chia CỔ TỨC, lợi nhuận quý 3 tăng")]
+    assert types == ["dividend_announced", "earnings_beat"]
+    # "dự án" as a word, not inside another word
+    assert engine.match("Khởi công dự án mới") and not engine.match("Dựán")
+    # Plural forms are listed in the rule data
+    assert [r.signal_type for r in engine.match("FPT wins two contracts, raises dividends")] == [
+        "dividend_announced", "major_contract",
+    ]
+
+
+def test_one_article_can_raise_several_signal_types(db_session, monkeypatch):
+    monkeypatch.setattr(signal_engine, "_engine", signal_engine.SignalEngine(signal_engine.load_rules(path="")))
+    db = db_session
+    row = _article("HPG chia cổ tức sau khi lợi nhuận kỷ lục", 8, "Bullish")
+    db.add(row)
+    db.commit()
+
+    signals = signal_engine.detect_signals(db, [row.id])
+    assert sorted(s.signal_type for s in signals) == ["dividend_announced", "earnings_beat"]
+
+
+def test_detect_signals_evaluates_only_given_rows_once(db_session, tmp_path, monkeypatch):
+    rules = tmp_path / "rules.json"
+    rules.write_text(json.dumps([{
+        "signal_type": "share_buyback", "keywords": ["mua lại cổ phiếu quỹ"],
+        "title": "🔁 {symbol}: Share Buyback", "min_score": 5, "expires_days": 10,
+    }]), encoding="utf-8")
+    monkeypatch.setattr(signal_engine, "_engine", signal_engine.SignalEngine(signal_engine.load_rules(str(rules))))
+
+    db = db_session
+    rows = [
+        _article("HPG chia cổ tức 20%", 9, "Bullish"),
+        _article("HPG mua lai co phieu quy", 6, "Neutral"),
+        _article("Hợp đồng lớn", 5, "Bullish"),  # below min_score
+        _article("Cổ tức", 9, "Bullish", relevant=False),
+    ]
+    db.add_all(rows)
+    db.commit()
+
+    signals = signal_engine.detect_signals(db, [r.id for r in rows])
+    assert {(s.article_id, s.signal_type, s.priority) for s in signals} == {
+        (rows[0].id, "dividend_announced", "high"),
+        (rows[1].id, "share_buyback", "medium"),
+    }
+    assert signal_engine.detect_signals(db, [r.id for r in rows]) == []
+    assert db.query(Signal).count() == 2
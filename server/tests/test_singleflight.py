@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import time
+
+from app.utils.singleflight import SingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+    sf = SingleFlight(window=60)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"close": 1}
+
+    key = sf.key(fetch, ("HPG",))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(sf.do(key, fetch))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"close": 1}] * 5
+    stats = sf.get_stats()
+    assert stats["merged"] == 4 and stats["in_flight"] == 0
+
+
+def test_async_callers_share_result_and_errors():
+    sf = SingleFlight(window=60)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    async def scenario():
+        key = sf.key(fetch, (["HPG", "VNM"],))
+        return await asyncio.gather(*(sf.do_async(key, fetch) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_async_service_call_is_coalesced_once(monkeypatch):
+    from app.services import stocks_service
+    from app.utils import singleflight
+
+    sf = SingleFlight(window=60)
+    monkeypatch.setattr(singleflight, "flights", sf)
+    monkeypatch.setattr(stocks_service, "flights", sf)
+
+    async def direct_call(fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    monkeypatch.setattr(stocks_service.upstream, "call", direct_call)
+    monkeypatch.setattr(stocks_service, "get_stock_intraday", singleflight.coalesced(lambda symbol: {"symbol": symbol}))
+
+    result = asyncio.run(stocks_service.get_stock_intraday_async("HPG"))
+    assert result == {"symbol": "HPG"}
+    assert sf.get_stats()["calls"] == 1
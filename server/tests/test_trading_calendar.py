@@ -0,0 +1,53 @@
+from datetime import date, datetime
+
+from app.utils import trading_calendar as cal
+
+
+def test_weekends_and_tet_are_closed():
+    assert not cal.is_trading_day(date(2025, 1, 25))  # Saturday
+    assert not cal.is_trading_day(date(2025, 1, 29))  # Tết
+    assert cal.is_trading_day(date(2025, 2, 3))
+    assert not cal.has_sessions("2025-01-25", "2025-02-02")
+
+
+def test_previous_session_skips_holidays():
+    # 1st session before the first post-Tết session is the Friday before Tết
+    assert cal.previous_session(date(2025, 2, 3)) == date(2025, 1, 24)
+    # From a closed day the 1st previous session is the last one before it
+    assert cal.previous_session(date(2025, 1, 29)) == date(2025, 1, 24)
+    assert cal.previous_session(date(2025, 2, 5), 3) == date(2025, 1, 24)
+
+
+def test_trading_days_and_count_agree():
+    days = cal.trading_days("2024-04-15", "2024-05-03")
+    assert date(2024, 4, 18) not in days  # Hùng Kings
+    assert date(2024, 4, 30) not in days
+    assert len(days) == cal.count_sessions("2024-04-15", "2024-05-03") == 11
+
+
+def test_market_phase_and_next_open():
+    assert cal.market_phase(datetime(2025, 2, 3, 8, 30)) == "pre_open"
+    assert cal.market_phase(datetime(2025, 2, 3, 10, 0)) == "morning"
+    assert cal.market_phase(datetime(2025, 2, 3, 12, 0)) == "lunch"
+    assert cal.market_phase(datetime(2025, 2, 3, 15, 0)) == "after_close"
+    assert cal.market_phase(datetime(2025, 1, 29, 10, 0)) == "closed"
+
+    assert cal.next_open(datetime(2025, 2, 3, 12, 0)) == datetime(2025, 2, 3, 13, 0)
+    assert cal.next_open(datetime(2025, 1, 24, 15, 0)) == datetime(2025, 2, 3, 9, 0)
+
+
+def test_latest_session():
+    assert cal.latest_session(datetime(2025, 2, 3, 8, 0)) == date(2025, 1, 24)
+    assert cal.latest_session(datetime(2025, 2, 3, 9, 30)) == date(2025, 2, 3)
+    assert cal.latest_closed_session(datetime(2025, 2, 3, 9, 30)) == date(2025, 1, 24)
+
+
+def test_2027_lunar_holidays_and_unknown_year_warning(capsys):
+    assert not cal.is_trading_day(date(2027, 2, 8))   # Tết
+    assert not cal.is_trading_day(date(2027, 4, 16))  # Hùng Kings
+    assert cal.is_trading_day(date(2027, 2, 11))
+
+    cal._warned_years.discard(2030)
+    cal.is_trading_day(date(2030, 3, 1))
+    cal.is_trading_day(date(2030, 3, 2))
+    assert capsys.readouterr().out.count("no holiday schedule for 2030") == 1
@@ -0,0 +1,52 @@
+import threading
+import time
+
+from app.utils.ttl_cache import MarketTTLCache
+
+
+def test_lru_eviction_and_counters():
+    cache = MarketTTLCache(maxsize=2)
+    cache.set("A", 1)
+    cache.set("B", 2)
+    assert cache.get("A") == 1
+    cache.set("C", 3)  # evicts B, the least recently used
+
+    assert cache.get("B") is None
+    assert cache.get("C") == 3
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2 and stats["misses"] == 1
+
+
+def test_stale_value_served_while_refreshing():
+    cache = MarketTTLCache(maxsize=8, stale_grace=60)
+    cache.ttl = lambda now=None: 0.01
+    cache.set("HPG", "old")
+    time.sleep(0.02)
+
+    refreshed = threading.Event()
+
+    def loader():
+        refreshed.set()
+        return "new"
+
+    assert cache.get_or_load("HPG", loader) == "old"
+    assert refreshed.wait(1)
+    time.sleep(0.05)
+    assert cache.get_stats()["stale_hits"] == 1
+    assert cache._data["HPG"][0] == "new"
+
+
+def test_get_or_load_many_loads_misses_in_one_call():
+    cache = MarketTTLCache(maxsize=8)
+    cache.set("A", 1)
+    calls = []
+
+    def loader(keys):
+        calls.append(list(keys))
+        return {k: k.lower() for k in keys if k != "X"}
+
+    assert cache.get_or_load_many(["A", "B", "C", "X"], loader) == {"A": 1, "B": "b", "C": "c"}
+    assert calls == [["B", "C", "X"]]
+    assert cache.get_or_load_many(["B", "C"], loader) == {"B": "b", "C": "c"}
+    assert len(calls) == 1
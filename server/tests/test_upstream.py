@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.upstream import UpstreamBusy, UpstreamGateway, UpstreamTimeout
+
+
+def test_call_returns_result_and_records_wait():
+    gw = UpstreamGateway(max_workers=2, max_queue=4, default_deadline=1)
+    assert asyncio.run(gw.call(lambda x: x * 2, 21)) == 42
+    stats = gw.get_stats()
+    assert stats["completed"] == 1 and stats["queue_depth"] == 0
+    gw.shutdown()
+
+
+def test_deadline_and_queue_limit():
+    gw = UpstreamGateway(max_workers=1, max_queue=1, default_deadline=0.05)
+    release = threading.Event()
+
+    async def scenario():
+        blocker = asyncio.ensure_future(gw.call(release.wait, 1))
+        await asyncio.sleep(0.01)
+        queued = asyncio.ensure_future(gw.call(time.time))
+        await asyncio.sleep(0.01)
+        with pytest.raises(UpstreamBusy):
+            await gw.call(time.time)
+        with pytest.raises(UpstreamTimeout):
+            await queued
+        release.set()
+        with pytest.raises(UpstreamTimeout):
+            await blocker
+
+    asyncio.run(scenario())
+    stats = gw.get_stats()
+    assert stats["rejected"] == 1 and stats["timeouts"] == 2
+    assert stats["queue_depth"] == 0
+    gw.shutdown()
+
+
+def test_cancelled_queued_call_releases_its_queue_slot():
+    gw = UpstreamGateway(max_workers=1, max_queue=1, default_deadline=1)
+    release = threading.Event()
+
+    async def scenario():
+        blocker = asyncio.ensure_future(gw.call(release.wait, 1))
+        await asyncio.sleep(0.01)
+        queued = asyncio.ensure_future(gw.call(time.time))
+        await asyncio.sleep(0.01)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert gw.get_stats()["queue_depth"] == 0
+        release.set()
+        await blocker
+        assert await gw.call(lambda: "ok") == "ok"
+
+    asyncio.run(scenario())
+    assert gw.get_stats()["queue_depth"] == 0
+    gw.shutdown()